@@ -1,15 +1,48 @@
+import hashlib
 import logging
 import os
+import threading
+import time
 
+import requests
 from keycloak.realm import KeycloakRealm
 
+from . import client, metrics
+
 log = logging.getLogger()
 
+# Tokens are refreshed this many seconds before they actually expire so that a
+# token handed to a tool never expires mid-request.
+TOKEN_REFRESH_MARGIN = int(os.getenv("VGS_TOKEN_REFRESH_MARGIN", "30"))
+# Lifetime assumed for tokens whose response carries no `expires_in`.
+TOKEN_DEFAULT_TTL = int(os.getenv("VGS_TOKEN_DEFAULT_TTL", "60"))
+
+
+class TimeoutSession(requests.Session):
+    """
+    A requests session with default connect and read timeouts.
+    """
+
+    def __init__(
+        self, connect_timeout=client.CONNECT_TIMEOUT, read_timeout=client.READ_TIMEOUT
+    ):
+        super().__init__()
+        self.timeout = (connect_timeout, read_timeout)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
 
 # TODO: could we replace this with a generic oauth client?
 class KeyCloak:
     def __init__(self, url, realm, client_id, secret):
         realm = KeycloakRealm(server_url=url, realm_name=realm)
+        # keycloak-client sends through a plain requests.Session without
+        # timeouts, and every tool waits on the token lock behind it
+        session = TimeoutSession()
+        session.headers.update(realm.client._headers)
+        realm.client._session = session
         self.client = realm.open_id_connect(client_id=client_id, client_secret=secret)
 
     def issue_token_for_client(self):
@@ -21,16 +54,99 @@ class KeyCloak:
         return token["access_token"]
 
 
+class TokenCache:
+    """
+    Process-wide cache of client-credentials tokens.
+
+    Tokens are keyed by (keycloak_url, realm, client_id, hash of the secret),
+    so a rotated secret gets a new client, and kept until shortly before
+    `expires_in` (or `default_ttl` when it is missing) runs out. Concurrent
+    callers that find a stale token wait on a per-key lock, so only one of
+    them goes to Keycloak.
+    """
+
+    def __init__(
+        self, refresh_margin=TOKEN_REFRESH_MARGIN, default_ttl=TOKEN_DEFAULT_TTL
+    ):
+        self.refresh_margin = refresh_margin
+        self.default_ttl = default_ttl
+        self._tokens = {}
+        self._clients = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _lock_for(self, key):
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    @staticmethod
+    def _key(url, realm, client_id, client_secret):
+        digest = hashlib.sha256((client_secret or "").encode()).hexdigest()
+        return url, realm, client_id, digest
+
+    def _fresh(self, key):
+        entry = self._tokens.get(key)
+        if entry and time.monotonic() < entry[1] - self.refresh_margin:
+            return entry[0]
+        return None
+
+    def get(self, url, realm, client_id, client_secret):
+        key = self._key(url, realm, client_id, client_secret)
+        token = self._fresh(key)
+        if token:
+            return token
+
+        with self._lock_for(key):
+            # another caller may have refreshed the token while we waited
+            token = self._fresh(key)
+            if token:
+                return token
+
+            keycloak = self._clients.get(key)
+            if keycloak is None:
+                log.debug(
+                    f"Initializing KeyCloak client for url: [{url}]; realm: [{realm}]; client_id: [{client_id}]"
+                )
+                keycloak = KeyCloak(
+                    url=url, realm=realm, client_id=client_id, secret=client_secret
+                )
+                self._clients[key] = keycloak
+
+            log.debug(f"Acquiring keycloak token for the client [{client_id}]")
+            started = time.perf_counter()
+            try:
+                response = keycloak.client.client_credentials()
+            except Exception as e:
+                metrics.TOKEN_FETCHES.labels(metrics.status_of(e)).inc()
+                raise
+            finally:
+                metrics.TOKEN_FETCH_DURATION.observe(time.perf_counter() - started)
+            metrics.TOKEN_FETCHES.labels("ok").inc()
+            token = response["access_token"]
+            expires_in = int(response.get("expires_in") or self.default_ttl)
+            expires_at = time.monotonic() + expires_in
+            self._tokens[key] = (token, expires_at)
+            return token
+
+    def invalidate(self, url, realm, client_id, client_secret):
+        self._tokens.pop(self._key(url, realm, client_id, client_secret), None)
+
+    def clear(self):
+        with self._guard:
+            self._tokens.clear()
+            self._clients.clear()
+
+
+token_cache = TokenCache()
+
+
 def get_jwt_token(url: str, realm: str):
     client_id = os.getenv("VGS_CLIENT_ID")
     client_secret = os.getenv("VGS_CLIENT_SECRET")
-    log.debug(
-        f"Initializing KeyCloak client for url: [{url}]; realm: [{realm}]; client_id: [{client_id}], {client_secret}"
-    )
-
-    keycloak = KeyCloak(url=url, realm=realm, client_id=client_id, secret=client_secret)
+    return token_cache.get(url, realm, client_id, client_secret)
 
-    log.debug(f"Acquiring keycloak token for the client [{client_id}]")
-    jwt_token = keycloak.issue_token_for_client()
 
-    return jwt_token
+def invalidate_jwt_token(url: str, realm: str):
+    token_cache.invalidate(
+        url, realm, os.getenv("VGS_CLIENT_ID"), os.getenv("VGS_CLIENT_SECRET")
+    )
@@ -0,0 +1,102 @@
+import asyncio
+import os
+
+import httpx
+
+BATCH_CONCURRENCY = int(os.getenv("CMP_BATCH_CONCURRENCY", "20"))
+# Upper bound on calls started per second by a bulk tool, 0 disables pacing.
+BULK_RATE_LIMIT = float(os.getenv("CMP_BULK_RATE_LIMIT", "10"))
+
+
+def unique(items):
+    """
+    Drop repeated items while keeping the original order.
+    """
+    return list(dict.fromkeys(items))
+
+
+def describe_error(error: Exception) -> dict:
+    """
+    Turn a failed upstream call into a compact, JSON-serializable error.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        return {
+            "status": error.response.status_code,
+            "detail": error.response.text,
+        }
+    return {"detail": str(error) or error.__class__.__name__}
+
+
+def progress_reporter(ctx, verb: str):
+    """
+    Build an `on_done` callback that reports bulk progress to the MCP client.
+
+    Progress is sent about once per percent so large batches don't flood the
+    client with notifications.
+    """
+
+    async def on_done(completed, total):
+        if ctx is None:
+            return
+        if completed % max(1, total // 100) == 0 or completed == total:
+            await ctx.report_progress(
+                completed, total, f"{verb} {completed} of {total} cards"
+            )
+
+    return on_done
+
+
+class RateLimiter:
+    """
+    Spaces out call starts so that no more than `rate` begin per second.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate else 0
+        self._next_start = 0.0
+
+    async def wait(self):
+        if not self.interval:
+            return
+        now = asyncio.get_running_loop().time()
+        start = max(now, self._next_start)
+        self._next_start = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+async def map_bounded(
+    func, items, concurrency=BATCH_CONCURRENCY, rate_limiter=None, on_done=None
+):
+    """
+    Await `func(item)` for every item with at most `concurrency` calls in flight.
+
+    Items are pulled by a fixed pool of workers, so a batch of thousands of
+    items never has more than `concurrency` coroutines alive. When given,
+    `rate_limiter` paces call starts and `on_done(completed, total)` is awaited
+    after each item finishes.
+
+    Returns a list of (item, result, error) tuples in input order. A failing
+    item never cancels the rest of the batch.
+    """
+    items = list(items)
+    results = [None] * len(items)
+    pending = iter(enumerate(items))
+    completed = 0
+
+    async def worker():
+        nonlocal completed
+        for index, item in pending:
+            if rate_limiter is not None:
+                await rate_limiter.wait()
+            try:
+                results[index] = (item, await func(item), None)
+            except Exception as e:
+                results[index] = (item, None, e)
+            completed += 1
+            if on_done is not None:
+                await on_done(completed, len(items))
+
+    workers = min(concurrency, len(items))
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return results
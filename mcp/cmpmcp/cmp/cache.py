@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    A bounded LRU cache whose entries also expire after `ttl` seconds.
+
+    A `ttl` of 0 disables the cache: nothing is stored and every lookup is a
+    miss. Hits and misses are counted for observability.
+
+    Readers take a `generation()` before fetching a value and pass it to
+    `set`, which drops the value if its key was invalidated meanwhile, so a
+    read that raced a write never caches what the write replaced.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        # key -> generation it was last invalidated at, for the newest keys
+        self._invalidated = OrderedDict()
+        # values read before this generation may predate a forgotten invalidation
+        self._oldest_valid = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_size > 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def generation(self):
+        with self._lock:
+            return self._generation
+
+    def set(self, key, value, generation=None):
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation is not None and (
+                generation < self._oldest_valid
+                or self._invalidated.get(key, 0) > generation
+            ):
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generation += 1
+            self._invalidated[key] = self._generation
+            self._invalidated.move_to_end(key)
+            while len(self._invalidated) > self.max_size:
+                _, generation = self._invalidated.popitem(last=False)
+                self._oldest_valid = generation
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self._invalidated.clear()
+            self._oldest_valid = self._generation
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
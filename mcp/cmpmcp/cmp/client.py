@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import os
+
+import httpx
+
+log = logging.getLogger()
+
+POOL_SIZE = int(os.getenv("VGS_HTTP_POOL_SIZE", "100"))
+CONNECT_TIMEOUT = float(os.getenv("VGS_HTTP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("VGS_HTTP_READ_TIMEOUT", "30"))
+# Seconds a request waits for a free pooled connection before failing.
+POOL_TIMEOUT = float(os.getenv("VGS_HTTP_POOL_TIMEOUT", "10"))
+
+
+def create_client(
+    pool_size=POOL_SIZE,
+    connect_timeout=CONNECT_TIMEOUT,
+    read_timeout=READ_TIMEOUT,
+    pool_timeout=POOL_TIMEOUT,
+) -> httpx.AsyncClient:
+    """
+    Create a keep-alive async client with a bounded connection pool.
+
+    Requests beyond `pool_size` wait up to `pool_timeout` seconds for a free
+    connection instead of opening new ones, so hundreds of concurrent tool
+    calls share the same pool without queueing forever.
+    """
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=pool_size, max_keepalive_connections=pool_size
+        ),
+        timeout=httpx.Timeout(read_timeout, connect=connect_timeout, pool=pool_timeout),
+    )
+
+
+_clients = {}
+_closing = set()
+
+
+async def _close_quietly(client):
+    try:
+        await client.aclose()
+    except Exception as e:
+        # connections opened on a loop that is gone can't be shut down cleanly
+        log.debug(f"Failed to close stale HTTP client: {e}")
+
+
+def _retire(client, client_loop):
+    """
+    Close a client replaced because it belongs to another event loop.
+
+    While that loop still runs (in another thread) the client is closed on
+    it; otherwise it is closed on the current loop.
+    """
+    if client_loop.is_running() and not client_loop.is_closed():
+        asyncio.run_coroutine_threadsafe(client.aclose(), client_loop)
+        return
+    task = asyncio.get_running_loop().create_task(_close_quietly(client))
+    _closing.add(task)
+    task.add_done_callback(_closing.discard)
+
+
+def get_client(environment: str) -> httpx.AsyncClient:
+    """
+    Return the shared client for an environment, creating it on first use.
+
+    Pooled connections belong to the event loop that opened them, so a client
+    is only reused on the loop it was created on and the one it replaces is
+    closed.
+    """
+    loop = asyncio.get_running_loop()
+    client, client_loop = _clients.get(environment, (None, None))
+    if client is None or client.is_closed or client_loop is not loop:
+        if client is not None and not client.is_closed:
+            _retire(client, client_loop)
+        log.debug(f"Creating pooled HTTP client for [{environment}]")
+        client = create_client(POOL_SIZE, CONNECT_TIMEOUT, READ_TIMEOUT, POOL_TIMEOUT)
+        _clients[environment] = (client, loop)
+    return client
+
+
+async def close_clients():
+    clients = list(_clients.values())
+    _clients.clear()
+    for client, _ in clients:
+        await client.aclose()
@@ -0,0 +1,142 @@
+import asyncio
+import decimal
+import logging
+import os
+import time
+from collections import deque
+
+log = logging.getLogger()
+
+# Cryptograms are valid for 24 hours, pooled ones are dropped an hour early so
+# a handed-out cryptogram always has time left for authorization.
+CRYPTOGRAM_TTL = int(os.getenv("CMP_CRYPTOGRAM_TTL", str(23 * 60 * 60)))
+MAX_POOL_SIZE = int(os.getenv("CMP_CRYPTOGRAM_POOL_MAX_SIZE", "5"))
+
+
+def pool_key(
+    environment, card_id, currency_code, amount, transaction_type, cryptogram_type
+):
+    """
+    Key a cryptogram by everything it was generated for.
+
+    Amounts are bucketed to the cent, so a pooled cryptogram is only ever handed
+    out for the same amount it was requested with.
+    """
+    if amount is not None:
+        amount = str(decimal.Decimal(amount).quantize(decimal.Decimal("0.01")))
+    return (
+        environment,
+        card_id,
+        currency_code,
+        amount,
+        transaction_type,
+        cryptogram_type,
+    )
+
+
+class CryptogramPool:
+    """
+    Keeps a few unused cryptograms ready for cards flagged as hot.
+
+    Only keys registered with `warm` are pooled. Every cryptogram is handed out
+    at most once, and taking one schedules a background refill back up to the
+    key's target size.
+    """
+
+    def __init__(self, ttl=CRYPTOGRAM_TTL, max_size=MAX_POOL_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._targets = {}
+        self._fetchers = {}
+        self._ready = {}
+        self._refills = {}
+
+    def warm(self, key, size, fetch):
+        """
+        Flag a key as hot and keep `size` cryptograms ready for it.
+
+        `fetch` is a coroutine function returning a fresh cryptogram response.
+        A size of 0 stops pooling the key and discards its cryptograms.
+        """
+        size = min(size, self.max_size)
+        if size <= 0:
+            self.cool(key)
+            return 0
+        self._targets[key] = size
+        self._fetchers[key] = fetch
+        self._ready.setdefault(key, deque())
+        self._schedule_refill(key)
+        return size
+
+    def cool(self, key):
+        self._targets.pop(key, None)
+        self._fetchers.pop(key, None)
+        self._ready.pop(key, None)
+        refill = self._refills.pop(key, None)
+        if refill is not None:
+            refill.cancel()
+
+    def discard(self, predicate):
+        """
+        Drop the ready cryptograms of every key matching `predicate`, for
+        instance after the card they were generated for changed, and refill
+        them. Refills in flight are restarted so they can't add cryptograms
+        generated before the change.
+        """
+        for key in [key for key in self._targets if predicate(key)]:
+            self._ready[key].clear()
+            refill = self._refills.pop(key, None)
+            if refill is not None:
+                refill.cancel()
+            self._schedule_refill(key)
+
+    def is_hot(self, key):
+        return key in self._targets
+
+    def available(self, key):
+        self._expire(key)
+        return len(self._ready.get(key, ()))
+
+    def take(self, key):
+        """
+        Hand out one unused cryptogram for the key, or None if none is ready.
+        """
+        if not self.is_hot(key):
+            return None
+        self._expire(key)
+        ready = self._ready[key]
+        response = ready.popleft()[1] if ready else None
+        self._schedule_refill(key)
+        return response
+
+    def _expire(self, key):
+        ready = self._ready.get(key)
+        now = time.monotonic()
+        while ready and ready[0][0] <= now:
+            ready.popleft()
+
+    def _schedule_refill(self, key):
+        refill = self._refills.get(key)
+        if refill is not None and not refill.done():
+            return
+        if len(self._ready[key]) >= self._targets[key]:
+            return
+        self._refills[key] = asyncio.get_running_loop().create_task(self._refill(key))
+
+    async def _refill(self, key):
+        while self.is_hot(key) and len(self._ready[key]) < self._targets[key]:
+            try:
+                response = await self._fetchers[key]()
+            except Exception as e:
+                log.warning(f"Failed to pre-fetch cryptogram for {key[1]}: {e}")
+                return
+            if self.is_hot(key):
+                self._ready[key].append((time.monotonic() + self.ttl, response))
+
+    async def wait_for_refills(self):
+        refills = [task for task in self._refills.values() if not task.done()]
+        await asyncio.gather(*refills, return_exceptions=True)
+
+    def clear(self):
+        for key in list(self._targets):
+            self.cool(key)
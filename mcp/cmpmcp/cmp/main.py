@@ -1,23 +1,47 @@
+import asyncio
 import decimal
 import logging
 import os
+import uuid
 from typing import Annotated
 
-import requests
-from fastmcp import FastMCP
+import httpx
+from fastmcp import Context, FastMCP
 from pydantic import Field
 
-from . import auth
+from . import (
+    auth,
+    batch,
+    cache,
+    client,
+    cryptograms,
+    metrics,
+    ratelimit,
+    retry,
+    singleflight,
+)
 
 logger = logging.getLogger(__name__)
 
 mcp = FastMCP("VGS CMP MCP 💳🔒")
+mcp.add_middleware(metrics.ToolMetricsMiddleware())
 log_level = os.getenv("LOG_LEVEL", "INFO")
 client_id = os.getenv("VGS_CLIENT_ID")
 client_secret = os.getenv("VGS_CLIENT_SECRET")
 
 logging.basicConfig(level=log_level)
 
+cryptogram_pool = cryptograms.CryptogramPool()
+card_reads = singleflight.SingleFlight()
+
+# Card metadata cache, disabled unless CMP_CARD_CACHE_TTL is set. Entries are
+# dropped whenever this server changes the card.
+card_cache = cache.TTLCache(
+    max_size=int(os.getenv("CMP_CARD_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("CMP_CARD_CACHE_TTL", "0")),
+)
+metrics.register_cache("cards", card_cache)
+
 environments = {
     "dev": {
         "cmp_url": "https://sandbox.vgsapi.io",
@@ -37,8 +61,63 @@ environments = {
 }
 
 
+async def _get_token(environment: str) -> str:
+    # token refreshes are blocking Keycloak calls, keep them off the event loop
+    return await asyncio.to_thread(
+        auth.get_jwt_token,
+        environments[environment]["keycloak_url"],
+        environments[environment]["keycloak_realm"],
+    )
+
+
+async def _invalidate_token(environment: str):
+    await asyncio.to_thread(
+        auth.invalidate_jwt_token,
+        environments[environment]["keycloak_url"],
+        environments[environment]["keycloak_realm"],
+    )
+
+
+async def _request(method: str, environment: str, path: str, **kwargs):
+    token = await _get_token(environment)
+    url = f"{environments[environment]['cmp_url']}{path}"
+    headers = {
+        "accept": "application/vnd.api+json",
+        "content-type": "application/vnd.api+json",
+        "authorization": f"Bearer {token}",
+    }
+    if method == "POST":
+        # the same key is sent on every retry so the server can drop repeats
+        headers["idempotency-key"] = str(uuid.uuid4())
+    family = ratelimit.endpoint_family(path)
+    limiter = ratelimit.get_limiter(environment, family)
+    reauthenticated = False
+
+    async def send():
+        nonlocal reauthenticated
+        if limiter is not None:
+            await limiter.acquire()
+        with metrics.UpstreamCall(family) as call:
+            response = await client.get_client(environment).request(
+                method, url, headers=headers, **kwargs
+            )
+            call.status = response.status_code
+        if limiter is not None:
+            limiter.observe(response.status_code, response.headers)
+        if response.status_code == 401 and not reauthenticated:
+            # the cached token may have been revoked early, try one fresh token
+            reauthenticated = True
+            await _invalidate_token(environment)
+            headers["authorization"] = f"Bearer {await _get_token(environment)}"
+            return await send()
+        response.raise_for_status()
+        return response
+
+    return await retry.get_policy(environment).run(send)
+
+
 @mcp.tool()
-def get_card(
+async def get_card(
     card_id: Annotated[
         str,
         Field(
@@ -61,23 +140,89 @@ def get_card(
         card_id (str): The ID of the Card to fetch.
         environment (str): The environment to fetch the card from.
     """
-    token = auth.get_jwt_token(
-        environments[environment]["keycloak_url"],
-        environments[environment]["keycloak_realm"],
+    return await _fetch_card(card_id, environment)
+
+
+async def _fetch_card(card_id: str, environment: str):
+    if card_cache.enabled:
+        card = card_cache.get((environment, card_id))
+        if card is not None:
+            return card
+    return await card_reads.do(
+        (environment, card_id), lambda: _download_card(card_id, environment)
     )
-    url = f"{environments[environment]['cmp_url']}/cards/{card_id}"
-    headers = {
-        "accept": "application/vnd.api+json",
-        "content-type": "application/vnd.api+json",
-        "authorization": f"Bearer {token}",
-    }
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    return response.json()
+
+
+def _card_changed(card_id: str, environment: str):
+    card_cache.invalidate((environment, card_id))
+    card_reads.forget(lambda key: key == (environment, card_id))
+    cryptogram_pool.discard(lambda key: key[:2] == (environment, card_id))
+
+
+async def _download_card(card_id: str, environment: str):
+    generation = card_cache.generation()
+    response = await _request("GET", environment, f"/cards/{card_id}")
+    card = response.json()
+    card_cache.set((environment, card_id), card, generation)
+    return card
 
 
 @mcp.tool()
-def create_network_token(
+async def get_cards(
+    card_ids: Annotated[
+        list[Annotated[str, Field(pattern="CRD[A-z0-9]+")]],
+        Field(
+            description="IDs of the Cards to fetch",
+            min_length=1,
+            max_length=1000,
+        ),
+    ],
+    environment: Annotated[
+        str,
+        Field(
+            description="Environment to fetch the cards from.",
+            default="sandbox",
+        ),
+    ],
+    concurrency: Annotated[
+        int,
+        Field(
+            description="Maximum number of cards fetched at the same time.",
+            default=batch.BATCH_CONCURRENCY,
+            ge=1,
+            le=100,
+        ),
+    ],
+):
+    """
+    Get many cards by ID in one call.
+
+    Cards are fetched concurrently, duplicate IDs are fetched once. A card that
+    fails to load is reported under `errors` and does not fail the batch.
+
+    Args:
+        card_ids (list[str]): The IDs of the Cards to fetch.
+        environment (str): The environment to fetch the cards from.
+        concurrency (int): Maximum number of cards fetched at the same time.
+    """
+    results = await batch.map_bounded(
+        lambda card_id: _fetch_card(card_id, environment),
+        batch.unique(card_ids),
+        concurrency,
+    )
+    cards = {}
+    errors = {}
+    for card_id, card, error in results:
+        if error is None:
+            cards[card_id] = card
+        else:
+            logger.warning(f"Failed to fetch card {card_id}: {error}")
+            errors[card_id] = batch.describe_error(error)
+    return {"data": cards, "errors": errors}
+
+
+@mcp.tool()
+async def create_network_token(
     card_id: Annotated[
         str,
         Field(
@@ -104,25 +249,122 @@ def create_network_token(
         card_id (str): The ID of the Card to create network token for.
         environment (str): The environment to create network token in.
     """
-    token = auth.get_jwt_token(
-        environments[environment]["keycloak_url"],
-        environments[environment]["keycloak_realm"],
-    )
-    url = f"{environments[environment]['cmp_url']}/cards/{card_id}/network-tokens"
-    headers = {
-        "accept": "application/vnd.api+json",
-        "content-type": "application/vnd.api+json",
-        "authorization": f"Bearer {token}",
-    }
+    return await _provision_network_token(card_id, environment)
 
+
+async def _provision_network_token(card_id: str, environment: str):
     # POST request with empty body as per VGS documentation
-    response = requests.post(url, headers=headers, json={})
-    response.raise_for_status()
+    try:
+        response = await _request(
+            "POST", environment, f"/cards/{card_id}/network-tokens", json={}
+        )
+    finally:
+        _card_changed(card_id, environment)
     return response.json()
 
 
 @mcp.tool()
-def fetch_network_token_cryptogram(
+async def create_network_tokens(
+    card_ids: Annotated[
+        list[Annotated[str, Field(pattern="CRD[A-z0-9]+")]],
+        Field(
+            description="IDs of the Cards to create network tokens for",
+            min_length=1,
+            max_length=10000,
+        ),
+    ],
+    environment: Annotated[
+        str,
+        Field(
+            description="Environment to create network tokens in.",
+            default="sandbox",
+        ),
+    ],
+    concurrency: Annotated[
+        int,
+        Field(
+            description="Maximum number of provisioning requests in flight.",
+            default=batch.BATCH_CONCURRENCY,
+            ge=1,
+            le=100,
+        ),
+    ],
+    rate_limit: Annotated[
+        float,
+        Field(
+            description="Maximum number of provisioning requests started per second. 0 disables the limit.",
+            default=batch.BULK_RATE_LIMIT,
+            ge=0,
+        ),
+    ],
+    ctx: Context | None = None,
+):
+    """
+    Create network tokens for many cards in one call.
+
+    Cards are provisioned by a pool of workers that never exceeds `concurrency`
+    requests in flight or `rate_limit` new requests per second. Progress is
+    reported to the client as cards complete. The result is a compact summary
+    holding the network token ID and state per provisioned card and the error
+    per failed card.
+
+    Args:
+        card_ids (list[str]): The IDs of the Cards to create network tokens for.
+        environment (str): The environment to create network tokens in.
+        concurrency (int): Maximum number of provisioning requests in flight.
+        rate_limit (float): Maximum number of provisioning requests started per second.
+    """
+    card_ids = batch.unique(card_ids)
+    results = await batch.map_bounded(
+        lambda card_id: _provision_network_token(card_id, environment),
+        card_ids,
+        concurrency,
+        rate_limiter=batch.RateLimiter(rate_limit),
+        on_done=batch.progress_reporter(ctx, "Provisioned"),
+    )
+    tokens = {}
+    errors = {}
+    for card_id, response, error in results:
+        if error is None:
+            network_token = response.get("data", {})
+            tokens[card_id] = {
+                "id": network_token.get("id"),
+                "state": network_token.get("attributes", {}).get("state"),
+            }
+        else:
+            logger.warning(f"Failed to create network token for {card_id}: {error}")
+            errors[card_id] = batch.describe_error(error)
+    return {
+        "total": len(card_ids),
+        "succeeded": len(tokens),
+        "failed": len(errors),
+        "data": tokens,
+        "errors": errors,
+    }
+
+
+TransactionType = Annotated[
+    str,
+    Field(
+        description="Type of transaction (e.g. ECOM for e-commerce)",
+        default="ECOM",
+        pattern="^[A-Z]+$",
+        choices=["ECOM", "AFT"],
+    ),
+]
+CryptogramType = Annotated[
+    str,
+    Field(
+        description="Type of cryptogram to generate (e.g. TAVV)",
+        default="TAVV",
+        pattern="^[A-Z]+$",
+        choices=["TAVV", "DTVV"],
+    ),
+]
+
+
+@mcp.tool()
+async def fetch_network_token_cryptogram(
     card_id: Annotated[
         str,
         Field(
@@ -153,24 +395,8 @@ def fetch_network_token_cryptogram(
             ge=0,
         ),
     ],
-    transaction_type: Annotated[
-        str,
-        Field(
-            description="Type of transaction (e.g. ECOM for e-commerce)",
-            default="ECOM",
-            pattern="^[A-Z]+$",
-            choices=["ECOM", "AFT"],
-        ),
-    ],
-    cryptogram_type: Annotated[
-        str,
-        Field(
-            description="Type of cryptogram to generate (e.g. TAVV)",
-            default="TAVV",
-            pattern="^[A-Z]+$",
-            choices=["TAVV", "DTVV"],
-        ),
-    ],
+    transaction_type: TransactionType,
+    cryptogram_type: CryptogramType,
 ):
     """
     Fetch a network token cryptogram for a specific card.
@@ -184,17 +410,26 @@ def fetch_network_token_cryptogram(
         card_id (str): The ID of the Card to fetch cryptogram for.
         environment (str): The environment to fetch cryptogram from.
     """
-    token = auth.get_jwt_token(
-        environments[environment]["keycloak_url"],
-        environments[environment]["keycloak_realm"],
+    key = cryptograms.pool_key(
+        environment,
+        card_id,
+        currency_code,
+        amount,
+        transaction_type,
+        cryptogram_type,
     )
-    url = f"{environments[environment]['cmp_url']}/cards/{card_id}/cryptogram"
-    headers = {
-        "accept": "application/vnd.api+json",
-        "content-type": "application/vnd.api+json",
-        "authorization": f"Bearer {token}",
-    }
+    pooled = cryptogram_pool.take(key)
+    if pooled is not None:
+        logger.info(f"Using pre-fetched cryptogram for {card_id}")
+        return pooled
+    return await _fetch_cryptogram(
+        card_id, environment, currency_code, amount, transaction_type, cryptogram_type
+    )
+
 
+async def _fetch_cryptogram(
+    card_id, environment, currency_code, amount, transaction_type, cryptogram_type
+):
     # POST request with data object as per VGS API documentation
     payload = {"data": {"attributes": {}}}
     for key, value in {
@@ -205,13 +440,97 @@ def fetch_network_token_cryptogram(
     }.items():
         if value is not None:
             payload["data"]["attributes"][key] = value
-    response = requests.post(url, headers=headers, json=payload)
-    response.raise_for_status()
+    response = await _request(
+        "POST", environment, f"/cards/{card_id}/cryptogram", json=payload
+    )
     return response.json()
 
 
 @mcp.tool()
-def get_real_time_account_update(
+async def warm_cryptogram_pool(
+    card_id: Annotated[
+        str,
+        Field(
+            description="ID of the hot Card to keep cryptograms ready for",
+            pattern="CRD[A-z0-9]+",
+        ),
+    ],
+    environment: Annotated[
+        str,
+        Field(
+            description="Environment to fetch cryptograms from.",
+            default="sandbox",
+        ),
+    ],
+    currency_code: Annotated[
+        str,
+        Field(
+            description="ISO 4217 alpha 3 currency code the cryptograms are for",
+            default=None,
+            pattern="^[A-Z]{3}$",
+        ),
+    ],
+    amount: Annotated[
+        decimal.Decimal,
+        Field(
+            description="Transaction amount the cryptograms are for",
+            default=None,
+            ge=0,
+        ),
+    ],
+    transaction_type: TransactionType,
+    cryptogram_type: CryptogramType,
+    size: Annotated[
+        int,
+        Field(
+            description="Number of unused cryptograms to keep ready. 0 stops pre-fetching.",
+            default=1,
+            ge=0,
+        ),
+    ],
+):
+    """
+    Keep unused cryptograms ready for a hot checkout card.
+
+    Once warmed, `fetch_network_token_cryptogram` calls with the same card,
+    currency, amount, transaction type and cryptogram type are answered from
+    the pool and the pool is refilled in the background. Each pooled
+    cryptogram is handed out only once.
+
+    Args:
+        card_id (str): The ID of the Card to keep cryptograms ready for.
+        environment (str): The environment to fetch cryptograms from.
+        size (int): Number of unused cryptograms to keep ready, 0 stops pre-fetching.
+    """
+    key = cryptograms.pool_key(
+        environment,
+        card_id,
+        currency_code,
+        amount,
+        transaction_type,
+        cryptogram_type,
+    )
+    size = cryptogram_pool.warm(
+        key,
+        size,
+        lambda: _fetch_cryptogram(
+            card_id,
+            environment,
+            currency_code,
+            amount,
+            transaction_type,
+            cryptogram_type,
+        ),
+    )
+    return {
+        "card_id": card_id,
+        "pool_size": size,
+        "available": cryptogram_pool.available(key),
+    }
+
+
+@mcp.tool()
+async def get_real_time_account_update(
     card_id: Annotated[
         str,
         Field(
@@ -239,25 +558,18 @@ def get_real_time_account_update(
         card_id (str): The ID of the Card to check for real-time updates.
         environment (str): The environment to check card updates in.
     """
-    token = auth.get_jwt_token(
-        environments[environment]["keycloak_url"],
-        environments[environment]["keycloak_realm"],
-    )
-    url = f"{environments[environment]['cmp_url']}/cards/{card_id}/check"
-    headers = {
-        "accept": "application/vnd.api+json",
-        "content-type": "application/vnd.api+json",
-        "authorization": f"Bearer {token}",
-    }
-
     # POST request with empty body as per VGS API documentation
-    response = requests.post(url, headers=headers, json={})
-    response.raise_for_status()
+    try:
+        response = await _request(
+            "POST", environment, f"/cards/{card_id}/check", json={}
+        )
+    finally:
+        _card_changed(card_id, environment)
     return response.json()
 
 
 @mcp.tool()
-def subscribe_to_account_updates(
+async def subscribe_to_account_updates(
     card_id: Annotated[
         str,
         Field(
@@ -286,26 +598,26 @@ def subscribe_to_account_updates(
         webhook_url (str): The URL where account update webhooks will be sent.
         environment (str): The environment to subscribe to account updates in.
     """
-    token = auth.get_jwt_token(
-        environments[environment]["keycloak_url"],
-        environments[environment]["keycloak_realm"],
-    )
-    url = f"{environments[environment]['cmp_url']}/cards/{card_id}/card-update-subscriptions"
-    headers = {
-        "accept": "application/vnd.api+json",
-        "content-type": "application/vnd.api+json",
-        "authorization": f"Bearer {token}",
-    }
+    return await _subscribe(card_id, environment)
+
 
+async def _subscribe(card_id: str, environment: str):
     payload = {}
 
-    response = requests.post(url, headers=headers, json=payload)
-    response.raise_for_status()
+    try:
+        response = await _request(
+            "POST",
+            environment,
+            f"/cards/{card_id}/card-update-subscriptions",
+            json=payload,
+        )
+    finally:
+        _card_changed(card_id, environment)
     return response.json()
 
 
 @mcp.tool()
-def unsubscribe_from_account_updates(
+async def unsubscribe_from_account_updates(
     card_id: Annotated[
         str,
         Field(
@@ -333,24 +645,230 @@ def unsubscribe_from_account_updates(
         subscription_id (str): The ID of the subscription to unsubscribe from.
         environment (str): The environment to unsubscribe from account updates in.
     """
-    token = auth.get_jwt_token(
-        environments[environment]["keycloak_url"],
-        environments[environment]["keycloak_realm"],
+    await _unsubscribe(card_id, environment)
+    return {
+        "message": f"Successfully unsubscribed {card_id} from account updates",
+    }
+
+
+async def _unsubscribe(card_id: str, environment: str):
+    try:
+        await _request(
+            "DELETE", environment, f"/cards/{card_id}/card-update-subscriptions"
+        )
+    finally:
+        _card_changed(card_id, environment)
+
+
+def _already_subscribed(response: httpx.Response) -> bool:
+    return response.status_code == 409
+
+
+def _not_subscribed(response: httpx.Response) -> bool:
+    """
+    A 404 is also returned for cards that don't exist, only the error body
+    tells whether it is the subscription that is missing.
+    """
+    if response.status_code != 404:
+        return False
+    try:
+        errors = response.json().get("errors") or []
+    except ValueError:
+        return False
+    return any(
+        "subscription" in str(value).lower()
+        for error in errors
+        if isinstance(error, dict)
+        for value in (error.get("title"), error.get("detail"), error.get("code"))
     )
-    url = f"{environments[environment]['cmp_url']}/cards/{card_id}/card-update-subscriptions"
-    headers = {
-        "accept": "application/vnd.api+json",
-        "content-type": "application/vnd.api+json",
-        "authorization": f"Bearer {token}",
+
+
+async def _bulk_update_subscriptions(
+    card_ids, environment, update, is_done, verb, concurrency, rate_limit, ctx
+):
+    """
+    `is_done(response)` tells whether a failed update means the card already
+    is in the requested state; such cards are counted as skipped.
+    """
+    card_ids = batch.unique(card_ids)
+
+    async def apply(card_id):
+        try:
+            await update(card_id, environment)
+        except httpx.HTTPStatusError as e:
+            if is_done(e.response):
+                return "skipped"
+            raise
+        return "updated"
+
+    results = await batch.map_bounded(
+        apply,
+        card_ids,
+        concurrency,
+        rate_limiter=batch.RateLimiter(rate_limit),
+        on_done=batch.progress_reporter(ctx, verb),
+    )
+    counts = {"updated": 0, "skipped": 0}
+    errors = {}
+    for card_id, outcome, error in results:
+        if error is None:
+            counts[outcome] += 1
+        else:
+            logger.warning(f"Failed to update subscription for {card_id}: {error}")
+            errors[card_id] = batch.describe_error(error)
+    return counts, errors
+
+
+@mcp.tool()
+async def bulk_subscribe_to_account_updates(
+    card_ids: Annotated[
+        list[Annotated[str, Field(pattern="CRD[A-z0-9]+")]],
+        Field(
+            description="IDs of the Cards to enroll in account updater",
+            min_length=1,
+            max_length=50000,
+        ),
+    ],
+    environment: Annotated[
+        str,
+        Field(
+            description="Environment to subscribe to account updates in.",
+            default="sandbox",
+        ),
+    ],
+    concurrency: Annotated[
+        int,
+        Field(
+            description="Maximum number of subscription requests in flight.",
+            default=batch.BATCH_CONCURRENCY,
+            ge=1,
+            le=100,
+        ),
+    ],
+    rate_limit: Annotated[
+        float,
+        Field(
+            description="Maximum number of subscription requests started per second. 0 disables the limit.",
+            default=batch.BULK_RATE_LIMIT,
+            ge=0,
+        ),
+    ],
+    ctx: Context | None = None,
+):
+    """
+    Subscribe many cards to account updates in one call.
+
+    Cards are enrolled concurrently, transient failures are retried with
+    backoff, and cards that are already subscribed are counted as skipped.
+
+    https://docs.verygoodsecurity.com/card-management/api/account-updater
+
+    Args:
+        card_ids (list[str]): The IDs of the Cards to enroll.
+        environment (str): The environment to subscribe to account updates in.
+        concurrency (int): Maximum number of subscription requests in flight.
+        rate_limit (float): Maximum number of subscription requests started per second.
+    """
+    counts, errors = await _bulk_update_subscriptions(
+        card_ids,
+        environment,
+        _subscribe,
+        _already_subscribed,
+        "Subscribed",
+        concurrency,
+        rate_limit,
+        ctx,
+    )
+    return {
+        "total": counts["updated"] + counts["skipped"] + len(errors),
+        "subscribed": counts["updated"],
+        "skipped": counts["skipped"],
+        "failed": len(errors),
+        "errors": errors,
     }
 
-    response = requests.delete(url, headers=headers)
-    response.raise_for_status()
+
+@mcp.tool()
+async def bulk_unsubscribe_from_account_updates(
+    card_ids: Annotated[
+        list[Annotated[str, Field(pattern="CRD[A-z0-9]+")]],
+        Field(
+            description="IDs of the Cards to unenroll from account updater",
+            min_length=1,
+            max_length=50000,
+        ),
+    ],
+    environment: Annotated[
+        str,
+        Field(
+            description="Environment to unsubscribe from account updates in.",
+            default="sandbox",
+        ),
+    ],
+    concurrency: Annotated[
+        int,
+        Field(
+            description="Maximum number of unsubscribe requests in flight.",
+            default=batch.BATCH_CONCURRENCY,
+            ge=1,
+            le=100,
+        ),
+    ],
+    rate_limit: Annotated[
+        float,
+        Field(
+            description="Maximum number of unsubscribe requests started per second. 0 disables the limit.",
+            default=batch.BULK_RATE_LIMIT,
+            ge=0,
+        ),
+    ],
+    ctx: Context | None = None,
+):
+    """
+    Unsubscribe many cards from account updates in one call.
+
+    Cards are unenrolled concurrently, transient failures are retried with
+    backoff, and cards without a subscription are counted as skipped. Cards
+    that don't exist are reported under errors.
+
+    https://docs.verygoodsecurity.com/card-management/api/account-updater
+
+    Args:
+        card_ids (list[str]): The IDs of the Cards to unenroll.
+        environment (str): The environment to unsubscribe from account updates in.
+        concurrency (int): Maximum number of unsubscribe requests in flight.
+        rate_limit (float): Maximum number of unsubscribe requests started per second.
+    """
+    counts, errors = await _bulk_update_subscriptions(
+        card_ids,
+        environment,
+        _unsubscribe,
+        _not_subscribed,
+        "Unsubscribed",
+        concurrency,
+        rate_limit,
+        ctx,
+    )
     return {
-        "message": f"Successfully unsubscribed {card_id} from account updates",
+        "total": counts["updated"] + counts["skipped"] + len(errors),
+        "unsubscribed": counts["updated"],
+        "skipped": counts["skipped"],
+        "failed": len(errors),
+        "errors": errors,
     }
 
 
+@mcp.tool()
+async def get_card_cache_stats():
+    """
+    Get hit/miss counters and size of the card metadata cache.
+
+    The cache is only enabled when CMP_CARD_CACHE_TTL is set to a positive number of seconds.
+    """
+    return card_cache.stats()
+
+
 if __name__ == "__main__":
     # Initialize and run the server
+    metrics.serve()
     mcp.run(transport="stdio")
@@ -0,0 +1,127 @@
+import asyncio
+import os
+import time
+from email.utils import parsedate_to_datetime
+
+# Requests per second allowed per (environment, endpoint family) before the
+# server says otherwise, 0 disables client-side limiting.
+RATE_LIMIT = float(os.getenv("CMP_RATE_LIMIT", "20"))
+RATE_BURST = int(os.getenv("CMP_RATE_BURST", "10"))
+# Share of the quota advertised by rate limit headers that we aim for.
+RATE_HEADROOM = 0.9
+
+
+def _number(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def retry_after(value):
+    """
+    Seconds to wait according to a Retry-After header, given either as a
+    number of seconds or as an HTTP date.
+    """
+    seconds = _number(value)
+    if seconds is not None or not isinstance(value, str):
+        return seconds
+    try:
+        return parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket whose rate follows what the server reports.
+
+    A 429 (or a 503 with Retry-After) pauses all callers until Retry-After
+    has passed and halves the rate. RateLimit-Remaining/RateLimit-Reset
+    headers (or their X- variants) set the rate to just under the remaining
+    quota. Other successful responses win back a little of the configured
+    rate each, so throughput settles just below the server's limit instead
+    of repeatedly running into it.
+    """
+
+    def __init__(self, rate=RATE_LIMIT, burst=RATE_BURST):
+        self.max_rate = rate
+        self.min_rate = rate / 20
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def reserve(self) -> float:
+        """
+        Take a token and return how many seconds to wait before using it.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(delay, self.blocked_until - now)
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def observe(self, status_code, headers):
+        """
+        Adapt to the status and rate limit headers of a response.
+        """
+        now = time.monotonic()
+        wait = retry_after(headers.get("Retry-After"))
+        if status_code == 429 or (status_code == 503 and wait is not None):
+            wait = wait if wait is not None else 1 / self.rate
+            self.blocked_until = max(self.blocked_until, now + wait)
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+            return
+
+        remaining = _number(
+            headers.get("RateLimit-Remaining") or headers.get("X-RateLimit-Remaining")
+        )
+        reset = _number(
+            headers.get("RateLimit-Reset") or headers.get("X-RateLimit-Reset")
+        )
+        if remaining is not None and reset is not None:
+            if reset > 1e9:
+                # some servers send the reset time as a unix timestamp
+                reset -= time.time()
+            reset = max(reset, 1.0)
+            if remaining < 1:
+                self.blocked_until = max(self.blocked_until, now + reset)
+            self.rate = min(
+                self.max_rate, max(self.min_rate, remaining / reset * RATE_HEADROOM)
+            )
+        else:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+_limiters = {}
+
+
+def endpoint_family(path: str) -> str:
+    return "cryptogram" if "cryptogram" in path else "cards"
+
+
+def get_limiter(environment: str, family: str) -> AdaptiveRateLimiter | None:
+    """
+    Return the limiter shared by all calls to one endpoint family of an
+    environment, or None when limiting is disabled.
+    """
+    if RATE_LIMIT <= 0:
+        return None
+    key = (environment, family)
+    limiter = _limiters.get(key)
+    if limiter is None:
+        limiter = _limiters[key] = AdaptiveRateLimiter(RATE_LIMIT, RATE_BURST)
+    return limiter
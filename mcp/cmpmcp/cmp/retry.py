@@ -0,0 +1,118 @@
+import asyncio
+import os
+import random
+import time
+
+import httpx
+
+RETRY_ATTEMPTS = int(os.getenv("CMP_RETRY_ATTEMPTS", "3"))
+RETRY_BACKOFF = float(os.getenv("CMP_RETRY_BACKOFF", "0.25"))
+RETRY_MAX_BACKOFF = float(os.getenv("CMP_RETRY_MAX_BACKOFF", "4"))
+# No retry is started once a call has taken this many seconds.
+RETRY_DEADLINE = float(os.getenv("CMP_RETRY_DEADLINE", "15"))
+# Retries allowed per call on average once the reserve is used up.
+RETRY_BUDGET = float(os.getenv("CMP_RETRY_BUDGET", "0.2"))
+RETRY_BUDGET_RESERVE = 10
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Connection problems, throttling and server errors are worth another try.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+class RetryBudget:
+    """
+    Caps retries to a share of calls so an upstream outage is not made worse
+    by every call retrying.
+
+    Each call deposits `ratio` of a retry and each retry spends a whole one.
+    Up to `reserve` retries can be saved up for short bursts of failures.
+    """
+
+    def __init__(self, ratio=RETRY_BUDGET, reserve=RETRY_BUDGET_RESERVE):
+        self.ratio = ratio
+        self.reserve = reserve
+        self.tokens = float(reserve)
+
+    def deposit(self):
+        self.tokens = min(self.reserve, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class RetryPolicy:
+    """
+    Retries retryable failures with exponential backoff and full jitter.
+
+    The n-th retry waits a random time between 0 and
+    min(max_backoff, backoff * 2**n), so callers that failed together don't
+    retry together. A call gives up when it runs out of attempts, when the
+    next retry would end after `deadline` seconds, or when the budget is
+    spent.
+    """
+
+    def __init__(
+        self,
+        attempts=RETRY_ATTEMPTS,
+        backoff=RETRY_BACKOFF,
+        max_backoff=RETRY_MAX_BACKOFF,
+        deadline=RETRY_DEADLINE,
+        budget=None,
+    ):
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.budget = budget
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+    async def run(self, func):
+        """
+        Await `func()` until it succeeds or the policy gives up.
+        """
+        started = time.monotonic()
+        if self.budget is not None:
+            self.budget.deposit()
+        for attempt in range(self.attempts):
+            try:
+                return await func()
+            except Exception as e:
+                if attempt == self.attempts - 1 or not is_retryable(e):
+                    raise
+                delay = self.delay(attempt)
+                if time.monotonic() - started + delay > self.deadline:
+                    raise
+                if self.budget is not None and not self.budget.withdraw():
+                    raise
+                await asyncio.sleep(delay)
+
+
+_policies = {}
+
+
+def get_policy(environment: str) -> RetryPolicy:
+    """
+    Return the retry policy of an environment; its budget is shared by all
+    calls to that environment.
+    """
+    policy = _policies.get(environment)
+    if policy is None:
+        policy = _policies[environment] = RetryPolicy(
+            RETRY_ATTEMPTS,
+            RETRY_BACKOFF,
+            RETRY_MAX_BACKOFF,
+            RETRY_DEADLINE,
+            RetryBudget(RETRY_BUDGET, RETRY_BUDGET_RESERVE),
+        )
+    return policy
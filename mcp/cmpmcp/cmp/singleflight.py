@@ -0,0 +1,42 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls into one.
+
+    The first caller for a key starts the call; callers arriving while it is
+    still running await the same result (or exception) instead of starting
+    their own. Nothing is kept once the call finishes, so this never serves
+    stale data the way a cache can.
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, func):
+        """
+        Await `func()`, or the call already running for `key`.
+        """
+        task = self._calls.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._discard(key, done))
+        # shielded so one caller giving up doesn't cancel the call for the rest
+        return await asyncio.shield(task)
+
+    def _discard(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    def forget(self, predicate):
+        """
+        Let the next callers for keys matching `predicate` start a new call,
+        e.g. after a write made the running ones outdated.
+        """
+        for key in [key for key in self._calls if predicate(key)]:
+            del self._calls[key]
+
+    def in_flight(self) -> int:
+        return len(self._calls)
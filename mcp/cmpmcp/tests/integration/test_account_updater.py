@@ -1,15 +1,20 @@
+import asyncio
 import os
 
 import pytest
 import requests
 
 from cmp.auth import get_jwt_token
-from cmp.main import (environments, get_real_time_account_update,
-                      subscribe_to_account_updates,
-                      unsubscribe_from_account_updates)
+from cmp.main import (
+    environments,
+    get_real_time_account_update,
+    subscribe_to_account_updates,
+    unsubscribe_from_account_updates,
+)
 
 environment = os.getenv("ENVIRONMENT", "sandbox")
 
+
 @pytest.fixture
 def updated_card_id():
     # see https://docs.verygoodsecurity.com/card-management/testing/create-card#method-3a--network-token-provisioning-for-visamastercard-cards-with-networks
@@ -43,7 +48,9 @@ def updated_card_id():
 def test_get_real_time_account_update(updated_card_id):
     """Test real-time account update check for a specific card"""
 
-    response = get_real_time_account_update.fn(updated_card_id, environment)
+    response = asyncio.run(
+        get_real_time_account_update.fn(updated_card_id, environment)
+    )
     print(f"Real-time account update response: {response}")
 
     # Verify response structure
@@ -71,7 +78,9 @@ def test_get_real_time_account_update(updated_card_id):
 def test_subscribe_to_account_updates(updated_card_id):
     """Test subscribing to account updates for a specific card"""
 
-    response = subscribe_to_account_updates.fn(updated_card_id, environment)
+    response = asyncio.run(
+        subscribe_to_account_updates.fn(updated_card_id, environment)
+    )
     print(f"Subscription response: {response}")
 
     # Verify response structure
@@ -99,12 +108,16 @@ def test_unsubscribe_from_account_updates(updated_card_id):
     """Test unsubscribing from account updates for a specific card"""
 
     # First, create a subscription
-    subscription_response = subscribe_to_account_updates.fn(updated_card_id, environment)
+    subscription_response = asyncio.run(
+        subscribe_to_account_updates.fn(updated_card_id, environment)
+    )
     subscription_id = subscription_response["data"]["id"]
     print(f"Created subscription for testing: {subscription_id}")
 
     # Now test unsubscription
-    response = unsubscribe_from_account_updates.fn(updated_card_id, environment)
+    response = asyncio.run(
+        unsubscribe_from_account_updates.fn(updated_card_id, environment)
+    )
     print(f"Unsubscription response: {response}")
 
     # Verify response structure
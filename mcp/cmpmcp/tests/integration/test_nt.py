@@ -1,15 +1,20 @@
+import asyncio
 import os
 
 import pytest
 import requests
 
 from cmp.auth import get_jwt_token
-from cmp.main import (create_network_token, environments,
-                      fetch_network_token_cryptogram, get_card)
-
+from cmp.main import (
+    create_network_token,
+    environments,
+    fetch_network_token_cryptogram,
+    get_card,
+)
 
 environment = os.getenv("ENVIRONMENT", "sandbox")
 
+
 @pytest.fixture
 def network_token_compatible_card_id():
     # see https://docs.verygoodsecurity.com/card-management/testing/create-card#method-3a--network-token-provisioning-for-visamastercard-cards-with-networks
@@ -40,7 +45,9 @@ def network_token_compatible_card_id():
     reason="VGS_CLIENT_ID environment variable not set",
 )
 def test_create_network_token(network_token_compatible_card_id):
-    response = create_network_token.fn(network_token_compatible_card_id, environment)
+    response = asyncio.run(
+        create_network_token.fn(network_token_compatible_card_id, environment)
+    )
     print(response)
 
 
@@ -49,8 +56,10 @@ def test_create_network_token(network_token_compatible_card_id):
     reason="VGS_CLIENT_ID environment variable not set",
 )
 def test_fetch_network_token_cryptogram(network_token_compatible_card_id):
-    response = fetch_network_token_cryptogram.fn(
-        network_token_compatible_card_id, environment, None, None, None, None
+    response = asyncio.run(
+        fetch_network_token_cryptogram.fn(
+            network_token_compatible_card_id, environment, None, None, None, None
+        )
     )
     print(response)
 
@@ -60,8 +69,10 @@ def test_fetch_network_token_cryptogram(network_token_compatible_card_id):
     reason="VGS_CLIENT_ID environment variable not set",
 )
 def test_get_card(network_token_compatible_card_id):
-    response = get_card.fn(
-        network_token_compatible_card_id,
-        environment,
+    response = asyncio.run(
+        get_card.fn(
+            network_token_compatible_card_id,
+            environment,
+        )
     )
     print(response)
@@ -0,0 +1,117 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from cmp import auth
+from cmp.auth import TokenCache
+
+
+@pytest.fixture
+def mock_keycloak():
+    """Mock KeyCloak client issuing numbered tokens"""
+    keycloak = MagicMock()
+    counter = iter(range(1, 1000))
+    keycloak.client.client_credentials.side_effect = lambda: {
+        "access_token": f"token-{next(counter)}",
+        "expires_in": 300,
+    }
+    with patch("cmp.auth.KeyCloak", return_value=keycloak) as mock_cls:
+        yield mock_cls, keycloak
+
+
+def test_token_is_reused_until_expiry(mock_keycloak):
+    mock_cls, keycloak = mock_keycloak
+    cache = TokenCache(refresh_margin=30)
+    assert cache.get("https://auth", "vgs", "client", "secret") == "token-1"
+    assert cache.get("https://auth", "vgs", "client", "secret") == "token-1"
+    assert keycloak.client.client_credentials.call_count == 1
+    assert mock_cls.call_count == 1
+
+
+def test_token_is_refreshed_before_expiry(mock_keycloak):
+    _, keycloak = mock_keycloak
+    cache = TokenCache(refresh_margin=30)
+    with patch("cmp.auth.time.monotonic", return_value=1000.0):
+        assert cache.get("https://auth", "vgs", "client", "secret") == "token-1"
+    # 300s lifetime minus the 30s margin
+    with patch("cmp.auth.time.monotonic", return_value=1269.0):
+        assert cache.get("https://auth", "vgs", "client", "secret") == "token-1"
+    with patch("cmp.auth.time.monotonic", return_value=1271.0):
+        assert cache.get("https://auth", "vgs", "client", "secret") == "token-2"
+    assert keycloak.client.client_credentials.call_count == 2
+
+
+def test_tokens_are_keyed_by_realm_and_client(mock_keycloak):
+    cache = TokenCache()
+    assert cache.get("https://auth", "vgs", "client", "secret") == "token-1"
+    assert cache.get("https://auth", "other", "client", "secret") == "token-2"
+    assert cache.get("https://auth", "vgs", "client-2", "secret") == "token-3"
+    assert cache.get("https://auth", "vgs", "client", "secret") == "token-1"
+
+
+def test_rotated_secret_gets_a_new_client(mock_keycloak):
+    mock_cls, _ = mock_keycloak
+    cache = TokenCache()
+    assert cache.get("https://auth", "vgs", "client", "secret") == "token-1"
+    assert cache.get("https://auth", "vgs", "client", "rotated") == "token-2"
+    assert mock_cls.call_args.kwargs["secret"] == "rotated"
+    assert mock_cls.call_count == 2
+
+
+def test_token_without_expiry_uses_default_ttl(mock_keycloak):
+    _, keycloak = mock_keycloak
+    keycloak.client.client_credentials.side_effect = lambda: {"access_token": "token"}
+    cache = TokenCache(refresh_margin=30, default_ttl=60)
+    with patch("cmp.auth.time.monotonic", return_value=1000.0):
+        cache.get("https://auth", "vgs", "client", "secret")
+    with patch("cmp.auth.time.monotonic", return_value=1029.0):
+        cache.get("https://auth", "vgs", "client", "secret")
+    assert keycloak.client.client_credentials.call_count == 1
+    with patch("cmp.auth.time.monotonic", return_value=1031.0):
+        cache.get("https://auth", "vgs", "client", "secret")
+    assert keycloak.client.client_credentials.call_count == 2
+
+
+def test_invalidate_forces_refresh(mock_keycloak):
+    cache = TokenCache()
+    assert cache.get("https://auth", "vgs", "client", "secret") == "token-1"
+    cache.invalidate("https://auth", "vgs", "client", "secret")
+    assert cache.get("https://auth", "vgs", "client", "secret") == "token-2"
+
+
+def test_concurrent_refreshes_are_collapsed(mock_keycloak):
+    _, keycloak = mock_keycloak
+
+    def slow_credentials():
+        time.sleep(0.05)
+        return {"access_token": "token", "expires_in": 300}
+
+    keycloak.client.client_credentials.side_effect = slow_credentials
+    cache = TokenCache()
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(
+                cache.get("https://auth", "vgs", "client", "secret")
+            )
+        )
+        for _ in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["token"] * 10
+    assert keycloak.client.client_credentials.call_count == 1
+
+
+def test_keycloak_uses_a_session_with_timeouts():
+    keycloak = auth.KeyCloak("https://auth.example.com/auth", "vgs", "id", "s")
+    session = keycloak.client._realm.client.session
+    assert isinstance(session, auth.TimeoutSession)
+    with patch("requests.Session.request") as mock_request:
+        session.get("https://auth.example.com/auth/realms/vgs")
+    assert mock_request.call_args.kwargs["timeout"] == session.timeout
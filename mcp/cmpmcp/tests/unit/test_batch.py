@@ -0,0 +1,118 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+
+from cmp import batch
+
+
+def test_unique_keeps_order():
+    assert batch.unique(["CRD2", "CRD1", "CRD2", "CRD3", "CRD1"]) == [
+        "CRD2",
+        "CRD1",
+        "CRD3",
+    ]
+
+
+def test_map_bounded_limits_concurrency():
+    in_flight = 0
+    peak = 0
+
+    async def work(item):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return item * 2
+
+    results = asyncio.run(batch.map_bounded(work, range(20), concurrency=3))
+
+    assert peak == 3
+    assert [result for _, result, _ in results] == [i * 2 for i in range(20)]
+
+
+def test_map_bounded_collects_errors():
+    async def work(item):
+        if item == 2:
+            raise ValueError("boom")
+        return item
+
+    results = asyncio.run(batch.map_bounded(work, [1, 2, 3]))
+
+    assert results[0] == (1, 1, None)
+    assert results[1][0] == 2 and isinstance(results[1][2], ValueError)
+    assert results[2] == (3, 3, None)
+
+
+def test_describe_error():
+    request = httpx.Request("GET", "https://sandbox.vgsapi.com/cards/CRD1")
+    response = httpx.Response(500, text="oops", request=request)
+    error = httpx.HTTPStatusError("server error", request=request, response=response)
+
+    assert batch.describe_error(error) == {"status": 500, "detail": "oops"}
+    assert batch.describe_error(ValueError("boom")) == {"detail": "boom"}
+    assert batch.describe_error(TimeoutError()) == {"detail": "TimeoutError"}
+
+
+def test_map_bounded_reports_progress():
+    progress = []
+
+    async def work(item):
+        return item
+
+    async def on_done(completed, total):
+        progress.append((completed, total))
+
+    asyncio.run(batch.map_bounded(work, range(5), concurrency=2, on_done=on_done))
+
+    assert progress == [(1, 5), (2, 5), (3, 5), (4, 5), (5, 5)]
+
+
+def test_map_bounded_handles_empty_input():
+    async def work(item):
+        return item
+
+    assert asyncio.run(batch.map_bounded(work, [])) == []
+
+
+def test_rate_limiter_spaces_out_starts():
+    async def run():
+        limiter = batch.RateLimiter(50)
+        loop = asyncio.get_running_loop()
+        starts = []
+        for _ in range(5):
+            await limiter.wait()
+            starts.append(loop.time())
+        return starts
+
+    starts = asyncio.run(run())
+
+    assert starts[-1] - starts[0] >= 4 / 50 - 0.005
+
+
+def test_rate_limiter_disabled():
+    async def run():
+        limiter = batch.RateLimiter(0)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for _ in range(100):
+            await limiter.wait()
+        return loop.time() - start
+
+    assert asyncio.run(run()) < 0.05
+
+
+def test_progress_reporter_throttles_notifications():
+    ctx = MagicMock()
+    ctx.report_progress = AsyncMock()
+    on_done = batch.progress_reporter(ctx, "Subscribed")
+
+    async def run():
+        for completed in range(1, 1001):
+            await on_done(completed, 1000)
+
+    asyncio.run(run())
+
+    assert ctx.report_progress.await_count == 100
+    ctx.report_progress.assert_awaited_with(1000, 1000, "Subscribed 1000 of 1000 cards")
@@ -0,0 +1,72 @@
+from unittest.mock import patch
+
+from cmp.cache import TTLCache
+
+
+def test_hits_and_misses_are_counted():
+    cache = TTLCache(max_size=10, ttl=60)
+    assert cache.get("a") is None
+    cache.set("a", {"card": 1})
+    assert cache.get("a") == {"card": 1}
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hit_ratio"] == 0.5
+
+
+def test_entries_expire():
+    cache = TTLCache(max_size=10, ttl=60)
+    with patch("cmp.cache.time.monotonic", return_value=1000.0):
+        cache.set("a", 1)
+    with patch("cmp.cache.time.monotonic", return_value=1059.0):
+        assert cache.get("a") == 1
+    with patch("cmp.cache.time.monotonic", return_value=1061.0):
+        assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_invalidate():
+    cache = TTLCache(max_size=10, ttl=60)
+    cache.set("a", 1)
+    cache.invalidate("a")
+    cache.invalidate("missing")
+    assert cache.get("a") is None
+
+
+def test_set_is_dropped_after_invalidation():
+    cache = TTLCache(max_size=10, ttl=60)
+    generation = cache.generation()
+    cache.invalidate("a")
+    cache.set("a", 1, generation)
+    cache.set("b", 2, generation)
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+    cache.set("a", 3, cache.generation())
+    assert cache.get("a") == 3
+
+
+def test_set_is_dropped_when_invalidation_was_forgotten():
+    cache = TTLCache(max_size=2, ttl=60)
+    generation = cache.generation()
+    for key in "abc":
+        cache.invalidate(key)
+    cache.set("a", 1, generation)
+    assert cache.get("a") is None
+
+
+def test_zero_ttl_disables_cache():
+    cache = TTLCache(max_size=10, ttl=0)
+    cache.set("a", 1)
+    assert not cache.enabled
+    assert cache.get("a") is None
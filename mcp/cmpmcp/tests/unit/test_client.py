@@ -0,0 +1,127 @@
+import asyncio
+
+import httpcore
+import httpx
+import pytest
+
+from cmp import client
+
+
+@pytest.fixture(autouse=True)
+def reset_clients():
+    asyncio.run(client.close_clients())
+    yield
+    asyncio.run(client.close_clients())
+
+
+def test_client_is_shared_per_environment():
+    async def run():
+        assert client.get_client("sandbox") is client.get_client("sandbox")
+        assert client.get_client("sandbox") is not client.get_client("live")
+
+    asyncio.run(run())
+
+
+def test_closed_client_is_replaced():
+    async def run():
+        first = client.get_client("sandbox")
+        await first.aclose()
+        assert client.get_client("sandbox") is not first
+
+    asyncio.run(run())
+
+
+def test_client_is_not_shared_across_event_loops():
+    async def run():
+        return client.get_client("sandbox")
+
+    assert asyncio.run(run()) is not asyncio.run(run())
+
+
+def test_client_timeouts():
+    async_client = client.create_client(connect_timeout=1, read_timeout=2)
+    assert async_client.timeout.connect == 1
+    assert async_client.timeout.read == 2
+    assert async_client.timeout.pool == client.POOL_TIMEOUT
+
+
+class MockNetwork(httpcore.AsyncMockBackend):
+    """
+    Answers every connection with an empty JSON response, slowly, and tracks
+    how many connections are open at once.
+    """
+
+    def __init__(self):
+        super().__init__(
+            [
+                b"HTTP/1.1 200 OK\r\n",
+                b"Content-Type: application/json\r\n",
+                b"Content-Length: 2\r\n",
+                b"Connection: close\r\n",
+                b"\r\n",
+                b"{}",
+            ]
+        )
+        self.open = 0
+        self.peak = 0
+
+    async def connect_tcp(self, *args, **kwargs):
+        network = self
+        self.open += 1
+        self.peak = max(self.peak, self.open)
+
+        class SlowStream(httpcore.AsyncMockStream):
+            async def read(self, max_bytes, timeout=None):
+                await asyncio.sleep(0.001)
+                return await super().read(max_bytes, timeout)
+
+            async def aclose(self):
+                network.open -= 1
+
+        return SlowStream(list(self._buffer))
+
+
+def use_network(async_client, network):
+    async_client._transport._pool._network_backend = network
+
+
+def test_pool_bounds_concurrent_connections():
+    network = MockNetwork()
+
+    async def run():
+        async with client.create_client(pool_size=5) as async_client:
+            use_network(async_client, network)
+            return await asyncio.gather(
+                *(async_client.get("https://example.com") for _ in range(50))
+            )
+
+    responses = asyncio.run(run())
+    assert [r.status_code for r in responses] == [200] * 50
+    assert network.peak == 5
+
+
+def test_waiting_for_a_connection_times_out():
+    network = MockNetwork()
+
+    async def run():
+        async with client.create_client(pool_size=1, pool_timeout=0) as async_client:
+            use_network(async_client, network)
+            await asyncio.gather(
+                *(async_client.get("https://example.com") for _ in range(2))
+            )
+
+    with pytest.raises(httpx.PoolTimeout):
+        asyncio.run(run())
+
+
+def test_client_of_another_event_loop_is_closed():
+    async def first():
+        return client.get_client("sandbox")
+
+    async def second(stale):
+        client.get_client("sandbox")
+        await asyncio.sleep(0)
+        return stale.is_closed
+
+    stale = asyncio.run(first())
+    assert asyncio.run(second(stale))
@@ -0,0 +1,154 @@
+import asyncio
+import decimal
+from unittest.mock import patch
+
+from cmp.cryptograms import CryptogramPool, pool_key
+
+
+def make_fetcher():
+    counter = iter(range(1, 1000))
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return {"cryptogram": next(counter)}
+
+    return fetch, calls
+
+
+def test_pool_key_buckets_amount_to_the_cent():
+    assert pool_key(
+        "sandbox", "CRD1", "USD", decimal.Decimal("10"), "ECOM", "TAVV"
+    ) == (
+        "sandbox",
+        "CRD1",
+        "USD",
+        "10.00",
+        "ECOM",
+        "TAVV",
+    )
+    assert pool_key("sandbox", "CRD1", None, None, "ECOM", "TAVV")[3] is None
+
+
+def test_cold_keys_are_not_pooled():
+    async def run():
+        pool = CryptogramPool()
+        return pool.take(pool_key("sandbox", "CRD1", None, None, "ECOM", "TAVV"))
+
+    assert asyncio.run(run()) is None
+
+
+def test_warm_prefetches_and_hands_out_once():
+    async def run():
+        pool = CryptogramPool()
+        fetch, calls = make_fetcher()
+        key = pool_key("sandbox", "CRD1", "USD", 10, "ECOM", "TAVV")
+        assert pool.warm(key, 2, fetch) == 2
+        await pool.wait_for_refills()
+        assert pool.available(key) == 2
+
+        first = pool.take(key)
+        second = pool.take(key)
+        assert first != second
+        await pool.wait_for_refills()
+        assert pool.available(key) == 2
+        return calls
+
+    assert len(asyncio.run(run())) == 4
+
+
+def test_pool_size_is_capped():
+    async def run():
+        pool = CryptogramPool(max_size=3)
+        fetch, _ = make_fetcher()
+        key = pool_key("sandbox", "CRD1", None, None, "ECOM", "TAVV")
+        size = pool.warm(key, 10, fetch)
+        await pool.wait_for_refills()
+        return size, pool.available(key)
+
+    assert asyncio.run(run()) == (3, 3)
+
+
+def test_expired_cryptograms_are_dropped():
+    async def run():
+        pool = CryptogramPool(ttl=60)
+        fetch, _ = make_fetcher()
+        key = pool_key("sandbox", "CRD1", None, None, "ECOM", "TAVV")
+        with patch("cmp.cryptograms.time.monotonic", return_value=1000.0):
+            pool.warm(key, 1, fetch)
+            await pool.wait_for_refills()
+        with patch("cmp.cryptograms.time.monotonic", return_value=1061.0):
+            assert pool.available(key) == 0
+            assert pool.take(key) is None
+        pool.clear()
+
+    asyncio.run(run())
+
+
+def test_warm_with_zero_size_cools_key():
+    async def run():
+        pool = CryptogramPool()
+        fetch, _ = make_fetcher()
+        key = pool_key("sandbox", "CRD1", None, None, "ECOM", "TAVV")
+        pool.warm(key, 2, fetch)
+        await pool.wait_for_refills()
+        pool.warm(key, 0, fetch)
+        return pool.is_hot(key), pool.take(key)
+
+    assert asyncio.run(run()) == (False, None)
+
+
+def test_failed_prefetch_leaves_pool_usable():
+    async def run():
+        pool = CryptogramPool()
+
+        async def fetch():
+            raise RuntimeError("upstream down")
+
+        key = pool_key("sandbox", "CRD1", None, None, "ECOM", "TAVV")
+        pool.warm(key, 2, fetch)
+        await pool.wait_for_refills()
+        return pool.take(key)
+
+    assert asyncio.run(run()) is None
+
+
+def test_discard_replaces_cryptograms_of_matching_keys():
+    async def run():
+        pool = CryptogramPool()
+        fetch, _ = make_fetcher()
+        changed = pool_key("sandbox", "CRD1", None, None, "ECOM", "TAVV")
+        other = pool_key("sandbox", "CRD2", None, None, "ECOM", "TAVV")
+        pool.warm(changed, 1, fetch)
+        pool.warm(other, 1, fetch)
+        await pool.wait_for_refills()
+
+        pool.discard(lambda key: key[:2] == ("sandbox", "CRD1"))
+        assert pool.available(changed) == 0
+        assert pool.available(other) == 1
+        await pool.wait_for_refills()
+        return pool.take(changed), pool.take(other)
+
+    assert asyncio.run(run()) == ({"cryptogram": 3}, {"cryptogram": 2})
+
+
+def test_discard_restarts_refills_in_flight():
+    async def run():
+        pool = CryptogramPool()
+        started = asyncio.Event()
+        responses = iter(["stale", "fresh"])
+
+        async def fetch():
+            response = next(responses)
+            started.set()
+            await asyncio.sleep(0.01)
+            return response
+
+        key = pool_key("sandbox", "CRD1", None, None, "ECOM", "TAVV")
+        pool.warm(key, 1, fetch)
+        await started.wait()
+        pool.discard(lambda key: True)
+        await pool.wait_for_refills()
+        return pool.take(key)
+
+    assert asyncio.run(run()) == "fresh"
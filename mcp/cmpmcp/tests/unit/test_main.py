@@ -1,13 +1,32 @@
+import asyncio
 import os
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
 import pytest
 
-from cmp.main import (create_network_token, environments,
-                      fetch_network_token_cryptogram, get_card,
-                      get_real_time_account_update,
-                      subscribe_to_account_updates,
-                      unsubscribe_from_account_updates)
+from cmp import main
+from cmp.cache import TTLCache
+from cmp.main import (
+    bulk_subscribe_to_account_updates,
+    bulk_unsubscribe_from_account_updates,
+    create_network_token,
+    create_network_tokens,
+    environments,
+    fetch_network_token_cryptogram,
+    get_card,
+    get_cards,
+    get_real_time_account_update,
+    subscribe_to_account_updates,
+    unsubscribe_from_account_updates,
+    warm_cryptogram_pool,
+)
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limit(monkeypatch):
+    """Upstream calls are mocked, so don't pace them"""
+    monkeypatch.setattr(main.ratelimit, "RATE_LIMIT", 0)
 
 
 @pytest.fixture
@@ -162,73 +181,476 @@ def mock_unsubscribe_response():
 
 
 def test_get_card(mock_env_vars, mock_jwt_token, mock_response):
-    with patch("cmp.main.requests.get") as mock_requests_get, patch(
+    with patch("cmp.main.client.get_client") as mock_get_client, patch(
         "cmp.main.auth.get_jwt_token"
     ) as mock_get_jwt_token:
         mock_get_jwt_token.return_value = mock_jwt_token
-        mock_requests_get.return_value = mock_response
-        response = get_card.fn("CRD123456789", "sandbox")
+        mock_get_client.return_value.request = AsyncMock(return_value=mock_response)
+        response = asyncio.run(get_card.fn("CRD123456789", "sandbox"))
         assert response == mock_response.json.return_value
 
 
 def test_create_network_token(
     mock_env_vars, mock_jwt_token, mock_network_token_response
 ):
-    with patch("cmp.main.requests.post") as mock_requests_post, patch(
+    with patch("cmp.main.client.get_client") as mock_get_client, patch(
         "cmp.main.auth.get_jwt_token"
     ) as mock_get_jwt_token:
         mock_get_jwt_token.return_value = mock_jwt_token
-        mock_requests_post.return_value = mock_network_token_response
-        response = create_network_token.fn("CRD123456789", "sandbox")
+        mock_get_client.return_value.request = AsyncMock(
+            return_value=mock_network_token_response
+        )
+        response = asyncio.run(create_network_token.fn("CRD123456789", "sandbox"))
         assert response == mock_network_token_response.json.return_value
 
 
 def test_fetch_network_token_cryptogram(
     mock_env_vars, mock_jwt_token, mock_cryptogram_response
 ):
-    with patch("cmp.main.requests.post") as mock_requests_post, patch(
+    with patch("cmp.main.client.get_client") as mock_get_client, patch(
         "cmp.main.auth.get_jwt_token"
     ) as mock_get_jwt_token:
         mock_get_jwt_token.return_value = mock_jwt_token
-        mock_requests_post.return_value = mock_cryptogram_response
-        response = fetch_network_token_cryptogram.fn("CRD123456789", "sandbox", None, None, None, None)
+        mock_get_client.return_value.request = AsyncMock(
+            return_value=mock_cryptogram_response
+        )
+        response = asyncio.run(
+            fetch_network_token_cryptogram.fn(
+                "CRD123456789", "sandbox", None, None, None, None
+            )
+        )
         assert response == mock_cryptogram_response.json.return_value
 
 
 def test_get_real_time_account_update(
     mock_env_vars, mock_jwt_token, mock_real_time_account_update_response
 ):
-    with patch("cmp.main.requests.post") as mock_requests_post, patch(
+    with patch("cmp.main.client.get_client") as mock_get_client, patch(
         "cmp.main.auth.get_jwt_token"
     ) as mock_get_jwt_token:
         mock_get_jwt_token.return_value = mock_jwt_token
-        mock_requests_post.return_value = mock_real_time_account_update_response
-        response = get_real_time_account_update.fn("CRD123456789", "sandbox")
+        mock_get_client.return_value.request = AsyncMock(
+            return_value=mock_real_time_account_update_response
+        )
+        response = asyncio.run(
+            get_real_time_account_update.fn("CRD123456789", "sandbox")
+        )
         assert response == mock_real_time_account_update_response.json.return_value
 
 
 def test_subscribe_to_account_updates(
     mock_env_vars, mock_jwt_token, mock_subscription_response
 ):
-    with patch("cmp.main.requests.post") as mock_requests_post, patch(
+    with patch("cmp.main.client.get_client") as mock_get_client, patch(
         "cmp.main.auth.get_jwt_token"
     ) as mock_get_jwt_token:
         mock_get_jwt_token.return_value = mock_jwt_token
-        mock_requests_post.return_value = mock_subscription_response
-        response = subscribe_to_account_updates.fn("CRD123456789", "sandbox")
+        mock_get_client.return_value.request = AsyncMock(
+            return_value=mock_subscription_response
+        )
+        response = asyncio.run(
+            subscribe_to_account_updates.fn("CRD123456789", "sandbox")
+        )
         assert response == mock_subscription_response.json.return_value
 
 
 def test_unsubscribe_from_account_updates(
     mock_env_vars, mock_jwt_token, mock_unsubscribe_response
 ):
-    with patch("cmp.main.requests.delete") as mock_requests_delete, patch(
+    with patch("cmp.main.client.get_client") as mock_get_client, patch(
         "cmp.main.auth.get_jwt_token"
     ) as mock_get_jwt_token:
         mock_get_jwt_token.return_value = mock_jwt_token
-        mock_requests_delete.return_value = mock_unsubscribe_response
-        response = unsubscribe_from_account_updates.fn("CRD123456789", "sandbox")
+        mock_get_client.return_value.request = AsyncMock(
+            return_value=mock_unsubscribe_response
+        )
+        response = asyncio.run(
+            unsubscribe_from_account_updates.fn("CRD123456789", "sandbox")
+        )
         expected_response = {
             "message": "Successfully unsubscribed CRD123456789 from account updates",
         }
         assert response == expected_response
+
+
+def test_concurrent_card_lookups_share_one_bounded_pool(
+    monkeypatch, mock_env_vars, mock_jwt_token
+):
+    from test_client import MockNetwork, use_network
+
+    monkeypatch.setattr(main.client, "POOL_SIZE", 5)
+    network = MockNetwork()
+
+    async def run():
+        use_network(main.client.get_client("sandbox"), network)
+        try:
+            return await asyncio.gather(
+                *(get_card.fn(f"CRD{i}", "sandbox") for i in range(200))
+            )
+        finally:
+            await main.client.close_clients()
+
+    with patch("cmp.main.auth.get_jwt_token") as mock_get_jwt_token:
+        mock_get_jwt_token.return_value = mock_jwt_token
+        responses = asyncio.run(run())
+
+    assert responses == [{}] * 200
+    assert network.peak == 5
+
+
+def test_get_cards(mock_env_vars, mock_jwt_token, mock_response):
+    async def fake_request(method, url, **kwargs):
+        if url.endswith("CRDmissing"):
+            response = httpx.Response(
+                404, text="not found", request=httpx.Request(method, url)
+            )
+            response.raise_for_status()
+        return mock_response
+
+    with patch("cmp.main.client.get_client") as mock_get_client, patch(
+        "cmp.main.auth.get_jwt_token"
+    ) as mock_get_jwt_token:
+        mock_get_jwt_token.return_value = mock_jwt_token
+        mock_get_client.return_value.request = AsyncMock(side_effect=fake_request)
+        response = asyncio.run(
+            get_cards.fn(["CRD1", "CRDmissing", "CRD1", "CRD2"], "sandbox", 2)
+        )
+
+    assert mock_get_client.return_value.request.call_count == 3
+    assert response["data"] == {
+        "CRD1": mock_response.json.return_value,
+        "CRD2": mock_response.json.return_value,
+    }
+    assert response["errors"] == {"CRDmissing": {"status": 404, "detail": "not found"}}
+
+
+def test_create_network_tokens(
+    mock_env_vars, mock_jwt_token, mock_network_token_response
+):
+    async def fake_request(method, url, **kwargs):
+        if "CRDbad" in url:
+            response = httpx.Response(
+                424, text="not eligible", request=httpx.Request(method, url)
+            )
+            response.raise_for_status()
+        return mock_network_token_response
+
+    ctx = MagicMock()
+    ctx.report_progress = AsyncMock()
+    card_ids = [f"CRD{i}" for i in range(10)] + ["CRDbad"]
+    with patch("cmp.main.client.get_client") as mock_get_client, patch(
+        "cmp.main.auth.get_jwt_token"
+    ) as mock_get_jwt_token:
+        mock_get_jwt_token.return_value = mock_jwt_token
+        mock_get_client.return_value.request = AsyncMock(side_effect=fake_request)
+        response = asyncio.run(
+            create_network_tokens.fn(card_ids, "sandbox", 4, 0, ctx=ctx)
+        )
+
+    assert response["total"] == 11
+    assert response["succeeded"] == 10
+    assert response["failed"] == 1
+    assert response["data"]["CRD0"] == {
+        "id": "NTKu5rM55z4PNMLW9Rqrhd466",
+        "state": "active",
+    }
+    assert response["errors"] == {"CRDbad": {"status": 424, "detail": "not eligible"}}
+    assert ctx.report_progress.await_count == 11
+    ctx.report_progress.assert_awaited_with(11, 11, "Provisioned 11 of 11 cards")
+
+
+def test_fetch_network_token_cryptogram_uses_warm_pool(mock_env_vars, mock_jwt_token):
+    responses = []
+    for i in range(3):
+        response = MagicMock()
+        response.json.return_value = {"data": {"cryptogram": i}}
+        responses.append(response)
+
+    async def run():
+        status = await warm_cryptogram_pool.fn(
+            "CRD123456789", "sandbox", "USD", 10, "ECOM", "TAVV", 1
+        )
+        await main.cryptogram_pool.wait_for_refills()
+        assert status["pool_size"] == 1
+        response = await fetch_network_token_cryptogram.fn(
+            "CRD123456789", "sandbox", "USD", 10, "ECOM", "TAVV"
+        )
+        await main.cryptogram_pool.wait_for_refills()
+        available = main.cryptogram_pool.available(
+            ("sandbox", "CRD123456789", "USD", "10.00", "ECOM", "TAVV")
+        )
+        return response, available
+
+    with patch("cmp.main.client.get_client") as mock_get_client, patch(
+        "cmp.main.auth.get_jwt_token"
+    ) as mock_get_jwt_token:
+        mock_get_jwt_token.return_value = mock_jwt_token
+        mock_get_client.return_value.request = AsyncMock(side_effect=responses)
+        try:
+            response, available = asyncio.run(run())
+        finally:
+            main.cryptogram_pool.clear()
+
+    # the pre-fetched cryptogram is handed out and the pool is refilled
+    assert response == {"data": {"cryptogram": 0}}
+    assert available == 1
+    assert mock_get_client.return_value.request.await_count == 2
+
+
+def test_new_network_token_discards_pooled_cryptograms(
+    mock_env_vars, mock_jwt_token, mock_network_token_response
+):
+    cryptograms = iter(range(10))
+
+    async def fake_request(method, url, **kwargs):
+        if url.endswith("/network-tokens"):
+            return mock_network_token_response
+        response = MagicMock()
+        response.json.return_value = {"data": {"cryptogram": next(cryptograms)}}
+        return response
+
+    async def run():
+        await warm_cryptogram_pool.fn(
+            "CRD123456789", "sandbox", "USD", 10, "ECOM", "TAVV", 1
+        )
+        await main.cryptogram_pool.wait_for_refills()
+        await create_network_token.fn("CRD123456789", "sandbox")
+        await main.cryptogram_pool.wait_for_refills()
+        return await fetch_network_token_cryptogram.fn(
+            "CRD123456789", "sandbox", "USD", 10, "ECOM", "TAVV"
+        )
+
+    with patch("cmp.main.client.get_client") as mock_get_client, patch(
+        "cmp.main.auth.get_jwt_token"
+    ) as mock_get_jwt_token:
+        mock_get_jwt_token.return_value = mock_jwt_token
+        mock_get_client.return_value.request = fake_request
+        try:
+            response = asyncio.run(run())
+        finally:
+            main.cryptogram_pool.clear()
+
+    # cryptogram 0 predates the new token, the refill generated 1 against it
+    assert response == {"data": {"cryptogram": 1}}
+
+
+def test_bulk_subscribe_to_account_updates(
+    mock_env_vars, mock_jwt_token, mock_subscription_response
+):
+    attempts = {}
+
+    async def fake_request(method, url, **kwargs):
+        card_id = url.split("/")[-2]
+        attempts[card_id] = attempts.get(card_id, 0) + 1
+        status = {
+            "CRDenrolled": 409,
+            "CRDinvalid": 400,
+            "CRDflaky": 503 if attempts[card_id] == 1 else 201,
+        }.get(card_id, 201)
+        if status >= 400:
+            response = httpx.Response(
+                status, text="error", request=httpx.Request(method, url)
+            )
+            response.raise_for_status()
+        return mock_subscription_response
+
+    card_ids = ["CRD1", "CRD2", "CRDenrolled", "CRDinvalid", "CRDflaky", "CRD1"]
+    with patch("cmp.main.client.get_client") as mock_get_client, patch(
+        "cmp.main.auth.get_jwt_token"
+    ) as mock_get_jwt_token, patch("cmp.batch.asyncio.sleep", new=AsyncMock()):
+        mock_get_jwt_token.return_value = mock_jwt_token
+        mock_get_client.return_value.request = AsyncMock(side_effect=fake_request)
+        response = asyncio.run(
+            bulk_subscribe_to_account_updates.fn(card_ids, "sandbox", 4, 0)
+        )
+
+    assert response == {
+        "total": 5,
+        "subscribed": 3,
+        "skipped": 1,
+        "failed": 1,
+        "errors": {"CRDinvalid": {"status": 400, "detail": "error"}},
+    }
+    assert attempts["CRDflaky"] == 2
+    assert attempts["CRDinvalid"] == 1
+
+
+def test_bulk_unsubscribe_from_account_updates(
+    mock_env_vars, mock_jwt_token, mock_unsubscribe_response
+):
+    not_found = {
+        "CRDnone": "Card update subscription not found",
+        "CRDmissing": "Card not found",
+    }
+
+    async def fake_request(method, url, **kwargs):
+        for card_id, detail in not_found.items():
+            if card_id in url:
+                response = httpx.Response(
+                    404,
+                    json={"errors": [{"status": "404", "detail": detail}]},
+                    request=httpx.Request(method, url),
+                )
+                response.raise_for_status()
+        return mock_unsubscribe_response
+
+    with patch("cmp.main.client.get_client") as mock_get_client, patch(
+        "cmp.main.auth.get_jwt_token"
+    ) as mock_get_jwt_token:
+        mock_get_jwt_token.return_value = mock_jwt_token
+        mock_get_client.return_value.request = AsyncMock(side_effect=fake_request)
+        response = asyncio.run(
+            bulk_unsubscribe_from_account_updates.fn(
+                ["CRD1", "CRDnone", "CRDmissing"], "sandbox", 4, 0
+            )
+        )
+
+    assert response["total"] == 3
+    assert response["unsubscribed"] == 1
+    assert response["skipped"] == 1
+    assert response["failed"] == 1
+    assert list(response["errors"]) == ["CRDmissing"]
+    assert response["errors"]["CRDmissing"]["status"] == 404
+
+
+def test_get_card_cache_is_invalidated_by_card_changes(
+    mock_env_vars, mock_jwt_token, mock_response, mock_network_token_response
+):
+    async def fake_request(method, url, **kwargs):
+        return mock_network_token_response if method == "POST" else mock_response
+
+    async def run():
+        await get_card.fn("CRD123456789", "sandbox")
+        await get_card.fn("CRD123456789", "sandbox")
+        await create_network_token.fn("CRD123456789", "sandbox")
+        return await get_card.fn("CRD123456789", "sandbox")
+
+    with patch("cmp.main.client.get_client") as mock_get_client, patch(
+        "cmp.main.auth.get_jwt_token"
+    ) as mock_get_jwt_token, patch(
+        "cmp.main.card_cache", TTLCache(max_size=10, ttl=60)
+    ) as card_cache:
+        mock_get_jwt_token.return_value = mock_jwt_token
+        mock_get_client.return_value.request = AsyncMock(side_effect=fake_request)
+        response = asyncio.run(run())
+
+    assert response == mock_response.json.return_value
+    methods = [c.args[0] for c in mock_get_client.return_value.request.await_args_list]
+    assert methods == ["GET", "POST", "GET"]
+    assert card_cache.stats()["hits"] == 1
+    assert card_cache.stats()["misses"] == 2
+
+
+def test_request_feeds_responses_to_the_rate_limiter(
+    monkeypatch, mock_env_vars, mock_jwt_token, mock_response
+):
+    monkeypatch.setattr(main.ratelimit, "RATE_LIMIT", 20)
+    monkeypatch.setattr(main.ratelimit, "_limiters", {})
+    mock_response.status_code = 429
+    mock_response.headers = {"Retry-After": "2"}
+
+    with patch("cmp.main.client.get_client") as mock_get_client, patch(
+        "cmp.main.auth.get_jwt_token"
+    ) as mock_get_jwt_token:
+        mock_get_jwt_token.return_value = mock_jwt_token
+        mock_get_client.return_value.request = AsyncMock(return_value=mock_response)
+        asyncio.run(get_card.fn("CRD123456789", "sandbox"))
+
+    limiter = main.ratelimit.get_limiter("sandbox", "cards")
+    assert limiter.rate == 10
+    assert limiter.reserve() > 1.5
+    assert main.ratelimit.get_limiter("sandbox", "cryptogram").rate == 20
+
+
+def test_post_retries_reuse_the_idempotency_key(
+    mock_env_vars, mock_jwt_token, mock_response
+):
+    request = AsyncMock(side_effect=[httpx.ConnectError("reset"), mock_response])
+
+    with patch("cmp.main.client.get_client") as mock_get_client, patch(
+        "cmp.main.auth.get_jwt_token"
+    ) as mock_get_jwt_token, patch("cmp.retry.asyncio.sleep", new=AsyncMock()):
+        mock_get_jwt_token.return_value = mock_jwt_token
+        mock_get_client.return_value.request = request
+        asyncio.run(create_network_token.fn("CRD123456789", "sandbox"))
+
+    first, second = [call.kwargs["headers"] for call in request.await_args_list]
+    assert first["idempotency-key"]
+    assert first["idempotency-key"] == second["idempotency-key"]
+
+
+def test_identical_concurrent_card_reads_are_coalesced(
+    mock_env_vars, mock_jwt_token, mock_response
+):
+    calls = 0
+
+    async def slow_request(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return mock_response
+
+    async def run():
+        return await asyncio.gather(
+            *(get_card.fn("CRD123456789", "sandbox") for _ in range(20)),
+            get_card.fn("CRD987654321", "sandbox"),
+        )
+
+    with patch("cmp.main.client.get_client") as mock_get_client, patch(
+        "cmp.main.auth.get_jwt_token"
+    ) as mock_get_jwt_token:
+        mock_get_jwt_token.return_value = mock_jwt_token
+        mock_get_client.return_value.request = slow_request
+        responses = asyncio.run(run())
+
+    assert calls == 2
+    assert all(response == mock_response.json.return_value for response in responses)
+
+
+def test_card_read_racing_a_card_change_is_not_cached(
+    mock_env_vars, mock_jwt_token, mock_response, mock_network_token_response
+):
+    async def fake_request(method, url, **kwargs):
+        if method == "POST":
+            return mock_network_token_response
+        await asyncio.sleep(0.01)
+        return mock_response
+
+    async def run():
+        read = asyncio.ensure_future(get_card.fn("CRD123456789", "sandbox"))
+        await asyncio.sleep(0)
+        await create_network_token.fn("CRD123456789", "sandbox")
+        await read
+
+    with patch("cmp.main.client.get_client") as mock_get_client, patch(
+        "cmp.main.auth.get_jwt_token"
+    ) as mock_get_jwt_token, patch(
+        "cmp.main.card_cache", TTLCache(max_size=10, ttl=60)
+    ) as card_cache:
+        mock_get_jwt_token.return_value = mock_jwt_token
+        mock_get_client.return_value.request = AsyncMock(side_effect=fake_request)
+        asyncio.run(run())
+
+    assert card_cache.get(("sandbox", "CRD123456789")) is None
+
+
+def test_unauthorized_request_retries_once_with_a_fresh_token(
+    mock_env_vars, mock_response
+):
+    unauthorized = MagicMock(status_code=401)
+    responses = iter([unauthorized, mock_response])
+    tokens = []
+
+    async def fake_request(method, url, headers, **kwargs):
+        tokens.append(headers["authorization"])
+        return next(responses)
+
+    with patch("cmp.main.client.get_client") as mock_get_client, patch(
+        "cmp.main.auth.get_jwt_token", side_effect=["revoked", "fresh"]
+    ), patch("cmp.main.auth.invalidate_jwt_token") as invalidate:
+        mock_get_client.return_value.request = fake_request
+        asyncio.run(get_card.fn("CRD123456789", "sandbox"))
+
+    invalidate.assert_called_once()
+    assert tokens == ["Bearer revoked", "Bearer fresh"]
+    unauthorized.raise_for_status.assert_not_called()
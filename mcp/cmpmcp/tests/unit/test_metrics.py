@@ -0,0 +1,139 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+from fastmcp import Client, FastMCP
+from fastmcp.exceptions import ToolError
+from prometheus_client import REGISTRY, generate_latest
+
+from cmp import main, metrics
+from cmp.auth import TokenCache
+from cmp.cache import TTLCache
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def status_error(status_code):
+    request = httpx.Request("GET", "https://example.com")
+    response = httpx.Response(status_code, request=request)
+    return httpx.HTTPStatusError("failed", request=request, response=response)
+
+
+def test_status_of():
+    assert metrics.status_of(None) == "ok"
+    assert metrics.status_of(status_error(404)) == "404"
+    assert metrics.status_of(httpx.ConnectError("reset")) == "ConnectError"
+
+
+def test_tool_calls_are_counted_by_outcome():
+    server = FastMCP("test")
+    server.add_middleware(metrics.ToolMetricsMiddleware())
+
+    @server.tool()
+    def lookup(fail: bool = False):
+        if fail:
+            raise status_error(404)
+        return "found"
+
+    async def run():
+        async with Client(server) as client:
+            await client.call_tool("lookup", {})
+            with pytest.raises(ToolError):
+                await client.call_tool("lookup", {"fail": True})
+
+    ok = sample("cmp_tool_calls_total", tool="lookup", status="ok")
+    not_found = sample("cmp_tool_calls_total", tool="lookup", status="404")
+    timed = sample("cmp_tool_duration_seconds_count", tool="lookup")
+
+    asyncio.run(run())
+
+    assert sample("cmp_tool_calls_total", tool="lookup", status="ok") == ok + 1
+    assert sample("cmp_tool_calls_total", tool="lookup", status="404") == not_found + 1
+    assert sample("cmp_tool_duration_seconds_count", tool="lookup") == timed + 2
+    assert sample("cmp_tools_in_flight", tool="lookup") == 0
+
+
+def test_upstream_call_records_status_and_in_flight():
+    before = sample("cmp_upstream_requests_total", family="test", status="503")
+    errors = sample("cmp_upstream_requests_total", family="test", status="ReadTimeout")
+
+    with metrics.UpstreamCall("test") as call:
+        assert sample("cmp_upstream_requests_in_flight", family="test") == 1
+        call.status = 503
+    with pytest.raises(httpx.ReadTimeout):
+        with metrics.UpstreamCall("test"):
+            raise httpx.ReadTimeout("slow")
+
+    assert sample("cmp_upstream_requests_in_flight", family="test") == 0
+    assert sample("cmp_upstream_requests_total", family="test", status="503") == (
+        before + 1
+    )
+    assert sample(
+        "cmp_upstream_requests_total", family="test", status="ReadTimeout"
+    ) == (errors + 1)
+
+
+def test_requests_to_cmp_are_measured():
+    response = MagicMock(status_code=200, headers={})
+    before = sample("cmp_upstream_requests_total", family="cards", status="200")
+
+    with patch("cmp.main.client.get_client") as mock_get_client, patch(
+        "cmp.main.auth.get_jwt_token", return_value="token"
+    ), patch.object(main.ratelimit, "RATE_LIMIT", 0):
+        mock_get_client.return_value.request = AsyncMock(return_value=response)
+        asyncio.run(main._request("GET", "sandbox", "/cards/CRD123"))
+
+    assert sample("cmp_upstream_requests_total", family="cards", status="200") == (
+        before + 1
+    )
+
+
+def test_token_fetches_are_measured():
+    keycloak = MagicMock()
+    keycloak.client.client_credentials.side_effect = [
+        {"access_token": "token", "expires_in": 300},
+        RuntimeError("keycloak is down"),
+    ]
+    ok = sample("cmp_token_fetches_total", status="ok")
+    failed = sample("cmp_token_fetches_total", status="RuntimeError")
+    timed = sample("cmp_token_fetch_duration_seconds_count")
+
+    cache = TokenCache()
+    with patch("cmp.auth.KeyCloak", return_value=keycloak):
+        cache.get("https://auth", "vgs", "client", "secret")
+        cache.get("https://auth", "vgs", "client", "secret")
+        cache.invalidate("https://auth", "vgs", "client", "secret")
+        with pytest.raises(RuntimeError):
+            cache.get("https://auth", "vgs", "client", "secret")
+
+    assert sample("cmp_token_fetches_total", status="ok") == ok + 1
+    assert sample("cmp_token_fetches_total", status="RuntimeError") == failed + 1
+    assert sample("cmp_token_fetch_duration_seconds_count") == timed + 2
+
+
+def test_cache_hit_ratio_is_exported():
+    cache = TTLCache(max_size=10, ttl=60)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+    metrics.register_cache("test", cache)
+
+    assert sample("cmp_cache_hits_total", cache="test") == 1
+    assert sample("cmp_cache_misses_total", cache="test") == 1
+    assert sample("cmp_cache_hit_ratio", cache="test") == 0.5
+    assert b'cmp_cache_hit_ratio{cache="cards"}' in generate_latest()
+
+
+def test_serve_is_off_without_a_port(monkeypatch):
+    start = MagicMock()
+    monkeypatch.setattr(metrics, "start_http_server", start)
+    monkeypatch.setattr(metrics, "METRICS_PORT", 0)
+    metrics.serve()
+    start.assert_not_called()
+
+    monkeypatch.setattr(metrics, "METRICS_PORT", 9464)
+    metrics.serve()
+    start.assert_called_once_with(9464, addr=metrics.METRICS_ADDR)
@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+import pytest
+
+from cmp import ratelimit
+from cmp.ratelimit import AdaptiveRateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_burst_then_paced(clock):
+    limiter = AdaptiveRateLimiter(rate=10, burst=2)
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == pytest.approx(0.1)
+    assert limiter.reserve() == pytest.approx(0.2)
+    clock[0] += 1
+    assert limiter.reserve() == 0
+
+
+def test_retry_after_blocks_and_slows_down(clock):
+    limiter = AdaptiveRateLimiter(rate=10, burst=5)
+    limiter.observe(429, {"Retry-After": "3"})
+    assert limiter.rate == 5
+    assert limiter.reserve() == pytest.approx(3)
+
+    clock[0] += 3
+    for _ in range(20):
+        limiter.observe(200, {})
+    assert limiter.rate == 10
+
+
+def test_rate_limit_headers_set_rate_under_quota(clock):
+    limiter = AdaptiveRateLimiter(rate=20, burst=5)
+    limiter.observe(200, {"X-RateLimit-Remaining": "50", "X-RateLimit-Reset": "10"})
+    assert limiter.rate == pytest.approx(4.5)
+
+    limiter.observe(200, {"RateLimit-Remaining": "0", "RateLimit-Reset": "4"})
+    assert limiter.rate == limiter.min_rate
+    assert limiter.reserve() == pytest.approx(4)
+
+
+def test_retry_after_http_date():
+    date = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 60))
+    assert ratelimit.retry_after(date) == pytest.approx(60, abs=2)
+    assert ratelimit.retry_after(None) is None
+
+
+def test_acquire_waits_for_its_turn():
+    limiter = AdaptiveRateLimiter(rate=50, burst=1)
+
+    async def run():
+        started = time.monotonic()
+        for _ in range(4):
+            await limiter.acquire()
+        return time.monotonic() - started
+
+    assert asyncio.run(run()) >= 0.05
+
+
+def test_limiters_are_shared_per_family(monkeypatch):
+    monkeypatch.setattr(ratelimit, "_limiters", {})
+    cards = ratelimit.get_limiter("sandbox", ratelimit.endpoint_family("/cards/CRD1"))
+    assert cards is ratelimit.get_limiter("sandbox", "cards")
+    assert cards is not ratelimit.get_limiter("sandbox", "cryptogram")
+    assert (
+        ratelimit.endpoint_family("/cards/CRD1/network-tokens/NT1/cryptogram")
+        == "cryptogram"
+    )
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT", 0)
+    assert ratelimit.get_limiter("sandbox", "cards") is None
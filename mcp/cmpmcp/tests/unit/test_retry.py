@@ -0,0 +1,73 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+
+from cmp import retry
+from cmp.retry import RetryBudget, RetryPolicy
+
+
+def http_error(status):
+    request = httpx.Request("POST", "https://sandbox.vgsapi.com/cards/CRD1")
+    response = httpx.Response(status, request=request)
+    return httpx.HTTPStatusError(str(status), request=request, response=response)
+
+
+def test_is_retryable():
+    assert retry.is_retryable(http_error(503))
+    assert retry.is_retryable(http_error(429))
+    assert retry.is_retryable(httpx.ConnectError("reset"))
+    assert not retry.is_retryable(http_error(400))
+    assert not retry.is_retryable(ValueError("boom"))
+
+
+def test_retries_transient_errors_with_jittered_backoff():
+    func = AsyncMock(side_effect=[http_error(503), httpx.ReadTimeout("slow"), "ok"])
+    policy = RetryPolicy(attempts=3, backoff=1, max_backoff=1.5)
+    with patch("cmp.retry.asyncio.sleep", new=AsyncMock()) as mock_sleep:
+        assert asyncio.run(policy.run(func)) == "ok"
+    first, second = [call.args[0] for call in mock_sleep.await_args_list]
+    assert 0 <= first <= 1
+    assert 0 <= second <= 1.5
+
+
+def test_gives_up_after_attempts():
+    func = AsyncMock(side_effect=http_error(503))
+    with patch("cmp.retry.asyncio.sleep", new=AsyncMock()):
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(RetryPolicy(attempts=3).run(func))
+    assert func.await_count == 3
+
+
+def test_does_not_retry_client_errors():
+    func = AsyncMock(side_effect=http_error(400))
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(RetryPolicy(attempts=3).run(func))
+    assert func.await_count == 1
+
+
+def test_does_not_retry_past_deadline():
+    func = AsyncMock(side_effect=http_error(503))
+    policy = RetryPolicy(attempts=3, backoff=10, max_backoff=10, deadline=0)
+    with patch("cmp.retry.random.uniform", return_value=5):
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(policy.run(func))
+    assert func.await_count == 1
+
+
+def test_budget_limits_retries():
+    budget = RetryBudget(ratio=0.5, reserve=1)
+    policy = RetryPolicy(attempts=3, budget=budget)
+    func = AsyncMock(side_effect=http_error(503))
+    with patch("cmp.retry.asyncio.sleep", new=AsyncMock()):
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(policy.run(func))
+    # the reserve allowed a single retry
+    assert func.await_count == 2
+    assert budget.tokens == 0
+
+    budget.deposit()
+    budget.deposit()
+    assert budget.withdraw()
+    assert not budget.withdraw()
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from cmp.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_result():
+    flight = SingleFlight()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"calls": calls}
+
+    async def run():
+        results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(10)))
+        return results, flight.in_flight()
+
+    results, in_flight = asyncio.run(run())
+    assert calls == 1
+    assert all(result is results[0] for result in results)
+    assert in_flight == 0
+
+
+def test_errors_are_shared_and_not_remembered():
+    flight = SingleFlight()
+    attempts = []
+
+    async def fail():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(
+            flight.do("key", fail), flight.do("key", fail), return_exceptions=True
+        )
+
+    assert [type(e) for e in asyncio.run(run())] == [ValueError, ValueError]
+    with pytest.raises(ValueError):
+        asyncio.run(flight.do("key", fail))
+    assert len(attempts) == 2
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "ok"
+
+    async def run():
+        first = asyncio.ensure_future(flight.do("key", fetch))
+        second = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == "ok"
+
+
+def test_forget_starts_a_new_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        number = len(calls)
+        await asyncio.sleep(0.01)
+        return number
+
+    async def run():
+        first = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        flight.forget(lambda key: key == "key")
+        second = await flight.do("key", fetch)
+        return await first, second
+
+    assert asyncio.run(run()) == (1, 2)
@@ -0,0 +1,213 @@
+import asyncio
+import base64
+import json
+import math
+import os
+from datetime import datetime, timezone
+
+from vaultclient import run_blocking
+from vgscli import access_logs
+
+PAGE_SIZE = int(os.getenv("VGS_ACCESS_LOG_PAGE_SIZE", "100"))
+TAIL_MIN_INTERVAL = float(os.getenv("VGS_TAIL_MIN_INTERVAL", "2"))
+TAIL_MAX_INTERVAL = float(os.getenv("VGS_TAIL_MAX_INTERVAL", "30"))
+
+
+def prepare_filters(vault_id, since=None):
+    return access_logs.prepare_filter(
+        {
+            "tenant_id": vault_id,
+            "protocol": "http",
+            "from": since,
+        }
+    )
+
+
+def parse_time(value):
+    """
+    Turn a unix timestamp or an RFC 3339 date into the UTC
+    `YYYY-MM-DDTHH:MM:SS` form, which sorts like the stored `occurred_at`.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        moment = datetime.fromtimestamp(value, timezone.utc)
+    else:
+        try:
+            moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError as e:
+            raise ValueError(f"Invalid RFC 3339 date: {value}") from e
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(timezone.utc)
+    return moment.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def _first(attributes, *names):
+    for name in names:
+        if attributes.get(name) is not None:
+            return attributes[name]
+    return None
+
+
+def _number(value, kind):
+    try:
+        return kind(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def record_fields(record):
+    """
+    Pull the fields investigations filter and aggregate on out of a log record.
+
+    Records are JSON:API resources with the interesting values under
+    `attributes`; a few fields have carried different names over time, the
+    first one present wins.
+    """
+    attributes = record.get("attributes") or record
+    return {
+        "id": record.get("id") or attributes.get("id"),
+        "occurred_at": _first(attributes, "occurred_at"),
+        "status_code": _number(
+            _first(attributes, "status_code", "response_status_code", "status"), int
+        ),
+        "route_id": _first(attributes, "route_id"),
+        "path": _first(attributes, "path"),
+        "method": _first(attributes, "method", "http_method"),
+        "request_id": _first(attributes, "request_id", "trace_id"),
+        "latency_ms": _number(
+            _first(attributes, "latency", "latency_ms", "duration", "duration_ms"),
+            float,
+        ),
+    }
+
+
+def encode_cursor(state: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(state).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError as e:
+        raise ValueError(f"Invalid access log cursor: {cursor}") from e
+    if not isinstance(state, dict) or not {"page", "offset"} <= state.keys():
+        raise ValueError(f"Invalid access log cursor: {cursor}")
+    return state
+
+
+async def iter_pages(audits_api, filters, page=1, page_size=PAGE_SIZE):
+    """
+    Yield (page_number, records, has_next) one page at a time, oldest first.
+
+    Pages are requested lazily, so callers that stop early never download the
+    rest of the result set.
+    """
+    params = dict(filters)
+    params["sort"] = "occurred_at"
+    params["page[size]"] = page_size
+    while True:
+        params["page[number]"] = page
+        result = await run_blocking(audits_api.access_logs.list, params=dict(params))
+        has_next = bool(result.body["links"].get("next"))
+        yield page, result.body["data"], has_next
+        if not has_next:
+            return
+        page += 1
+
+
+async def iter_pages_newest_first(audits_api, filters, page_size=PAGE_SIZE):
+    """
+    Yield pages of records newest first.
+
+    The API only sorts oldest first, so the page count is read from the first
+    page and pages are requested from the last one back, each reversed. Logs
+    arriving meanwhile are appended after the pages still to be read and
+    never shift them.
+    """
+    params = dict(filters)
+    params["sort"] = "occurred_at"
+    params["page[size]"] = page_size
+    params["page[number]"] = 1
+    first = await run_blocking(audits_api.access_logs.list, params=dict(params))
+    pages = max(1, math.ceil(first.body["meta"]["count"] / page_size))
+    for page in range(pages, 0, -1):
+        if page == 1:
+            data = first.body["data"]
+        else:
+            params["page[number]"] = page
+            result = await run_blocking(
+                audits_api.access_logs.list, params=dict(params)
+            )
+            data = result.body["data"]
+        yield list(reversed(data))
+
+
+async def read_chunk(
+    audits_api, filters, page, offset, max_records, page_size=PAGE_SIZE, on_page=None
+):
+    """
+    Read at most `max_records` records starting at (page, offset).
+
+    Returns the records, the (page, offset) position right after the last
+    record returned, and whether more records were already known to exist.
+    Resuming from that position never skips or repeats a record because
+    results are sorted by occurrence time.
+    """
+    records = []
+    async for page_number, data, has_next in iter_pages(
+        audits_api, filters, page, page_size
+    ):
+        room = max_records - len(records)
+        taken = data[offset : offset + room]
+        records.extend(taken)
+        page, offset = page_number, offset + len(taken)
+        if on_page is not None:
+            await on_page(len(records))
+        if len(records) >= max_records:
+            return records, (page, offset), has_next or offset < len(data)
+        if has_next:
+            page, offset = page_number + 1, 0
+    return records, (page, offset), False
+
+
+async def follow(
+    audits_api,
+    vault_id,
+    since,
+    min_interval=TAIL_MIN_INTERVAL,
+    max_interval=TAIL_MAX_INTERVAL,
+):
+    """
+    Poll for new records forever, yielding (new_records, next_interval).
+
+    Each poll asks for records from the newest `occurred_at` seen so far, so
+    records sharing that timestamp come back and are dropped by request ID.
+    The interval is reset to `min_interval` whenever something new arrives
+    and doubles up to `max_interval` while traffic is quiet. Callers stop by
+    breaking out of the loop; the sleep happens after each yield.
+    """
+    watermark = since
+    seen = {}
+    interval = min_interval
+    while True:
+        fresh = []
+        async for _, data, _ in iter_pages(
+            audits_api, prepare_filters(vault_id, watermark)
+        ):
+            for record in data:
+                fields = record_fields(record)
+                key = fields["request_id"] or fields["id"]
+                occurred_at = fields["occurred_at"] or ""
+                if key in seen or (watermark and occurred_at < watermark):
+                    continue
+                seen[key] = occurred_at
+                fresh.append(record)
+        if fresh:
+            watermark = max(filter(None, [watermark, *seen.values()]), default=None)
+            seen = {key: at for key, at in seen.items() if at >= (watermark or "")}
+            interval = min_interval
+        else:
+            interval = min(interval * 2, max_interval)
+        yield fresh, interval
+        await asyncio.sleep(interval)
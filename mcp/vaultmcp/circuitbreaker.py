@@ -0,0 +1,98 @@
+import logging
+import os
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# Consecutive failures that open a breaker, 0 disables the breakers.
+FAILURE_THRESHOLD = int(os.getenv("VGS_BREAKER_FAILURES", "5"))
+# Seconds an open breaker fails fast before letting a probe request through.
+RESET_TIMEOUT = float(os.getenv("VGS_BREAKER_RESET_TIMEOUT", "30"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling an endpoint whose breaker is open.
+    """
+
+    def __init__(self, name, retry_in):
+        super().__init__(
+            f"{name} is failing, not calling it for another {retry_in:.0f}s"
+        )
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Stops calling an endpoint after repeated failures.
+
+    After `failure_threshold` consecutive failures the breaker opens and
+    calls fail immediately with CircuitOpenError. Once `reset_timeout` has
+    passed, a single probe call is let through (half-open): it closes the
+    breaker if it succeeds and opens it again if it fails, while other calls
+    keep failing fast.
+    """
+
+    def __init__(
+        self, name, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            retry_in = self.opened_at + self.reset_timeout - time.monotonic()
+            if self.state == OPEN and retry_in <= 0:
+                log.info(f"Probing {self.name}")
+                self.state = HALF_OPEN
+                return
+            raise CircuitOpenError(self.name, max(retry_in, 0))
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                log.info(f"{self.name} recovered")
+            self.state = CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    log.warning(f"{self.name} is failing, opening its circuit")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker | None:
+    """
+    Return the breaker shared by all calls to one endpoint, or None when
+    breakers are disabled.
+    """
+    if FAILURE_THRESHOLD <= 0:
+        return None
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(
+                name, FAILURE_THRESHOLD, RESET_TIMEOUT
+            )
+        return breaker
@@ -0,0 +1,103 @@
+import math
+from collections import Counter
+
+import accesslogs
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(sorted_values, pct):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class LogStats:
+    """
+    Aggregates access logs incrementally so only counters and latencies are
+    kept in memory, never the records themselves.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.first_seen = None
+        self.last_seen = None
+        self.status_codes = Counter()
+        self.paths = Counter()
+        self.path_errors = Counter()
+        self.routes = Counter()
+        self.route_errors = Counter()
+        self.latencies = []
+
+    def add(self, fields):
+        """
+        Count one record given as `accesslogs.record_fields()` output.
+        """
+        self.total += 1
+        occurred_at = fields.get("occurred_at")
+        if occurred_at:
+            if self.first_seen is None or occurred_at < self.first_seen:
+                self.first_seen = occurred_at
+            if self.last_seen is None or occurred_at > self.last_seen:
+                self.last_seen = occurred_at
+        status = fields.get("status_code")
+        failed = status is not None and status >= 400
+        self.status_codes[status] += 1
+        if fields.get("path") is not None:
+            self.paths[fields["path"]] += 1
+            self.path_errors[fields["path"]] += failed
+        if fields.get("route_id") is not None:
+            self.routes[fields["route_id"]] += 1
+            self.route_errors[fields["route_id"]] += failed
+        if fields.get("latency_ms") is not None:
+            self.latencies.append(fields["latency_ms"])
+
+    def add_records(self, records):
+        for record in records:
+            self.add(accesslogs.record_fields(record))
+
+    def _top(self, counts, errors, top_n, key):
+        return [
+            {key: value, "count": count, "error_rate": errors[value] / count}
+            for value, count in counts.most_common(top_n)
+        ]
+
+    def summary(self, top_n=10):
+        client_errors = sum(
+            count
+            for status, count in self.status_codes.items()
+            if status is not None and 400 <= status < 500
+        )
+        server_errors = sum(
+            count
+            for status, count in self.status_codes.items()
+            if status is not None and status >= 500
+        )
+        latencies = sorted(self.latencies)
+        return {
+            "total": self.total,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "error_rate": (
+                (client_errors + server_errors) / self.total if self.total else 0.0
+            ),
+            "client_errors": client_errors,
+            "server_errors": server_errors,
+            "status_codes": {
+                str(status): count
+                for status, count in sorted(
+                    self.status_codes.items(), key=lambda item: str(item[0])
+                )
+            },
+            "latency_ms": {
+                **{f"p{pct}": percentile(latencies, pct) for pct in PERCENTILES},
+                "max": latencies[-1] if latencies else None,
+                "samples": len(latencies),
+            },
+            "top_paths": self._top(self.paths, self.path_errors, top_n, "path"),
+            "top_routes": self._top(self.routes, self.route_errors, top_n, "route_id"),
+        }
@@ -0,0 +1,346 @@
+import json
+import os
+import re
+import sqlite3
+from contextlib import closing
+
+import accesslogs
+from vaultclient import run_blocking
+
+# Directory holding one SQLite file per vault; the local store is disabled
+# unless this is set.
+STORE_DIR = os.getenv("VGS_ACCESS_LOG_STORE_DIR")
+# Upper bound on records downloaded by a single sync, later syncs continue
+# where it stopped.
+SYNC_LIMIT = int(os.getenv("VGS_ACCESS_LOG_SYNC_LIMIT", "10000"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS access_logs (
+    id TEXT PRIMARY KEY,
+    occurred_at TEXT,
+    status_code INTEGER,
+    route_id TEXT,
+    path TEXT,
+    method TEXT,
+    request_id TEXT,
+    latency_ms REAL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS access_logs_occurred_at ON access_logs (occurred_at);
+CREATE INDEX IF NOT EXISTS access_logs_status_code ON access_logs (status_code, occurred_at);
+CREATE INDEX IF NOT EXISTS access_logs_route_id ON access_logs (route_id, occurred_at);
+CREATE INDEX IF NOT EXISTS access_logs_path ON access_logs (path, occurred_at);
+CREATE INDEX IF NOT EXISTS access_logs_request_id ON access_logs (request_id);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+COLUMNS = (
+    "id",
+    "occurred_at",
+    "status_code",
+    "route_id",
+    "path",
+    "method",
+    "request_id",
+    "latency_ms",
+)
+
+
+class AccessLogStore:
+    """
+    Append-only SQLite copy of one vault's access logs.
+
+    Records are only ever inserted, keyed by their log id, so overlapping
+    syncs are harmless. The store also remembers which time ranges it holds
+    every log of, as sorted, disjoint [from, to] pairs of `occurred_at`
+    values; a `from` of "" means the start of the vault's history.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with closing(self._connect()) as connection:
+            connection.executescript(SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path)
+
+    def insert(self, records):
+        rows = []
+        for record in records:
+            fields = accesslogs.record_fields(record)
+            if fields["id"] is None:
+                continue
+            rows.append(
+                tuple(fields[column] for column in COLUMNS) + (json.dumps(record),)
+            )
+        with closing(self._connect()) as connection, connection:
+            before = connection.total_changes
+            connection.executemany(
+                f"INSERT OR IGNORE INTO access_logs ({', '.join(COLUMNS)}, record) "
+                f"VALUES ({', '.join('?' * (len(COLUMNS) + 1))})",
+                rows,
+            )
+            return connection.total_changes - before
+
+    def watermark(self):
+        with closing(self._connect()) as connection:
+            return connection.execute(
+                "SELECT MAX(occurred_at) FROM access_logs"
+            ).fetchone()[0]
+
+    def coverage(self):
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT value FROM sync_state WHERE key = 'coverage'"
+            ).fetchone()
+        return [tuple(span) for span in json.loads(row[0])] if row else []
+
+    def add_coverage(self, start, end):
+        """
+        Record that every log from `start` to `end` is stored, merging the
+        range with the ones it touches.
+        """
+        spans = []
+        for span_start, span_end in sorted(self.coverage() + [(start, end)]):
+            if spans and span_start <= spans[-1][1]:
+                spans[-1] = (spans[-1][0], max(spans[-1][1], span_end))
+            else:
+                spans.append((span_start, span_end))
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO sync_state (key, value) VALUES ('coverage', ?)",
+                (json.dumps(spans),),
+            )
+
+    def covered_since(self):
+        """
+        Return the time from which the store holds every log up to its newest
+        one, or None when nothing is covered.
+        """
+        spans = self.coverage()
+        return spans[-1][0] if spans else None
+
+    def count(self):
+        with closing(self._connect()) as connection:
+            return connection.execute("SELECT COUNT(*) FROM access_logs").fetchone()[0]
+
+    def query(
+        self,
+        status_code=None,
+        route_id=None,
+        path=None,
+        since=None,
+        until=None,
+        limit=100,
+        newest_first=True,
+    ):
+        """
+        Return stored records matching every given filter.
+
+        `path` may end in `*` to match a prefix. `since` is inclusive and
+        `until` exclusive, both compared against `occurred_at`.
+        """
+        clauses, params = self._where(status_code, route_id, path, since, until)
+        order = "DESC" if newest_first else "ASC"
+        sql = (
+            f"SELECT record FROM access_logs {clauses} "
+            f"ORDER BY occurred_at {order}, id {order} LIMIT ?"
+        )
+        with closing(self._connect()) as connection:
+            rows = connection.execute(sql, params + [limit]).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def iter_fields(self, since=None, until=None):
+        """
+        Yield the indexed columns of stored records in a time window, oldest first.
+        """
+        clauses, params = self._where(None, None, None, since, until)
+        sql = (
+            f"SELECT {', '.join(COLUMNS)} FROM access_logs {clauses} "
+            "ORDER BY occurred_at"
+        )
+        with closing(self._connect()) as connection:
+            for row in connection.execute(sql, params):
+                yield dict(zip(COLUMNS, row))
+
+    @staticmethod
+    def _where(status_code, route_id, path, since, until):
+        clauses, params = [], []
+        if status_code is not None:
+            clauses.append("status_code = ?")
+            params.append(status_code)
+        if route_id is not None:
+            clauses.append("route_id = ?")
+            params.append(route_id)
+        if path is not None:
+            if path.endswith("*"):
+                clauses.append("path LIKE ? ESCAPE '\\'")
+                params.append(re.sub(r"([%_\\])", r"\\\1", path[:-1]) + "%")
+            else:
+                clauses.append("path = ?")
+                params.append(path)
+        if since is not None:
+            clauses.append("occurred_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("occurred_at < ?")
+            params.append(until)
+        return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+_stores = {}
+
+
+def get_store(environment, vault_id):
+    """
+    Return the store for a vault, or None when the local store is disabled.
+    """
+    if not STORE_DIR:
+        return None
+    key = (environment, vault_id)
+    if key not in _stores:
+        os.makedirs(STORE_DIR, exist_ok=True)
+        _stores[key] = AccessLogStore(
+            os.path.join(STORE_DIR, f"{environment}-{vault_id}.sqlite")
+        )
+    return _stores[key]
+
+
+def _occurred_at(record):
+    return accesslogs.record_fields(record)["occurred_at"] or ""
+
+
+async def _catch_up(store, audits_api, vault_id, start, limit):
+    """
+    Download logs from `start` on, newest first, until they meet what is
+    stored or `limit` records were read.
+
+    Once the limit is reached, logs sharing the oldest timestamp read so far
+    are still taken so the range recorded as covered has no partial edge.
+    Returns (added, fetched, complete).
+    """
+    filters = accesslogs.prepare_filters(vault_id, start or None)
+    added = fetched = 0
+    newest = oldest = None
+    complete = True
+    async for data in accesslogs.iter_pages_newest_first(audits_api, filters):
+        taken = []
+        for record in data:
+            occurred_at = _occurred_at(record)
+            if occurred_at < (start or "") or (
+                fetched + len(taken) >= limit
+                and oldest is not None
+                and occurred_at < oldest
+            ):
+                complete = occurred_at < (start or "")
+                break
+            taken.append(record)
+            newest = newest or occurred_at
+            oldest = occurred_at
+        added += await run_blocking(store.insert, taken)
+        fetched += len(taken)
+        if len(taken) < len(data):
+            break
+    if newest is not None or complete:
+        end = newest if newest is not None else start
+        await run_blocking(store.add_coverage, start if complete else oldest, end)
+    return added, fetched, complete
+
+
+async def _backfill(store, audits_api, vault_id, start, end, limit):
+    """
+    Download logs from `start` up to `end`, oldest first, reading at most
+    `limit` records. Returns (added, fetched, complete).
+    """
+    filters = accesslogs.prepare_filters(vault_id, start or None)
+    added = fetched = 0
+    last = None
+    complete = True
+    async for _, data, _ in accesslogs.iter_pages(audits_api, filters):
+        taken = []
+        for record in data:
+            occurred_at = _occurred_at(record)
+            if occurred_at >= end or (
+                fetched + len(taken) >= limit
+                and last is not None
+                and occurred_at > last
+            ):
+                complete = occurred_at >= end
+                break
+            taken.append(record)
+            last = occurred_at
+        added += await run_blocking(store.insert, taken)
+        fetched += len(taken)
+        if len(taken) < len(data):
+            break
+    await run_blocking(store.add_coverage, start, end if complete else last or start)
+    return added, fetched, complete
+
+
+async def sync(
+    store, audits_api, vault_id, since=None, limit=SYNC_LIMIT, backfill=True
+):
+    """
+    Download the logs the store is missing from `since` on and return
+    (added, complete).
+
+    New logs are fetched first, newest first, so the latest logs are stored
+    even when `limit` runs out before the store has caught up. With
+    `backfill`, gaps between `since` (the start of history when None) and
+    the newest covered range are then filled oldest first, resuming where
+    earlier syncs stopped. `complete` tells whether the store now holds
+    every log from `since` on.
+    """
+    since = accesslogs.parse_time(since) or ""
+    spans = await run_blocking(store.coverage)
+    start = spans[-1][1] if spans else since
+    added, fetched, complete = await _catch_up(
+        store, audits_api, vault_id, start, limit
+    )
+    while backfill and complete and fetched < limit:
+        spans = await run_blocking(store.coverage)
+        gaps = [
+            (span_end, next_start)
+            for (_, span_end), (next_start, _) in zip([("", since)] + spans, spans)
+            if next_start > since and span_end < next_start
+        ]
+        if not gaps:
+            break
+        gap_start, gap_end = gaps[0]
+        gap_added, gap_fetched, complete = await _backfill(
+            store, audits_api, vault_id, max(gap_start, since), gap_end, limit - fetched
+        )
+        added += gap_added
+        fetched += gap_fetched
+    covered_since = await run_blocking(store.covered_since)
+    return added, covered_since is not None and covered_since <= since
+
+
+async def latest(store, audits_api, vault_id, since, limit):
+    """
+    Return the newest `limit` stored logs from `since` on, oldest first, or
+    None when the store cannot vouch that they are the real newest ones.
+
+    Syncing reads at most `limit` logs, so a tail costs about as much as
+    reading it from the API even on an empty store; the full sync is left to
+    queries and aggregations. Older logs are only backfilled when the newest
+    covered range is too short to hold `limit` logs.
+    """
+    since = accesslogs.parse_time(since)
+    _, complete = await sync(store, audits_api, vault_id, since, limit, backfill=False)
+    records = await run_blocking(store.query, since=since, limit=limit)
+    covered_since = await run_blocking(store.covered_since)
+    if not complete and not (
+        len(records) == limit
+        and covered_since is not None
+        and _occurred_at(records[-1]) >= covered_since
+    ):
+        _, complete = await sync(store, audits_api, vault_id, since, limit)
+        if not complete:
+            return None
+        records = await run_blocking(store.query, since=since, limit=limit)
+    records.reverse()
+    return records
@@ -1,21 +1,41 @@
 # server.py
+import asyncio
 import json
 import logging
 import os
-from typing import Annotated
+import time
+from datetime import datetime, timezone
+from typing import Annotated, Literal
 
 import requests
 import vgs.sdk.vaults_api
-from fastmcp import FastMCP
+from fastmcp import Context, FastMCP
 from pydantic import Field
-from vaultclient import get_jwt_token
 from vgs.sdk import serializers
 from vgscli import access_logs
 from vgscli.audits_api import create_api as create_audits_api_int
 
+import accesslogs
+import logstats
+import logstore
+import metrics
+import routediff
+import routefilters
+import routeschema
+from routecache import RouteCache
+from singleflight import SingleFlight
+from vaultclient import (
+    ApiClientCache,
+    get_jwt_token,
+    get_session,
+    run_blocking,
+    use_session,
+)
+
 logger = logging.getLogger(__name__)
 
 mcp = FastMCP("VGS Proxy + Vault Demo 🚀🔒")
+mcp.add_middleware(metrics.ToolMetricsMiddleware())
 
 client_id = os.getenv("VGS_CLIENT_ID")
 client_secret = os.getenv("VGS_CLIENT_SECRET")
@@ -45,17 +65,55 @@ environments = {
 }
 
 
+route_cache = RouteCache()
+api_clients = ApiClientCache()
+metrics.register_cache("routes", route_cache)
+metrics.register_cache("api_clients", api_clients)
+reads = SingleFlight()
+
+LOG_DETAILS_CONCURRENCY = int(os.getenv("VGS_LOG_DETAILS_CONCURRENCY", "10"))
+ROUTE_APPLY_CONCURRENCY = int(os.getenv("VGS_ROUTE_APPLY_CONCURRENCY", "8"))
+# Seconds of recent traffic aggregate_access_logs summarizes without a `since`.
+AGGREGATE_WINDOW = float(os.getenv("VGS_ACCESS_LOG_AGGREGATE_WINDOW", "3600"))
+
+
 def create_audits_api(vault_id, environment):
     token = get_jwt_token(
         environments[environment]["keycloak_url"],
         environments[environment]["keycloak_realm"],
     )
     logger.info("creating audits api")
-    return create_audits_api_int(None, vault_id, environment, token)
+    return api_clients.get(
+        ("audits", vault_id, environment),
+        token,
+        lambda: use_session(
+            create_audits_api_int(
+                None, vault_id, environments[environment]["infra_env"], token
+            ),
+            get_session(environment, "audits"),
+        ),
+    )
+
+
+def create_vault_management_api(vault_id, environment):
+    token = get_jwt_token(
+        environments[environment]["keycloak_url"],
+        environments[environment]["keycloak_realm"],
+    )
+    return api_clients.get(
+        ("vault_management", vault_id, environment),
+        token,
+        lambda: use_session(
+            vgs.sdk.vaults_api.create_api(
+                None, vault_id, environments[environment]["infra_env"], token
+            ),
+            get_session(environment, "routes"),
+        ),
+    )
 
 
 @mcp.tool()
-def get_access_logs(
+async def get_access_logs(
     vault_id: Annotated[
         str,
         Field(
@@ -68,7 +126,7 @@ def get_access_logs(
         Field(description="Number of logs to return. Defaults to 100.", default=100),
     ],
     since: Annotated[
-        int,
+        str | None,
         Field(
             description="Only show logs newer than a specific duration. Must be a specific RFC 3339 date.",
             default=None,
@@ -82,6 +140,7 @@ def get_access_logs(
         ),
     ],
 ):
+    since = accesslogs.parse_time(since)
     filters = access_logs.prepare_filter(
         {
             "tenant_id": vault_id,
@@ -91,17 +150,334 @@ def get_access_logs(
     )
     logger.info("ready to get access logs")
 
-    audits_api = create_audits_api(vault_id, environment)
+    audits_api = await run_blocking(create_audits_api, vault_id, environment)
     logger.info("got access logs key")
 
-    for res in access_logs.fetch_logs(audits_api, filters, tail):
+    store = logstore.get_store(environment, vault_id)
+    if store is not None:
+        records = await logstore.latest(store, audits_api, vault_id, since, tail)
+        if records is not None:
+            return [serializers.format_logs(serializers.wrap_records(records), "json")]
+        logger.info("local access logs do not cover the window, fetching them")
+
+    def fetch_pages():
+        pages = []
+        for res in access_logs.fetch_logs(audits_api, filters, tail):
+            logger.info("got access logs and formatting")
+            pages.append(serializers.format_logs(serializers.wrap_records(res), "json"))
+        return pages
+
+    return await run_blocking(fetch_pages)
+
+
+@mcp.tool()
+async def query_access_logs(
+    vault_id: Annotated[
+        str,
+        Field(
+            description="ID of the Vault to query access logs for.",
+            pattern="tnt[A-z0-9]+",
+        ),
+    ],
+    environment: Annotated[
+        str,
+        Field(
+            description="Environment to query access logs for.",
+            default="sandbox",
+        ),
+    ],
+    status_code: Annotated[
+        int | None, Field(description="Only return logs with this status code.")
+    ] = None,
+    route_id: Annotated[
+        str | None, Field(description="Only return logs matched by this route.")
+    ] = None,
+    path: Annotated[
+        str | None,
+        Field(
+            description="Only return logs for this path. End it with * to match a prefix."
+        ),
+    ] = None,
+    since: Annotated[
+        str | None,
+        Field(description="Only return logs at or after this RFC 3339 date."),
+    ] = None,
+    until: Annotated[
+        str | None,
+        Field(description="Only return logs before this RFC 3339 date."),
+    ] = None,
+    limit: Annotated[
+        int, Field(description="Maximum number of logs to return.", ge=1, le=5000)
+    ] = 100,
+    refresh: Annotated[
+        bool,
+        Field(description="Download logs newer than the local copy before querying."),
+    ] = True,
+):
+    """
+    Query access logs from the local per-vault index, newest first.
 
-        logger.info("got access logs and formatting")
-        yield serializers.format_logs(serializers.wrap_records(res), "json")
+    The first call downloads the vault's logs into a local SQLite file; later
+    calls only download logs newer than what is already stored, so repeated
+    queries with different filters during an investigation are answered
+    locally. Requires VGS_ACCESS_LOG_STORE_DIR to be set.
+    """
+    store = logstore.get_store(environment, vault_id)
+    if store is None:
+        raise ValueError(
+            "The local access log store is disabled, set VGS_ACCESS_LOG_STORE_DIR to enable it."
+        )
+    since = accesslogs.parse_time(since)
+    until = accesslogs.parse_time(until)
+    if refresh:
+        audits_api = await run_blocking(create_audits_api, vault_id, environment)
+        await logstore.sync(store, audits_api, vault_id, since)
+    return await run_blocking(
+        store.query,
+        status_code=status_code,
+        route_id=route_id,
+        path=path,
+        since=since,
+        until=until,
+        limit=limit,
+    )
 
 
 @mcp.tool()
-def create_route(
+async def stream_access_logs(
+    vault_id: Annotated[
+        str,
+        Field(
+            description="ID of the Vault to get access logs for.",
+            pattern="tnt[A-z0-9]+",
+        ),
+    ],
+    environment: Annotated[
+        str,
+        Field(
+            description="Environment to get access logs for.",
+            default="sandbox",
+        ),
+    ],
+    since: Annotated[
+        str | None,
+        Field(
+            description="Only return logs newer than this RFC 3339 date. Ignored when resuming from a cursor."
+        ),
+    ] = None,
+    cursor: Annotated[
+        str | None,
+        Field(
+            description="Cursor returned by a previous call, to continue where it stopped."
+        ),
+    ] = None,
+    max_records: Annotated[
+        int,
+        Field(description="Maximum number of logs in this chunk.", ge=1, le=5000),
+    ] = 500,
+    ctx: Context | None = None,
+):
+    """
+    Read access logs in bounded chunks, oldest first, resumable with a cursor.
+
+    Each call returns at most `max_records` logs together with a `cursor`. Pass
+    the cursor back to get the next chunk; `has_more` tells whether more logs
+    were already available. A cursor can also be kept and resumed later to pick
+    up logs recorded since. Pages are downloaded lazily and progress is
+    reported per page, so large investigations never hold the full result set.
+    """
+    if cursor:
+        state = accesslogs.decode_cursor(cursor)
+        since = state.get("since")
+    else:
+        state = {"page": 1, "offset": 0}
+    filters = accesslogs.prepare_filters(vault_id, since)
+    audits_api = await run_blocking(create_audits_api, vault_id, environment)
+
+    async def on_page(read):
+        if ctx is not None:
+            await ctx.report_progress(read, max_records)
+
+    records, (page, offset), has_more = await accesslogs.read_chunk(
+        audits_api,
+        filters,
+        state["page"],
+        state["offset"],
+        max_records,
+        on_page=on_page,
+    )
+    return {
+        "data": records,
+        "cursor": accesslogs.encode_cursor(
+            {"since": since, "page": page, "offset": offset}
+        ),
+        "has_more": has_more,
+    }
+
+
+@mcp.tool()
+async def tail_access_logs(
+    vault_id: Annotated[
+        str,
+        Field(
+            description="ID of the Vault to follow access logs for.",
+            pattern="tnt[A-z0-9]+",
+        ),
+    ],
+    environment: Annotated[
+        str,
+        Field(
+            description="Environment to follow access logs for.",
+            default="sandbox",
+        ),
+    ],
+    since: Annotated[
+        str | None,
+        Field(
+            description="Only return logs at or after this RFC 3339 date. Defaults to now."
+        ),
+    ] = None,
+    duration: Annotated[
+        float,
+        Field(description="How long to follow the logs, in seconds.", gt=0, le=600),
+    ] = 60,
+    max_records: Annotated[
+        int,
+        Field(description="Stop after this many new logs.", ge=1, le=5000),
+    ] = 500,
+    ctx: Context | None = None,
+):
+    """
+    Follow new access logs for a while, like `tail -f`.
+
+    Polls the logs endpoint with a moving watermark and sends each new log to
+    the client as a log notification as soon as it is seen, so a route
+    rollout can be watched live. Polling slows down while there is no
+    traffic. Returns every new log once `duration` has passed or
+    `max_records` logs were seen.
+    """
+    if since is None:
+        since = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+    audits_api = await run_blocking(create_audits_api, vault_id, environment)
+    deadline = time.monotonic() + duration
+    records = []
+    follower = accesslogs.follow(audits_api, vault_id, since)
+    try:
+        async for fresh, interval in follower:
+            fresh = fresh[: max_records - len(records)]
+            records.extend(fresh)
+            if ctx is not None:
+                for record in fresh:
+                    await ctx.info(json.dumps(record))
+                if fresh:
+                    await ctx.report_progress(len(records), max_records)
+            if len(records) >= max_records or time.monotonic() + interval >= deadline:
+                break
+    finally:
+        await follower.aclose()
+    return records
+
+
+@mcp.tool()
+async def aggregate_access_logs(
+    vault_id: Annotated[
+        str,
+        Field(
+            description="ID of the Vault to aggregate access logs for.",
+            pattern="tnt[A-z0-9]+",
+        ),
+    ],
+    environment: Annotated[
+        str,
+        Field(
+            description="Environment to aggregate access logs for.",
+            default="sandbox",
+        ),
+    ],
+    since: Annotated[
+        str | None,
+        Field(
+            description="Only count logs at or after this RFC 3339 date. Defaults to the last hour."
+        ),
+    ] = None,
+    until: Annotated[
+        str | None,
+        Field(description="Only count logs before this RFC 3339 date."),
+    ] = None,
+    top_n: Annotated[
+        int,
+        Field(
+            description="Number of busiest paths and routes to return.", ge=1, le=100
+        ),
+    ] = 10,
+    max_records: Annotated[
+        int,
+        Field(description="Maximum number of logs to scan.", ge=1, le=100000),
+    ] = 50000,
+    ctx: Context | None = None,
+):
+    """
+    Summarize access logs over a time window instead of returning them.
+
+    Returns the total count, error rate, a status code histogram, latency
+    percentiles and the busiest paths and routes with their own error rates.
+    Logs are counted as they are read, so large windows never hold the raw
+    records. Without `since` the last VGS_ACCESS_LOG_AGGREGATE_WINDOW
+    seconds are summarized. Uses the local index when VGS_ACCESS_LOG_STORE_DIR
+    is set, otherwise pages through the audits API. `truncated` is set when
+    `max_records` was reached or the local index could not be synced back
+    to `since`; `coverage` then tells from when the index is complete.
+    """
+    since = accesslogs.parse_time(since or time.time() - AGGREGATE_WINDOW)
+    until = accesslogs.parse_time(until)
+    stats = logstats.LogStats()
+    audits_api = await run_blocking(create_audits_api, vault_id, environment)
+    store = logstore.get_store(environment, vault_id)
+    truncated = False
+    coverage = None
+    if store is not None:
+        _, complete = await logstore.sync(store, audits_api, vault_id, since)
+        coverage = {
+            "since": await run_blocking(store.covered_since),
+            "complete": complete,
+        }
+
+        def scan():
+            for fields in store.iter_fields(since, until):
+                if stats.total >= max_records:
+                    return True
+                stats.add(fields)
+            return False
+
+        truncated = await run_blocking(scan) or not complete
+    else:
+        filters = accesslogs.prepare_filters(vault_id, since)
+        async for _, data, has_next in accesslogs.iter_pages(audits_api, filters):
+            for record in data:
+                fields = accesslogs.record_fields(record)
+                if until and fields["occurred_at"] and fields["occurred_at"] >= until:
+                    has_next = False
+                    break
+                if stats.total >= max_records:
+                    truncated = True
+                    break
+                stats.add(fields)
+            if ctx is not None:
+                await ctx.report_progress(stats.total, max_records)
+            if truncated or not has_next:
+                break
+    result = {
+        "window": {"since": since, "until": until},
+        "truncated": truncated,
+        **stats.summary(top_n),
+    }
+    if coverage is not None:
+        result["coverage"] = coverage
+    return result
+
+
+@mcp.tool()
+async def create_route(
     vault_id: Annotated[
         str,
         Field(
@@ -129,22 +505,13 @@ def create_route(
         ),
     ],
 ):
-    token = get_jwt_token(
-        environments[environment]["keycloak_url"],
-        environments[environment]["keycloak_realm"],
-    )
-    if isinstance(payload, str):
-        payload = json.loads(payload)
-    vault_management_api = vgs.sdk.vaults_api.create_api(
-        None, vault_id, environments[environment]["infra_env"], token
-    )
     logger.info("ready to create route")
     logger.info(payload)
-    return vault_management_api.routes.update(route_id, body=payload)
+    return await write_route(vault_id, route_id, payload, environment)
 
 
 @mcp.tool()
-def delete_route(
+async def delete_route(
     vault_id: Annotated[
         str,
         Field(
@@ -166,19 +533,18 @@ def delete_route(
         ),
     ],
 ):
-    token = get_jwt_token(
-        environments[environment]["keycloak_url"],
-        environments[environment]["keycloak_realm"],
+    vault_management_api = await run_blocking(
+        create_vault_management_api, vault_id, environment
     )
-    vault_management_api = vgs.sdk.vaults_api.create_api(
-        None, vault_id, environments[environment]["infra_env"], token
-    )
-    vault_management_api.routes.delete(route_id)
+    try:
+        await run_blocking(vault_management_api.routes.delete, route_id)
+    finally:
+        routes_changed(environment, vault_id)
     return f"Route {route_id} deleted"
 
 
 @mcp.tool()
-def get_route(
+async def get_route(
     vault_id: Annotated[
         str,
         Field(
@@ -200,18 +566,25 @@ def get_route(
         ),
     ],
 ):
-    token = get_jwt_token(
-        environments[environment]["keycloak_url"],
-        environments[environment]["keycloak_realm"],
+    route = route_cache.get_route((environment, vault_id), route_id)
+    if route is not None:
+        return route
+    return await reads.do(
+        ("route", environment, vault_id, route_id),
+        lambda: download_route(vault_id, route_id, environment),
     )
-    vault_management_api = vgs.sdk.vaults_api.create_api(
-        None, vault_id, environments[environment]["infra_env"], token
+
+
+async def download_route(vault_id, route_id, environment):
+    vault_management_api = await run_blocking(
+        create_vault_management_api, vault_id, environment
     )
-    return vault_management_api.routes.get(route_id)
+    response = await run_blocking(vault_management_api.routes.retrieve, route_id)
+    return response.body["data"]
 
 
 @mcp.tool()
-def update_route(
+async def update_route(
     vault_id: Annotated[
         str,
         Field(
@@ -239,18 +612,36 @@ def update_route(
         ),
     ],
 ):
-    token = get_jwt_token(
-        environments[environment]["keycloak_url"],
-        environments[environment]["keycloak_realm"],
-    )
-    vault_management_api = vgs.sdk.vaults_api.create_api(
-        None, vault_id, environments[environment]["infra_env"], token
+    return await write_route(vault_id, route_id, payload, environment)
+
+
+async def write_route(vault_id, route_id, payload, environment):
+    """
+    Validate a route payload locally and upload it unless the cached copy of
+    the route is already identical.
+    """
+    payload = routeschema.normalize(payload, route_id)
+    routeschema.validate(payload)
+    key = (environment, vault_id)
+    current = route_cache.get_route(key, route_id)
+    if current is not None and routeschema.fingerprint(
+        current
+    ) == routeschema.fingerprint(payload["data"]):
+        return f"Route {route_id} is unchanged"
+
+    vault_management_api = await run_blocking(
+        create_vault_management_api, vault_id, environment
     )
-    return vault_management_api.routes.update(route_id, body=payload)
+    try:
+        return await run_blocking(
+            vault_management_api.routes.update, route_id, body=payload
+        )
+    finally:
+        routes_changed(environment, vault_id)
 
 
 @mcp.tool()
-def get_routes(
+async def get_routes(
     vault_id: Annotated[
         str,
         Field(
@@ -265,19 +656,324 @@ def get_routes(
             default="sandbox",
         ),
     ],
+    tag: Annotated[
+        str | None,
+        Field(
+            description="Only return routes whose tags.name equals this.",
+            default=None,
+        ),
+    ] = None,
+    protocol: Annotated[
+        str | None,
+        Field(
+            description="Only return routes using this protocol.",
+            default=None,
+        ),
+    ] = None,
+    host_endpoint: Annotated[
+        str | None,
+        Field(
+            description="Only return routes whose host_endpoint contains this text.",
+            default=None,
+        ),
+    ] = None,
+    direction: Annotated[
+        Literal["inbound", "outbound"] | None,
+        Field(
+            description="Only return inbound (reverse proxy) or outbound (forward proxy) routes.",
+            default=None,
+        ),
+    ] = None,
+    fields: Annotated[
+        list[str] | None,
+        Field(
+            description="Only return these fields of each route, e.g. ['id', 'tags.name', 'host_endpoint']. Paths are relative to the route attributes unless they start with id, type or attributes.",
+            default=None,
+        ),
+    ] = None,
+    page: Annotated[
+        int,
+        Field(
+            description="Page of results to return, starting at 1.",
+            default=1,
+            ge=1,
+        ),
+    ] = 1,
+    page_size: Annotated[
+        int | None,
+        Field(
+            description="Number of routes per page. When set the routes are returned under `data` with paging details under `meta`.",
+            default=None,
+            ge=1,
+        ),
+    ] = None,
 ):
-    token = get_jwt_token(
-        environments[environment]["keycloak_url"],
-        environments[environment]["keycloak_realm"],
+    """
+    List the routes of a vault.
+
+    Routes can be filtered by tag name, protocol, host endpoint and direction,
+    reduced to a few fields, and paginated so large vaults return small payloads.
+    Without `page_size` the full list of matching routes is returned.
+    """
+    routes = await load_routes(vault_id, environment)
+    routes = [
+        route
+        for route in routes
+        if routefilters.matches(route, tag, protocol, host_endpoint, direction)
+    ]
+    if fields:
+        routes = [routefilters.project(route, fields) for route in routes]
+    if page_size:
+        return routefilters.paginate(routes, page, page_size)
+    return routes
+
+
+@mcp.tool()
+async def apply_routes(
+    vault_id: Annotated[
+        str,
+        Field(
+            description="ID of the Vault to apply the routes to.",
+            pattern="tnt[A-z0-9]+",
+        ),
+    ],
+    routes: Annotated[
+        str | dict | list,
+        Field(
+            description="Route definitions: YAML or JSON text in the exported route file format ({data: [...]}), several documents separated by ---, or the parsed equivalent."
+        ),
+    ],
+    environment: Annotated[
+        str,
+        Field(
+            description="Environment to apply the routes in.",
+            default="sandbox",
+        ),
+    ],
+    prune: Annotated[
+        bool,
+        Field(
+            description="Delete routes of the vault that are not in the definitions."
+        ),
+    ] = False,
+    dry_run: Annotated[
+        bool,
+        Field(description="Only return the plan, do not change anything."),
+    ] = True,
+    ctx: Context | None = None,
+):
+    """
+    Make a vault's routes match a set of route definitions.
+
+    Fetches the current routes once, compares them with the definitions by
+    route ID and returns the plan: routes to create, routes to update with the
+    fields that changed, and routes to delete when `prune` is set. Unless
+    `dry_run` is set, only the changed routes are then written, concurrently.
+    If any write fails, the writes that succeeded are reverted to the state
+    fetched at the start and the errors are returned.
+    """
+    desired = routediff.load_definitions(routes)
+    for route in desired:
+        routeschema.validate({"data": route})
+    current = await load_routes(vault_id, environment, fresh=True)
+    route_plan = routediff.plan(desired, current, prune=prune)
+    summary = routediff.summarize(route_plan)
+    if dry_run:
+        return {"status": "planned", "plan": summary}
+
+    vault_management_api = await run_blocking(
+        create_vault_management_api, vault_id, environment
     )
-    vault_management_api = vgs.sdk.vaults_api.create_api(
-        None, vault_id, environments[environment]["infra_env"], token
+    routes_api = vault_management_api.routes
+    writes = [
+        (route, (routes_api.update, routediff.route_id(route), {"data": route}))
+        for route in route_plan["create"]
+    ]
+    writes += [
+        (
+            update["previous"],
+            (
+                routes_api.update,
+                routediff.route_id(update["route"]),
+                {"data": update["route"]},
+            ),
+        )
+        for update in route_plan["update"]
+    ]
+    writes += [
+        (route, (routes_api.delete, routediff.route_id(route), None))
+        for route in route_plan["delete"]
+    ]
+    created = {routediff.route_id(route) for route in route_plan["create"]}
+
+    try:
+        errors = await run_route_calls([call for _, call in writes], ctx)
+        if not errors:
+            return {"status": "applied", "plan": summary}
+
+        failed = set(errors)
+        undo = [
+            (
+                (routes_api.delete, rid, None)
+                if rid in created
+                else (routes_api.update, rid, {"data": previous})
+            )
+            for previous, (_, rid, _) in writes
+            if rid not in failed
+        ]
+        rollback_errors = await run_route_calls(undo)
+        return {
+            "status": "rolled_back" if not rollback_errors else "partially_applied",
+            "plan": summary,
+            "errors": errors,
+            "rollback_errors": rollback_errors,
+        }
+    finally:
+        routes_changed(environment, vault_id)
+
+
+@mcp.tool()
+async def compare_routes(
+    vaults: Annotated[
+        dict[str, str],
+        Field(
+            description='Vault ID per environment to compare, e.g. {"sandbox": "tntaaa", "live": "tntbbb"}. The first one is the baseline.',
+            min_length=2,
+        ),
+    ],
+    match_by: Annotated[
+        Literal["id", "name"],
+        Field(
+            description="Match routes by route ID or by their tags.name, for vaults whose routes were created separately."
+        ),
+    ] = "id",
+    ignore: Annotated[
+        list[str] | None,
+        Field(
+            description="Attribute paths to leave out of the comparison, e.g. host_endpoint."
+        ),
+    ] = None,
+):
+    """
+    Compare the routes of a vault across environments in one call.
+
+    Routes are fetched from all environments concurrently. For every other
+    environment the result lists the routes missing there, the extra routes
+    only it has, and the field paths that differ for routes present in both,
+    so drift can be checked without pulling every route into the conversation.
+    """
+    unknown = vaults.keys() - environments.keys()
+    if unknown:
+        raise ValueError(f"Unknown environments: {', '.join(sorted(unknown))}")
+    routes = await asyncio.gather(
+        *(
+            load_routes(vault_id, environment)
+            for environment, vault_id in vaults.items()
+        )
     )
-    return vault_management_api.routes.list().body["data"]
+    routes_by_environment = dict(zip(vaults, routes))
+    baseline, *others = vaults
+    key = routediff.route_id if match_by == "id" else routediff.route_name
+    return {
+        "baseline": baseline,
+        "routes": {
+            environment: len(env_routes)
+            for environment, env_routes in routes_by_environment.items()
+        },
+        "diffs": {
+            environment: routediff.compare(
+                routes_by_environment[baseline],
+                routes_by_environment[environment],
+                key=key,
+                ignore=ignore or (),
+            )
+            for environment in others
+        },
+    }
+
+
+async def run_route_calls(calls, ctx=None):
+    """
+    Run (func, route_id, body) route writes concurrently and return the errors
+    by route ID.
+    """
+    semaphore = asyncio.Semaphore(ROUTE_APPLY_CONCURRENCY)
+    errors = {}
+    completed = 0
+
+    async def run(func, rid, body):
+        nonlocal completed
+        async with semaphore:
+            try:
+                if body is None:
+                    await run_blocking(func, rid)
+                else:
+                    await run_blocking(func, rid, body=body)
+            except Exception as e:
+                logger.warning(f"route {rid} failed: {e}")
+                errors[rid] = str(e)
+            finally:
+                completed += 1
+                if ctx is not None:
+                    await ctx.report_progress(completed, len(calls))
+
+    await asyncio.gather(*(run(*call) for call in calls))
+    return errors
+
+
+def routes_changed(environment, vault_id):
+    """
+    Drop cached and in-flight reads of a vault's routes after a write.
+    """
+    route_cache.invalidate((environment, vault_id))
+    reads.forget(
+        lambda key: key[0] in ("route", "routes")
+        and key[1:3] == (environment, vault_id)
+    )
+
+
+async def load_routes(vault_id, environment, fresh=False):
+    """
+    Return all routes of a vault, served from the route cache while it is fresh.
+
+    A stale catalog is revalidated with its ETag when the API provided one, so
+    an unchanged vault is confirmed with a 304 instead of a full download.
+    `fresh` always asks the API, for callers about to write based on the
+    result.
+    """
+    key = (environment, vault_id)
+    routes = None if fresh else route_cache.get_routes(key)
+    if routes is not None:
+        return routes
+    return await reads.do(
+        ("routes", environment, vault_id),
+        lambda: download_routes(vault_id, environment),
+    )
+
+
+async def download_routes(vault_id, environment):
+    key = (environment, vault_id)
+    generation = route_cache.generation(key)
+    vault_management_api = await run_blocking(
+        create_vault_management_api, vault_id, environment
+    )
+    etag = route_cache.etag(key)
+    headers = {"If-None-Match": etag} if etag else None
+    response = await run_blocking(vault_management_api.routes.list, headers=headers)
+    if response.status_code == 304:
+        if route_cache.revalidate(key, generation):
+            return route_cache.get_routes(key)
+        # a write dropped the catalog the 304 refers to, so download it again
+        generation = route_cache.generation(key)
+        response = await run_blocking(vault_management_api.routes.list, headers=None)
+
+    routes = response.body["data"]
+    route_cache.store(key, routes, response.headers.get("ETag"), generation)
+    return routes
 
 
 @mcp.tool()
-def enable_debug_logs(
+async def enable_debug_logs(
     vault_id: Annotated[
         str,
         Field(
@@ -293,7 +989,8 @@ def enable_debug_logs(
         ),
     ],
 ):
-    token = get_jwt_token(
+    token = await run_blocking(
+        get_jwt_token,
         environments[environment]["keycloak_url"],
         environments[environment]["keycloak_realm"],
     )
@@ -313,13 +1010,15 @@ def enable_debug_logs(
             "type": "log-settings",
         }
     }
-    response = requests.post(url, headers=headers, json=payload)
+    response = await run_blocking(
+        get_session(environment).post, url, headers=headers, json=payload
+    )
     response.raise_for_status()
     return response.json()
 
 
 @mcp.tool()
-def get_access_log_details_by_request_id(
+async def get_access_log_details_by_request_id(
     vault_id: Annotated[
         str,
         Field(
@@ -344,10 +1043,104 @@ def get_access_log_details_by_request_id(
         vault_id (str): The ID of the Vault to get access log for.
         request_id (str): The ID of the request to fetch logs for.
     """
-    token = get_jwt_token(
+    token = await run_blocking(
+        get_jwt_token,
         environments[environment]["keycloak_url"],
         environments[environment]["keycloak_realm"],
     )
+    return await fetch_access_log_details(vault_id, request_id, environment, token)
+
+
+@mcp.tool()
+async def get_access_log_details_by_request_ids(
+    vault_id: Annotated[
+        str,
+        Field(
+            description="ID of the Vault to get access logs for.",
+            pattern="tnt[A-z0-9]+",
+        ),
+    ],
+    request_ids: Annotated[
+        list[str],
+        Field(
+            description="Request IDs to fetch logs for.",
+            min_length=1,
+            max_length=1000,
+        ),
+    ],
+    environment: Annotated[
+        str,
+        Field(
+            description="Environment to get access logs for.",
+            default="sandbox",
+        ),
+    ],
+    ctx: Context | None = None,
+):
+    """
+    Get the access logs for many request IDs at once.
+
+    Duplicate request IDs are fetched once and logs are fetched concurrently
+    with a single token, so debugging a failed batch does not take one round
+    trip per request. Logs returned for more than one request ID are only
+    listed once. Request IDs that could not be fetched are reported under
+    `errors` instead of failing the whole call.
+    """
+    request_ids = list(dict.fromkeys(request_ids))
+    token = await run_blocking(
+        get_jwt_token,
+        environments[environment]["keycloak_url"],
+        environments[environment]["keycloak_realm"],
+    )
+    semaphore = asyncio.Semaphore(LOG_DETAILS_CONCURRENCY)
+    completed = 0
+
+    async def fetch(request_id):
+        nonlocal completed
+        async with semaphore:
+            try:
+                return await fetch_access_log_details(
+                    vault_id, request_id, environment, token
+                )
+            finally:
+                completed += 1
+                if ctx is not None:
+                    await ctx.report_progress(completed, len(request_ids))
+
+    results = await asyncio.gather(
+        *(fetch(request_id) for request_id in request_ids), return_exceptions=True
+    )
+
+    data, errors, seen = [], {}, set()
+    for request_id, result in zip(request_ids, results):
+        if isinstance(result, BaseException) and not isinstance(result, Exception):
+            # cancellation and interrupts are not per-request failures
+            raise result
+        if isinstance(result, requests.HTTPError):
+            errors[request_id] = {
+                "status": result.response.status_code,
+                "detail": result.response.text,
+            }
+            continue
+        if isinstance(result, Exception):
+            errors[request_id] = {"detail": str(result)}
+            continue
+        for log in result.get("data") or []:
+            key = log.get("id") or json.dumps(log, sort_keys=True)
+            if key not in seen:
+                seen.add(key)
+                data.append(log)
+    return {"data": data, "errors": errors}
+
+
+async def fetch_access_log_details(vault_id, request_id, environment, token):
+    return await reads.do(
+        ("log", environment, vault_id, request_id),
+        lambda: download_access_log_details(vault_id, request_id, environment, token),
+    )
+
+
+async def download_access_log_details(vault_id, request_id, environment, token):
     url = f"{environments[environment]['logs_url']}/logs?filter[logs][requestId]={request_id}"
     headers = {
         "accept": "application/vnd.api+json",
@@ -355,11 +1148,12 @@ def get_access_log_details_by_request_id(
         "authorization": f"Bearer {token}",
         "vgs-tenant": vault_id,
     }
-    response = requests.get(url, headers=headers)
+    response = await run_blocking(get_session(environment).get, url, headers=headers)
     response.raise_for_status()
     return response.json()
 
 
 if __name__ == "__main__":
     # Initialize and run the server
+    metrics.serve()
     mcp.run(transport="stdio")
@@ -0,0 +1,164 @@
+import logging
+import os
+import time
+
+from fastmcp.server.middleware import Middleware
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Port of the optional Prometheus endpoint, 0 keeps it off.
+METRICS_PORT = int(os.getenv("VGS_METRICS_PORT", "0"))
+METRICS_ADDR = os.getenv("VGS_METRICS_ADDR", "127.0.0.1")
+
+TOOL_CALLS = Counter(
+    "vaultmcp_tool_calls_total", "MCP tool calls by outcome.", ["tool", "status"]
+)
+TOOL_DURATION = Histogram(
+    "vaultmcp_tool_duration_seconds", "Time spent in MCP tool calls.", ["tool"]
+)
+TOOLS_IN_FLIGHT = Gauge(
+    "vaultmcp_tools_in_flight", "MCP tool calls currently running.", ["tool"]
+)
+UPSTREAM_REQUESTS = Counter(
+    "vaultmcp_upstream_requests_total",
+    "Requests to the vault APIs and Keycloak by endpoint family and status.",
+    ["family", "status"],
+)
+UPSTREAM_DURATION = Histogram(
+    "vaultmcp_upstream_request_duration_seconds",
+    "Time spent waiting for the vault APIs and Keycloak.",
+    ["family"],
+)
+UPSTREAM_IN_FLIGHT = Gauge(
+    "vaultmcp_upstream_requests_in_flight",
+    "Requests to the vault APIs and Keycloak waiting for a response.",
+    ["family"],
+)
+TOKEN_FETCHES = Counter(
+    "vaultmcp_token_fetches_total", "Tokens requested from Keycloak.", ["status"]
+)
+TOKEN_FETCH_DURATION = Histogram(
+    "vaultmcp_token_fetch_duration_seconds",
+    "Time spent requesting tokens from Keycloak.",
+)
+
+
+def status_of(error: Exception | None) -> str:
+    """
+    Label value for how a call ended: ok, the HTTP status of the upstream
+    error, or the error's class name. FastMCP wraps tool errors in ToolError,
+    so the error that caused it is looked at first.
+    """
+    if error is None:
+        return "ok"
+    cause = error.__cause__ or error
+    # requests and simple_rest_client errors carry the response they failed on
+    status_code = getattr(getattr(cause, "response", None), "status_code", None)
+    if status_code is not None:
+        return str(status_code)
+    return cause.__class__.__name__
+
+
+class ToolMetricsMiddleware(Middleware):
+    """
+    Counts, times and tracks in-flight MCP tool calls.
+    """
+
+    async def on_call_tool(self, context, call_next):
+        tool = context.message.name
+        error = None
+        started = time.perf_counter()
+        TOOLS_IN_FLIGHT.labels(tool).inc()
+        try:
+            return await call_next(context)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            TOOLS_IN_FLIGHT.labels(tool).dec()
+            TOOL_DURATION.labels(tool).observe(time.perf_counter() - started)
+            TOOL_CALLS.labels(tool, status_of(error)).inc()
+
+
+class UpstreamCall:
+    """
+    Counts, times and tracks one in-flight upstream request.
+
+    Set `status` to the response status code; calls that raise are counted
+    under the error's class name.
+    """
+
+    def __init__(self, family: str):
+        self.family = family
+        self.status = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        UPSTREAM_IN_FLIGHT.labels(self.family).inc()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        UPSTREAM_IN_FLIGHT.labels(self.family).dec()
+        UPSTREAM_DURATION.labels(self.family).observe(
+            time.perf_counter() - self.started
+        )
+        status = exc_type.__name__ if exc_type else str(self.status)
+        UPSTREAM_REQUESTS.labels(self.family, status).inc()
+
+
+class CacheCollector:
+    """
+    Exposes the hit and miss counters of the in-process caches.
+    """
+
+    def __init__(self):
+        self.caches = {}
+
+    def collect(self):
+        hits = CounterMetricFamily(
+            "vaultmcp_cache_hits",
+            "Cache lookups answered from the cache.",
+            labels=["cache"],
+        )
+        misses = CounterMetricFamily(
+            "vaultmcp_cache_misses",
+            "Cache lookups that went upstream.",
+            labels=["cache"],
+        )
+        ratio = GaugeMetricFamily(
+            "vaultmcp_cache_hit_ratio",
+            "Share of cache lookups answered from the cache.",
+            labels=["cache"],
+        )
+        for name, cache in self.caches.items():
+            stats = cache.stats()
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            ratio.add_metric([name], stats["hit_ratio"])
+        yield hits
+        yield misses
+        yield ratio
+
+
+cache_collector = CacheCollector()
+REGISTRY.register(cache_collector)
+
+
+def register_cache(name: str, cache):
+    """
+    Export a cache with a `stats()` method returning hits, misses and hit_ratio.
+    """
+    cache_collector.caches[name] = cache
+
+
+def serve():
+    """
+    Start the metrics endpoint on a background thread if a port is configured.
+    """
+    if not METRICS_PORT:
+        return
+    start_http_server(METRICS_PORT, addr=METRICS_ADDR)
+    logger.info(f"serving metrics on http://{METRICS_ADDR}:{METRICS_PORT}/metrics")
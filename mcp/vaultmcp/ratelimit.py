@@ -0,0 +1,161 @@
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# Requests per second allowed per (environment, endpoint family) before the
+# server says otherwise, 0 disables client-side limiting.
+RATE_LIMIT = float(os.getenv("VGS_RATE_LIMIT", "20"))
+RATE_BURST = int(os.getenv("VGS_RATE_BURST", "10"))
+# Share of the quota advertised by rate limit headers that we aim for.
+RATE_HEADROOM = 0.9
+# Longest a call waits for its turn. Waits happen on the shared blocking
+# workers, so longer ones fail fast instead of parking a worker.
+RATE_MAX_WAIT = float(os.getenv("VGS_RATE_MAX_WAIT", "5"))
+
+
+def _number(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def retry_after(value):
+    """
+    Seconds to wait according to a Retry-After header, given either as a
+    number of seconds or as an HTTP date.
+    """
+    seconds = _number(value)
+    if seconds is not None or not isinstance(value, str):
+        return seconds
+    try:
+        return parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimitedError(Exception):
+    """
+    Raised instead of waiting longer than allowed for a rate limited endpoint.
+    """
+
+    def __init__(self, retry_in):
+        super().__init__(f"Rate limited by the server, try again in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+class AdaptiveRateLimiter:
+    """
+    Thread-safe token bucket whose rate follows what the server reports.
+
+    Calls to the vault APIs run on worker threads, so `acquire` blocks the
+    calling thread rather than the event loop. Those threads are shared by
+    every tool, so a wait longer than `max_wait` raises RateLimitedError
+    instead.
+
+    A 429 (or a 503 with Retry-After) pauses all callers until Retry-After
+    has passed and halves the rate. RateLimit-Remaining/RateLimit-Reset
+    headers (or their X- variants) set the rate to just under the remaining
+    quota. Other successful responses win back a little of the configured
+    rate each, so throughput settles just below the server's limit instead
+    of repeatedly running into it.
+    """
+
+    def __init__(self, rate=RATE_LIMIT, burst=RATE_BURST, max_wait=RATE_MAX_WAIT):
+        self.max_wait = max_wait
+        self.max_rate = rate
+        self.min_rate = rate / 20
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait=None) -> float:
+        """
+        Take a token and return how many seconds to wait before using it.
+
+        When the wait would exceed `max_wait`, the token is given back.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            self.tokens -= 1
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            delay = max(delay, self.blocked_until - now)
+            if max_wait is not None and delay > max_wait:
+                self.tokens += 1
+            return delay
+
+    def acquire(self):
+        delay = self.reserve(self.max_wait)
+        if delay > self.max_wait:
+            raise RateLimitedError(delay)
+        if delay > 0:
+            time.sleep(delay)
+
+    def observe(self, status_code, headers):
+        """
+        Adapt to the status and rate limit headers of a response.
+        """
+        with self._lock:
+            self._observe(status_code, headers)
+
+    def _observe(self, status_code, headers):
+        now = time.monotonic()
+        wait = retry_after(headers.get("Retry-After"))
+        if status_code == 429 or (status_code == 503 and wait is not None):
+            wait = wait if wait is not None else 1 / self.rate
+            self.blocked_until = max(self.blocked_until, now + wait)
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+            return
+
+        remaining = _number(
+            headers.get("RateLimit-Remaining") or headers.get("X-RateLimit-Remaining")
+        )
+        reset = _number(
+            headers.get("RateLimit-Reset") or headers.get("X-RateLimit-Reset")
+        )
+        if remaining is not None and reset is not None:
+            if reset > 1e9:
+                # some servers send the reset time as a unix timestamp
+                reset -= time.time()
+            reset = max(reset, 1.0)
+            if remaining < 1:
+                self.blocked_until = max(self.blocked_until, now + reset)
+            self.rate = min(
+                self.max_rate, max(self.min_rate, remaining / reset * RATE_HEADROOM)
+            )
+        else:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(environment: str, family: str) -> AdaptiveRateLimiter | None:
+    """
+    Return the limiter shared by all calls to one endpoint family of an
+    environment, or None when limiting is disabled.
+    """
+    if RATE_LIMIT <= 0:
+        return None
+    with _limiters_lock:
+        key = (environment, family)
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = _limiters[key] = AdaptiveRateLimiter(
+                RATE_LIMIT, RATE_BURST, RATE_MAX_WAIT
+            )
+        return limiter
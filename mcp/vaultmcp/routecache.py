@@ -0,0 +1,112 @@
+import os
+import time
+
+# Seconds a fetched route catalog is served without asking the API again, 0
+# disables caching. Stale catalogs are revalidated with their ETag if the API
+# sent one, so an unchanged vault costs a 304 instead of the full payload.
+ROUTE_CACHE_TTL = float(os.getenv("VGS_ROUTE_CACHE_TTL", "30"))
+
+
+class RouteCache:
+    """
+    Per-vault route catalogs keyed by (environment, vault_id).
+
+    Lookups of routes and single routes count as hits or misses. Readers
+    take the vault's `generation` before downloading its routes and pass it
+    to `store`, which drops the catalog if the vault was invalidated
+    meanwhile, so a read that raced a write never caches the old routes.
+    """
+
+    def __init__(self, ttl=ROUTE_CACHE_TTL):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._catalogs = {}
+        self._generations = {}
+        self._epoch = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def _fresh(self, key):
+        catalog = self._catalogs.get(key)
+        if catalog and time.monotonic() < catalog["fetched_at"] + self.ttl:
+            return catalog
+        return None
+
+    def _count(self, value):
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def get_routes(self, key):
+        """
+        Return the cached routes of a vault, or None if they are missing or stale.
+        """
+        catalog = self._fresh(key)
+        return self._count(list(catalog["routes"].values()) if catalog else None)
+
+    def get_route(self, key, route_id):
+        """
+        Return a cached route, or None if the catalog is stale or lacks it.
+        """
+        catalog = self._fresh(key)
+        return self._count(catalog["routes"].get(route_id) if catalog else None)
+
+    def etag(self, key):
+        catalog = self._catalogs.get(key)
+        return catalog["etag"] if catalog else None
+
+    def generation(self, key):
+        return self._epoch, self._generations.get(key, 0)
+
+    def store(self, key, routes, etag=None, generation=None):
+        if not self.enabled:
+            return
+        if generation is not None and generation != self.generation(key):
+            return
+        self._catalogs[key] = {
+            "routes": {route["id"]: route for route in routes},
+            "etag": etag,
+            "fetched_at": time.monotonic(),
+        }
+
+    def revalidate(self, key, generation=None):
+        """
+        Mark a stale catalog fresh again after the API confirmed it is unchanged.
+
+        Returns False when there is no catalog to refresh, or it was
+        invalidated after `generation` was taken.
+        """
+        catalog = self._catalogs.get(key)
+        if not catalog or (
+            generation is not None and generation != self.generation(key)
+        ):
+            return False
+        catalog["fetched_at"] = time.monotonic()
+        return True
+
+    def invalidate(self, key):
+        self._catalogs.pop(key, None)
+        self._generations[key] = self._generations.get(key, 0) + 1
+
+    def clear(self):
+        self._catalogs.clear()
+        self._generations.clear()
+        self._epoch += 1
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._catalogs),
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,161 @@
+import yaml
+
+# Set by the API on every write, so they never count as a difference.
+SERVER_FIELDS = ("created_at", "updated_at")
+
+
+def load_definitions(definitions):
+    """
+    Turn route definitions into a list of routes.
+
+    Accepts a YAML or JSON string (several YAML documents may be separated by
+    ---), a dict shaped like the exported route files ({"data": [...]}), a
+    single route, or a list of any of those.
+    """
+    if isinstance(definitions, str):
+        definitions = [
+            document
+            for document in yaml.safe_load_all(definitions)
+            if document is not None
+        ]
+    if isinstance(definitions, dict):
+        definitions = [definitions]
+    routes = []
+    for definition in definitions:
+        if isinstance(definition, list):
+            routes.extend(load_definitions(definition))
+        elif "data" in definition:
+            data = definition["data"]
+            routes.extend(data if isinstance(data, list) else [data])
+        else:
+            routes.append(definition)
+    return routes
+
+
+def route_id(route):
+    return route.get("id") or route.get("attributes", {}).get("id")
+
+
+def canonical(route):
+    """
+    The part of a route that is compared: its attributes without the route ID,
+    server timestamps or filter IDs, which the API assigns.
+    """
+    attributes = {
+        key: value
+        for key, value in route.get("attributes", {}).items()
+        if key not in SERVER_FIELDS and key != "id"
+    }
+    attributes["entries"] = [
+        {key: value for key, value in entry.items() if key != "id"}
+        for entry in attributes.get("entries") or []
+    ]
+    return attributes
+
+
+def changes(current, desired, path=""):
+    """
+    Dotted paths at which two JSON values differ; list items are addressed by
+    index.
+    """
+    if isinstance(current, dict) and isinstance(desired, dict):
+        return [
+            change
+            for key in sorted(current.keys() | desired.keys())
+            for change in changes(
+                current.get(key), desired.get(key), f"{path}.{key}" if path else key
+            )
+        ]
+    if (
+        isinstance(current, list)
+        and isinstance(desired, list)
+        and len(current) == len(desired)
+    ):
+        return [
+            change
+            for i, (a, b) in enumerate(zip(current, desired))
+            for change in changes(a, b, f"{path}[{i}]")
+        ]
+    return [] if current == desired else [path]
+
+
+def plan(desired, current, prune=False):
+    """
+    Work out the calls needed to turn `current` routes into `desired` ones.
+
+    Routes are matched by ID. Routes only present in `current` are deleted
+    when `prune` is set and left alone otherwise.
+    """
+    desired_by_id = {}
+    for route in desired:
+        rid = route_id(route)
+        if not rid:
+            raise ValueError("Every route definition needs an id.")
+        if rid in desired_by_id:
+            raise ValueError(f"Route {rid} is defined more than once.")
+        desired_by_id[rid] = route
+    current_by_id = {route_id(route): route for route in current}
+
+    result = {"create": [], "update": [], "delete": [], "unchanged": []}
+    for rid, route in desired_by_id.items():
+        if rid not in current_by_id:
+            result["create"].append(route)
+            continue
+        diff = changes(canonical(current_by_id[rid]), canonical(route))
+        if diff:
+            result["update"].append(
+                {"route": route, "previous": current_by_id[rid], "changes": diff}
+            )
+        else:
+            result["unchanged"].append(rid)
+    if prune:
+        result["delete"] = [
+            route for rid, route in current_by_id.items() if rid not in desired_by_id
+        ]
+    return result
+
+
+def route_name(route):
+    return (route.get("attributes", {}).get("tags") or {}).get("name")
+
+
+def compare(baseline, other, key=route_id, ignore=()):
+    """
+    Structural difference between two route sets matched by `key`, e.g. the
+    same vault's routes in two environments. Changed paths starting with one
+    of `ignore` are left out.
+    """
+    baseline_by_key = {key(route): route for route in baseline}
+    other_by_key = {key(route): route for route in other}
+    changed = []
+    unchanged = 0
+    for k in baseline_by_key.keys() & other_by_key.keys():
+        diff = [
+            path
+            for path in changes(
+                canonical(baseline_by_key[k]), canonical(other_by_key[k])
+            )
+            if not any(path.startswith(prefix) for prefix in ignore)
+        ]
+        if diff:
+            changed.append({"key": k, "changes": diff})
+        else:
+            unchanged += 1
+    return {
+        "missing": sorted(baseline_by_key.keys() - other_by_key.keys(), key=str),
+        "extra": sorted(other_by_key.keys() - baseline_by_key.keys(), key=str),
+        "changed": sorted(changed, key=lambda change: str(change["key"])),
+        "unchanged": unchanged,
+    }
+
+
+def summarize(route_plan):
+    return {
+        "create": [route_id(route) for route in route_plan["create"]],
+        "update": [
+            {"id": route_id(update["route"]), "changes": update["changes"]}
+            for update in route_plan["update"]
+        ],
+        "delete": [route_id(route) for route in route_plan["delete"]],
+        "unchanged": len(route_plan["unchanged"]),
+    }
@@ -0,0 +1,61 @@
+# Routes are returned by the API as {"id", "type", "attributes": {...}}. Field
+# paths are dotted (tags.name) and are looked up under attributes unless they
+# start with one of the top level keys.
+TOP_LEVEL_FIELDS = ("id", "type", "attributes")
+
+
+def direction(route):
+    """
+    Outbound (forward proxy) routes accept any destination, inbound (reverse
+    proxy) routes override it with a fixed upstream.
+    """
+    destination = route.get("attributes", {}).get("destination_override_endpoint")
+    return "outbound" if destination in (None, "*") else "inbound"
+
+
+def resolve(route, path):
+    value = (
+        route
+        if path.split(".", 1)[0] in TOP_LEVEL_FIELDS
+        else route.get("attributes", {})
+    )
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def matches(route, tag=None, protocol=None, host_endpoint=None, route_direction=None):
+    if tag is not None and resolve(route, "tags.name") != tag:
+        return False
+    if protocol is not None and (resolve(route, "protocol") or "").lower() != (
+        protocol.lower()
+    ):
+        return False
+    if (
+        host_endpoint is not None
+        and host_endpoint.lower() not in (resolve(route, "host_endpoint") or "").lower()
+    ):
+        return False
+    if route_direction is not None and direction(route) != route_direction:
+        return False
+    return True
+
+
+def project(route, fields):
+    return {field: resolve(route, field) for field in fields}
+
+
+def paginate(items, page, page_size):
+    total = len(items)
+    start = (page - 1) * page_size
+    return {
+        "data": items[start : start + page_size],
+        "meta": {
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "pages": (total + page_size - 1) // page_size,
+        },
+    }
@@ -0,0 +1,156 @@
+import hashlib
+import json
+
+from jsonschema import Draft202012Validator
+
+import routediff
+
+ROUTE_SCHEMA = {
+    "$defs": {
+        "expression": {
+            "type": "object",
+            "properties": {
+                "field": {"type": "string", "minLength": 1},
+                "operator": {"type": "string", "minLength": 1},
+                "type": {"type": "string"},
+                "values": {"type": "array", "items": {"type": "string"}},
+            },
+            "required": ["field", "operator", "values"],
+        },
+        "rules": {
+            "type": "object",
+            "properties": {
+                "condition": {"enum": ["AND", "OR"]},
+                "rules": {
+                    "type": "array",
+                    "minItems": 1,
+                    "items": {
+                        "oneOf": [
+                            {
+                                "type": "object",
+                                "properties": {
+                                    "expression": {"$ref": "#/$defs/expression"}
+                                },
+                                "required": ["expression"],
+                            },
+                            {"$ref": "#/$defs/rules"},
+                        ]
+                    },
+                },
+            },
+            "required": ["condition", "rules"],
+        },
+        "entry": {
+            "type": "object",
+            "properties": {
+                "phase": {"enum": ["REQUEST", "RESPONSE"]},
+                "operation": {"type": "string", "minLength": 1},
+                "config": {"$ref": "#/$defs/rules"},
+                "targets": {"type": "array", "items": {"type": "string"}},
+                "transformer": {"type": ["string", "null"]},
+                "transformer_config": {
+                    "type": ["array", "null"],
+                    "items": {"type": "string", "minLength": 1},
+                },
+                "operations": {"type": ["array", "null"]},
+                "classifiers": {"type": ["object", "null"]},
+            },
+            "required": ["phase", "operation", "config"],
+        },
+    },
+    "type": "object",
+    "properties": {
+        "data": {
+            "type": "object",
+            "properties": {
+                "id": {"type": "string"},
+                "attributes": {
+                    "type": "object",
+                    "properties": {
+                        "host_endpoint": {"type": "string"},
+                        "port": {"type": ["integer", "null"]},
+                        "entries": {
+                            "type": "array",
+                            "items": {"$ref": "#/$defs/entry"},
+                        },
+                    },
+                    "required": ["entries"],
+                },
+            },
+            "required": ["attributes"],
+        }
+    },
+    "required": ["data"],
+}
+
+# Compiled once at import, so validating a payload is only a tree walk.
+Draft202012Validator.check_schema(ROUTE_SCHEMA)
+VALIDATOR = Draft202012Validator(ROUTE_SCHEMA)
+
+
+def normalize(payload, route_id):
+    """
+    Turn a route payload given as JSON text, a bare route or {"data": route}
+    into {"data": route} with the route ID filled in.
+    """
+    if isinstance(payload, str):
+        try:
+            payload = json.loads(payload)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Route payload is not valid JSON: {e}") from e
+    if not isinstance(payload, dict):
+        raise ValueError("Route payload must be a JSON object.")
+    if "data" not in payload:
+        payload = {"data": payload}
+    route = payload["data"]
+    if isinstance(route, dict):
+        if route.get("id", route_id) != route_id:
+            raise ValueError(
+                f"Route payload is for route {route['id']}, not {route_id}."
+            )
+        payload = {**payload, "data": {**route, "id": route_id}}
+    return payload
+
+
+def validate(payload):
+    """
+    Raise ValueError listing every problem with a normalized route payload.
+    """
+    problems = [
+        f"{error.json_path}: {error.message}"
+        for error in sorted(VALIDATOR.iter_errors(payload), key=lambda e: e.json_path)
+    ]
+    if not problems:
+        problems = duplicate_transformers(payload["data"])
+    if problems:
+        raise ValueError("Invalid route payload:\n" + "\n".join(problems))
+
+
+def duplicate_transformers(route):
+    """
+    Filters that match the same requests and transform the same field twice.
+    """
+    seen = set()
+    problems = []
+    for i, entry in enumerate(route["attributes"]["entries"]):
+        scope = (
+            entry["phase"],
+            entry.get("transformer"),
+            json.dumps(entry["config"], sort_keys=True),
+        )
+        for path in entry.get("transformer_config") or []:
+            if (scope, path) in seen:
+                problems.append(
+                    f"$.data.attributes.entries[{i}]: {path} is transformed more than once for the same requests"
+                )
+            seen.add((scope, path))
+    return problems
+
+
+def fingerprint(route):
+    """
+    Hash of the parts of a route the API does not assign, so a route read
+    back from the API and the payload that produced it hash the same.
+    """
+    canonical = json.dumps(routediff.canonical(route), sort_keys=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()
@@ -0,0 +1,117 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import accesslogs
+
+
+class FakeAuditsApi:
+    def __init__(self, records):
+        self.records = records
+        self.requested_pages = []
+        self.access_logs = SimpleNamespace(list=self.list)
+
+    def list(self, params):
+        page, size = params["page[number]"], params["page[size]"]
+        self.requested_pages.append(page)
+        records = self.records
+        since = params.get("filter[from]")
+        if since:
+            records = [r for r in records if r["attributes"]["occurred_at"] >= since]
+        data = records[(page - 1) * size : page * size]
+        has_next = page * size < len(records)
+        return SimpleNamespace(
+            body={
+                "data": data,
+                "links": {"next": "next" if has_next else None},
+                "meta": {"count": len(records)},
+            }
+        )
+
+
+def read(api, page, offset, max_records):
+    return asyncio.run(
+        accesslogs.read_chunk(api, {}, page, offset, max_records, page_size=10)
+    )
+
+
+def test_cursor_round_trip():
+    state = {"since": "2025-01-01T00:00:00Z", "page": 3, "offset": 7}
+    assert accesslogs.decode_cursor(accesslogs.encode_cursor(state)) == state
+
+
+def test_invalid_cursor():
+    with pytest.raises(ValueError):
+        accesslogs.decode_cursor("not-a-cursor")
+    with pytest.raises(ValueError):
+        accesslogs.decode_cursor(accesslogs.encode_cursor({"page": 1}))
+
+
+def test_chunks_resume_without_gaps_or_repeats():
+    api = FakeAuditsApi([{"id": i} for i in range(35)])
+    seen = []
+    page, offset, has_more = 1, 0, True
+    while has_more:
+        records, (page, offset), has_more = read(api, page, offset, 15)
+        assert len(records) <= 15
+        seen.extend(record["id"] for record in records)
+    assert seen == list(range(35))
+
+
+def test_pages_are_fetched_lazily():
+    api = FakeAuditsApi([{"id": i} for i in range(100)])
+    records, position, has_more = read(api, 1, 0, 15)
+    assert [r["id"] for r in records] == list(range(15))
+    assert position == (2, 5)
+    assert has_more
+    assert api.requested_pages == [1, 2]
+
+
+def test_resume_picks_up_new_records():
+    api = FakeAuditsApi([{"id": i} for i in range(10)])
+    records, position, has_more = read(api, 1, 0, 50)
+    assert len(records) == 10 and not has_more
+    api.records.extend({"id": i} for i in range(10, 13))
+    records, position, has_more = read(api, *position, 50)
+    assert [r["id"] for r in records] == [10, 11, 12]
+    assert position == (2, 3)
+
+
+def test_follow_yields_only_new_records_and_backs_off():
+    def log(second, request_id):
+        return {
+            "id": f"log-{request_id}",
+            "attributes": {
+                "occurred_at": f"2025-05-14T22:00:{second:02d}",
+                "request_id": request_id,
+            },
+        }
+
+    # records at the watermark come back on every poll and must be dropped
+    api = FakeAuditsApi([log(0, "old"), log(5, "a")])
+
+    async def run():
+        polls = []
+        follower = accesslogs.follow(
+            api,
+            "tnttest",
+            "2025-05-14T22:00:01",
+            min_interval=0.001,
+            max_interval=0.004,
+        )
+        async for fresh, interval in follower:
+            polls.append(([r["id"] for r in fresh], interval))
+            if len(polls) == 2:
+                api.records.extend([log(5, "b"), log(6, "c")])
+            if len(polls) == 5:
+                await follower.aclose()
+                return polls
+
+    assert asyncio.run(run()) == [
+        (["log-a"], 0.001),
+        ([], 0.002),
+        (["log-b", "log-c"], 0.001),
+        ([], 0.002),
+        ([], 0.004),
+    ]
@@ -0,0 +1,61 @@
+import pytest
+
+import circuitbreaker
+from circuitbreaker import CircuitBreaker, CircuitOpenError
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuitbreaker.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("logs", failure_threshold=3, reset_timeout=10)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.before_call()
+
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert error.value.retry_in == 10
+
+
+def test_half_open_lets_one_probe_through(clock):
+    breaker = CircuitBreaker("logs", failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock[0] += 10
+
+    breaker.before_call()
+    assert breaker.state == circuitbreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == circuitbreaker.CLOSED
+    breaker.before_call()
+
+
+def test_failed_probe_opens_again(clock):
+    breaker = CircuitBreaker("logs", failure_threshold=5, reset_timeout=10)
+    for _ in range(5):
+        breaker.record_failure()
+    clock[0] += 10
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == circuitbreaker.OPEN
+    clock[0] += 5
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_breakers_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(circuitbreaker, "_breakers", {})
+    assert circuitbreaker.get_breaker("a") is circuitbreaker.get_breaker("a")
+    monkeypatch.setattr(circuitbreaker, "FAILURE_THRESHOLD", 0)
+    assert circuitbreaker.get_breaker("a") is None
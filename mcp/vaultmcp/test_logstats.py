@@ -0,0 +1,41 @@
+import logstats
+from test_logstore import log
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert logstats.percentile(values, 50) == 50
+    assert logstats.percentile(values, 99) == 99
+    assert logstats.percentile([7], 90) == 7
+    assert logstats.percentile([], 50) is None
+
+
+def test_summary():
+    stats = logstats.LogStats()
+    records = [log(i, path="/post") for i in range(6)]
+    records += [log(6, status=404, path="/get"), log(7, status=502, route="route-2")]
+    for i, record in enumerate(records):
+        record["attributes"]["latency"] = (i + 1) * 10
+    stats.add_records(records)
+
+    summary = stats.summary(top_n=1)
+    assert summary["total"] == 8
+    assert summary["first_seen"] == "2025-05-14T22:00:00"
+    assert summary["last_seen"] == "2025-05-14T22:00:07"
+    assert summary["client_errors"] == 1
+    assert summary["server_errors"] == 1
+    assert summary["error_rate"] == 0.25
+    assert summary["status_codes"] == {"200": 6, "404": 1, "502": 1}
+    assert summary["latency_ms"]["p50"] == 40
+    assert summary["latency_ms"]["max"] == 80
+    assert summary["top_paths"] == [{"path": "/post", "count": 7, "error_rate": 1 / 7}]
+    assert summary["top_routes"] == [
+        {"route_id": "route-1", "count": 7, "error_rate": 1 / 7}
+    ]
+
+
+def test_empty_summary():
+    summary = logstats.LogStats().summary()
+    assert summary["total"] == 0
+    assert summary["error_rate"] == 0.0
+    assert summary["latency_ms"]["p99"] is None
@@ -0,0 +1,164 @@
+import asyncio
+
+import pytest
+
+import logstore
+from test_accesslogs import FakeAuditsApi
+
+
+def log(i, status=200, route="route-1", path="/post"):
+    return {
+        "id": f"log-{i}",
+        "type": "access_logs",
+        "attributes": {
+            "occurred_at": f"2025-05-14T22:{i // 60:02d}:{i % 60:02d}",
+            "status_code": status,
+            "route_id": route,
+            "path": path,
+            "method": "POST",
+        },
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    return logstore.AccessLogStore(str(tmp_path / "sandbox-tnttest.sqlite"))
+
+
+def test_insert_is_idempotent(store):
+    assert store.insert([log(1), log(2)]) == 2
+    assert store.insert([log(2), log(3)]) == 1
+    assert store.count() == 3
+    assert store.watermark() == "2025-05-14T22:00:03"
+
+
+def test_query_filters(store):
+    store.insert(
+        [
+            log(1),
+            log(2, status=500),
+            log(3, status=500, route="route-2"),
+            log(4, path="/post/cards"),
+            log(5, path="/get"),
+        ]
+    )
+
+    def ids(**filters):
+        return [record["id"] for record in store.query(**filters)]
+
+    assert ids(status_code=500) == ["log-3", "log-2"]
+    assert ids(status_code=500, route_id="route-2") == ["log-3"]
+    assert ids(path="/post") == ["log-3", "log-2", "log-1"]
+    assert ids(path="/post*") == ["log-4", "log-3", "log-2", "log-1"]
+    assert ids(since="2025-05-14T22:00:02", until="2025-05-14T22:00:04") == [
+        "log-3",
+        "log-2",
+    ]
+    assert ids(limit=2, newest_first=False) == ["log-1", "log-2"]
+
+
+def test_path_prefix_escapes_wildcards(store):
+    store.insert([log(1, path="/a_b"), log(2, path="/axb")])
+    assert [r["id"] for r in store.query(path="/a_*")] == ["log-1"]
+
+
+def test_sync_only_requests_logs_after_watermark(store, monkeypatch):
+    requested = []
+    monkeypatch.setattr(
+        logstore.accesslogs,
+        "prepare_filters",
+        lambda vault_id, since: requested.append(since) or {},
+    )
+    api = FakeAuditsApi([log(i) for i in range(5)])
+
+    assert asyncio.run(logstore.sync(store, api, "tnttest")) == (5, True)
+    api.records.append(log(5))
+    assert asyncio.run(logstore.sync(store, api, "tnttest")) == (1, True)
+
+    assert requested == [None, "2025-05-14T22:00:04"]
+    assert store.count() == 6
+    assert store.coverage() == [("", "2025-05-14T22:00:05")]
+
+
+def test_sync_limit_keeps_the_newest_logs(store):
+    api = FakeAuditsApi([log(i) for i in range(350)])
+
+    added, complete = asyncio.run(logstore.sync(store, api, "tnttest", limit=150))
+
+    assert (added, complete) == (150, False)
+    assert store.watermark() == "2025-05-14T22:05:49"
+    assert store.coverage() == [("2025-05-14T22:03:20", "2025-05-14T22:05:49")]
+    assert api.requested_pages == [1, 4, 3, 2]
+
+
+def test_sync_backfills_below_the_covered_range(store):
+    api = FakeAuditsApi([log(i) for i in range(350)])
+    asyncio.run(logstore.sync(store, api, "tnttest", limit=150, backfill=False))
+
+    # the newest log is read again to check nothing new arrived
+    assert asyncio.run(logstore.sync(store, api, "tnttest", limit=150)) == (
+        149,
+        False,
+    )
+    assert store.coverage() == [
+        ("", "2025-05-14T22:02:28"),
+        ("2025-05-14T22:03:20", "2025-05-14T22:05:49"),
+    ]
+    assert asyncio.run(logstore.sync(store, api, "tnttest", limit=150)) == (
+        51,
+        True,
+    )
+    assert store.coverage() == [("", "2025-05-14T22:05:49")]
+    assert store.count() == 350
+
+
+def test_sync_backfills_an_earlier_since(store):
+    api = FakeAuditsApi([log(i) for i in range(100)])
+    asyncio.run(logstore.sync(store, api, "tnttest", since="2025-05-14T22:01:00"))
+    assert store.count() == 40
+
+    added, complete = asyncio.run(
+        logstore.sync(store, api, "tnttest", since="2025-05-14T22:00:30Z")
+    )
+
+    assert (added, complete) == (30, True)
+    assert store.coverage() == [("2025-05-14T22:00:30", "2025-05-14T22:01:39")]
+
+
+def test_sync_accepts_unix_timestamps(store):
+    api = FakeAuditsApi([log(i) for i in range(100)])
+    since = 1747260090  # 2025-05-14T22:01:30Z
+    assert asyncio.run(logstore.sync(store, api, "tnttest", since=since)) == (
+        10,
+        True,
+    )
+
+
+def test_latest_returns_the_real_tail(store):
+    api = FakeAuditsApi([log(i) for i in range(350)])
+
+    records = asyncio.run(logstore.latest(store, api, "tnttest", None, 5))
+
+    assert [r["id"] for r in records] == [f"log-{i}" for i in range(345, 350)]
+
+
+def test_latest_on_an_empty_store_reads_about_the_tail(store):
+    api = FakeAuditsApi([log(i) for i in range(5000)])
+
+    records = asyncio.run(logstore.latest(store, api, "tnttest", None, 10))
+
+    assert [r["id"] for r in records] == [f"log-{i}" for i in range(4990, 5000)]
+    assert api.requested_pages == [1, 50]
+    assert store.count() == 10
+
+
+def test_latest_gives_up_when_the_window_is_not_covered(store):
+    api = FakeAuditsApi([log(i) for i in range(350)])
+    asyncio.run(logstore.sync(store, api, "tnttest", limit=150, backfill=False))
+
+    assert asyncio.run(logstore.latest(store, api, "tnttest", None, 200)) is None
+
+
+def test_store_disabled_without_directory(monkeypatch):
+    monkeypatch.setattr(logstore, "STORE_DIR", None)
+    assert logstore.get_store("sandbox", "tnttest") is None
@@ -1,7 +1,9 @@
 import asyncio
 import importlib
 import importlib.util
-from unittest.mock import MagicMock, patch
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -25,6 +27,38 @@ def patch_external_deps(monkeypatch):
     yield
 
 
+ROUTES = [
+    {"id": "route-1", "attributes": {"host_endpoint": "httpbin.org"}},
+    {"id": "route-2", "attributes": {"host_endpoint": "example.com"}},
+]
+
+PAYLOAD = {
+    "data": {
+        "attributes": {
+            "host_endpoint": "httpbin.org",
+            "entries": [
+                {
+                    "phase": "REQUEST",
+                    "operation": "REDACT",
+                    "config": {
+                        "condition": "AND",
+                        "rules": [
+                            {
+                                "expression": {
+                                    "field": "PathInfo",
+                                    "operator": "equals",
+                                    "values": ["/post"],
+                                }
+                            }
+                        ],
+                    },
+                }
+            ],
+        }
+    }
+}
+
+
 def import_main():
     import main
 
@@ -55,9 +89,25 @@ def test_tools_registered():
     assert len(tools) > 0
 
 
+@pytest.mark.parametrize(
+    "environment, url",
+    [
+        ("dev", "https://audits.verygoodsecurity.io"),
+        ("sandbox", "https://audits.apps.verygood.systems"),
+        ("live", "https://audits.apps.verygood.systems"),
+    ],
+)
+def test_create_audits_api_resolves_infra_env(environment, url):
+    main = import_main()
+    api = main.create_audits_api("tnttest", environment)
+    assert api.api_root_url == url
+    assert api.access_logs.session is main.get_session(environment, "audits")
+    assert api.access_logs.session.breaker is not main.get_session(environment).breaker
+
+
 def test_create_audits_api(monkeypatch):
     main = import_main()
-    fake_api = object()
+    fake_api = MagicMock()
     monkeypatch.setattr(main, "get_jwt_token", lambda url, realm: "token")
     monkeypatch.setattr(main, "create_audits_api_int", lambda *a, **kw: fake_api)
     result = main.create_audits_api("vaultid", "sandbox")
@@ -87,16 +137,60 @@ def test_get_access_logs(monkeypatch):
     monkeypatch.setattr(main.access_logs, "fetch_logs", lambda *a, **kw: fake_logs)
     # Patch main.create_audits_api to return a dummy object
     monkeypatch.setattr(main, "create_audits_api", lambda vault_id, env: object())
-    logs = list(main.get_access_logs.fn("tnttest", 10, None, "sandbox"))
+    logs = asyncio.run(main.get_access_logs.fn("tnttest", 10, None, "sandbox"))
     assert logs == fake_logs
 
 
+def test_get_access_logs_tail_from_local_store(monkeypatch, tmp_path):
+    from test_accesslogs import FakeAuditsApi
+    from test_logstore import log
+
+    main = import_main()
+    monkeypatch.setattr(main.logstore, "STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(main.logstore, "_stores", {})
+    monkeypatch.setattr(main.serializers, "wrap_records", lambda records: records)
+    monkeypatch.setattr(main.serializers, "format_logs", lambda records, fmt: records)
+    fake_api = FakeAuditsApi([log(i) for i in range(350)])
+    monkeypatch.setattr(main, "create_audits_api", lambda vault_id, env: fake_api)
+    fetch_logs = MagicMock()
+    monkeypatch.setattr(main.access_logs, "fetch_logs", fetch_logs)
+
+    [logs] = asyncio.run(main.get_access_logs.fn("tnttest", 3, None, "sandbox"))
+    assert [r["id"] for r in logs] == ["log-347", "log-348", "log-349"]
+
+    [logs] = asyncio.run(
+        main.get_access_logs.fn("tnttest", 2, "2025-05-14T22:00:10Z", "sandbox")
+    )
+    assert [r["id"] for r in logs] == ["log-348", "log-349"]
+    fetch_logs.assert_not_called()
+
+
+def test_get_access_logs_falls_back_when_store_is_behind(monkeypatch, tmp_path):
+    main = import_main()
+    monkeypatch.setattr(main.logstore, "STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(main.logstore, "_stores", {})
+    monkeypatch.setattr(main.logstore, "latest", AsyncMock(return_value=None))
+    monkeypatch.setattr(main.serializers, "wrap_records", lambda records: records)
+    monkeypatch.setattr(main.serializers, "format_logs", lambda records, fmt: records)
+    monkeypatch.setattr(main, "create_audits_api", lambda vault_id, env: object())
+    monkeypatch.setattr(
+        main.access_logs, "fetch_logs", lambda *a, **kw: [[{"id": "log-1"}]]
+    )
+
+    logs = asyncio.run(
+        main.get_access_logs.fn("tnttest", 10, "2025-05-14T23:01:30+01:00", "sandbox")
+    )
+    assert logs == [[{"id": "log-1"}]]
+    main.logstore.latest.assert_awaited_once()
+    assert main.logstore.latest.await_args.args[3] == "2025-05-14T22:01:30"
+
+
 def test_create_route(monkeypatch):
     main = import_main()
     fake_api = MagicMock()
     fake_api.routes.update.return_value = "updated!"
     monkeypatch.setattr("vgs.sdk.vaults_api.create_api", lambda *a, **kw: fake_api)
-    result = main.create_route.fn("tnttest", "routeid", {"foo": "bar"}, "sandbox")
+    result = asyncio.run(main.create_route.fn("tnttest", "routeid", PAYLOAD, "sandbox"))
     assert result == "updated!"
 
 
@@ -105,17 +199,18 @@ def test_delete_route(monkeypatch):
     fake_api = MagicMock()
     fake_api.routes.delete.return_value = None
     monkeypatch.setattr("vgs.sdk.vaults_api.create_api", lambda *a, **kw: fake_api)
-    result = main.delete_route.fn("tnttest", "routeid", "sandbox")
+    result = asyncio.run(main.delete_route.fn("tnttest", "routeid", "sandbox"))
     assert result == "Route routeid deleted"
 
 
 def test_get_route(monkeypatch):
     main = import_main()
     fake_api = MagicMock()
-    fake_api.routes.get.return_value = {"route": "data"}
+    fake_api.routes.retrieve.return_value.body = {"data": {"id": "routeid"}}
     monkeypatch.setattr("vgs.sdk.vaults_api.create_api", lambda *a, **kw: fake_api)
-    result = main.get_route.fn("tnttest", "routeid", "sandbox")
-    assert result == {"route": "data"}
+    result = asyncio.run(main.get_route.fn("tnttest", "routeid", "sandbox"))
+    assert result == {"id": "routeid"}
+    fake_api.routes.retrieve.assert_called_once_with("routeid")
 
 
 def test_update_route(monkeypatch):
@@ -123,17 +218,17 @@ def test_update_route(monkeypatch):
     fake_api = MagicMock()
     fake_api.routes.update.return_value = {"updated": True}
     monkeypatch.setattr("vgs.sdk.vaults_api.create_api", lambda *a, **kw: fake_api)
-    result = main.update_route.fn("tnttest", "routeid", {"foo": "bar"}, "sandbox")
+    result = asyncio.run(main.update_route.fn("tnttest", "routeid", PAYLOAD, "sandbox"))
     assert result == {"updated": True}
 
 
 def test_get_routes(monkeypatch):
     main = import_main()
     fake_api = MagicMock()
-    fake_api.routes.list.return_value.body = {"data": [1, 2, 3]}
+    fake_api.routes.list.return_value.body = {"data": ROUTES}
     monkeypatch.setattr("vgs.sdk.vaults_api.create_api", lambda *a, **kw: fake_api)
-    result = main.get_routes.fn("tnttest", "sandbox")
-    assert result == [1, 2, 3]
+    result = asyncio.run(main.get_routes.fn("tnttest", "sandbox"))
+    assert result == ROUTES
 
 
 def test_enable_debug_logs(monkeypatch):
@@ -141,8 +236,10 @@ def test_enable_debug_logs(monkeypatch):
     fake_response = MagicMock()
     fake_response.json.return_value = {"ok": True}
     fake_response.raise_for_status.return_value = None
-    monkeypatch.setattr("requests.post", lambda *a, **kw: fake_response)
-    result = main.enable_debug_logs.fn("tnttest", "sandbox")
+    fake_session = MagicMock()
+    fake_session.post.return_value = fake_response
+    monkeypatch.setattr(main, "get_session", lambda env: fake_session)
+    result = asyncio.run(main.enable_debug_logs.fn("tnttest", "sandbox"))
     assert result == {"ok": True}
 
 
@@ -151,6 +248,556 @@ def test_get_access_log_details_by_request_id(monkeypatch):
     fake_response = MagicMock()
     fake_response.json.return_value = {"log": "details"}
     fake_response.raise_for_status.return_value = None
-    monkeypatch.setattr("requests.get", lambda *a, **kw: fake_response)
-    result = main.get_access_log_details_by_request_id.fn("tnttest", "reqid", "sandbox")
+    fake_session = MagicMock()
+    fake_session.get.return_value = fake_response
+    monkeypatch.setattr(main, "get_session", lambda env: fake_session)
+    result = asyncio.run(
+        main.get_access_log_details_by_request_id.fn("tnttest", "reqid", "sandbox")
+    )
     assert result == {"log": "details"}
+
+
+def test_slow_vault_call_does_not_block_event_loop(monkeypatch):
+    main = import_main()
+    fake_api = MagicMock()
+
+    def slow_list(**kwargs):
+        time.sleep(0.2)
+        return MagicMock(body={"data": ROUTES})
+
+    fake_api.routes.list.side_effect = slow_list
+    monkeypatch.setattr("vgs.sdk.vaults_api.create_api", lambda *a, **kw: fake_api)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        result = await main.get_routes.fn("tnttest", "sandbox")
+        task.cancel()
+        return result, ticks
+
+    result, ticks = asyncio.run(run())
+    assert result == ROUTES
+    assert ticks > 5
+
+
+def test_get_routes_is_cached_until_a_write(monkeypatch):
+    main = import_main()
+    fake_api = MagicMock()
+    fake_api.routes.list.return_value.body = {"data": ROUTES}
+    fake_api.routes.list.return_value.headers = {"ETag": '"v1"'}
+    monkeypatch.setattr("vgs.sdk.vaults_api.create_api", lambda *a, **kw: fake_api)
+
+    async def run():
+        await main.get_routes.fn("tnttest", "sandbox")
+        route = await main.get_route.fn("tnttest", "route-2", "sandbox")
+        await main.update_route.fn("tnttest", "route-2", PAYLOAD, "sandbox")
+        await main.get_routes.fn("tnttest", "sandbox")
+        return route
+
+    assert asyncio.run(run()) == ROUTES[1]
+    assert fake_api.routes.list.call_count == 2
+    fake_api.routes.retrieve.assert_not_called()
+
+
+def test_routes_read_racing_a_write_are_not_cached(monkeypatch):
+    main = import_main()
+    fake_api = MagicMock()
+
+    def list_routes(headers=None):
+        # a write lands while the catalog is being downloaded
+        main.route_cache.invalidate(("sandbox", "tnttest"))
+        return MagicMock(body={"data": ROUTES}, headers={"ETag": '"v1"'})
+
+    fake_api.routes.list.side_effect = list_routes
+    monkeypatch.setattr("vgs.sdk.vaults_api.create_api", lambda *a, **kw: fake_api)
+
+    assert asyncio.run(main.get_routes.fn("tnttest", "sandbox")) == ROUTES
+    assert main.route_cache.get_routes(("sandbox", "tnttest")) is None
+
+
+def test_stale_routes_are_revalidated_with_etag(monkeypatch):
+    main = import_main()
+    main.route_cache.ttl = 30
+    fake_api = MagicMock()
+    fake_api.routes.list.return_value.body = {"data": ROUTES}
+    fake_api.routes.list.return_value.headers = {"ETag": '"v1"'}
+    monkeypatch.setattr("vgs.sdk.vaults_api.create_api", lambda *a, **kw: fake_api)
+
+    with patch("routecache.time.monotonic", return_value=1000.0):
+        asyncio.run(main.get_routes.fn("tnttest", "sandbox"))
+
+    not_modified = MagicMock(status_code=304)
+    fake_api.routes.list.return_value = not_modified
+    with patch("routecache.time.monotonic", return_value=1031.0):
+        result = asyncio.run(main.get_routes.fn("tnttest", "sandbox"))
+
+    assert result == ROUTES
+    assert fake_api.routes.list.call_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+
+
+def test_write_during_revalidation_downloads_routes_again(monkeypatch):
+    main = import_main()
+    main.route_cache.ttl = 30
+    fake_api = MagicMock()
+    fake_api.routes.list.return_value.body = {"data": ROUTES}
+    fake_api.routes.list.return_value.headers = {"ETag": '"v1"'}
+    monkeypatch.setattr("vgs.sdk.vaults_api.create_api", lambda *a, **kw: fake_api)
+
+    with patch("routecache.time.monotonic", return_value=1000.0):
+        asyncio.run(main.get_routes.fn("tnttest", "sandbox"))
+
+    full = fake_api.routes.list.return_value
+
+    def list_routes(headers=None):
+        if headers:
+            main.routes_changed("sandbox", "tnttest")
+            return MagicMock(status_code=304)
+        return full
+
+    fake_api.routes.list.side_effect = list_routes
+    with patch("routecache.time.monotonic", return_value=1031.0):
+        result = asyncio.run(main.get_routes.fn("tnttest", "sandbox"))
+
+    assert result == ROUTES
+    assert fake_api.routes.list.call_args.kwargs["headers"] is None
+
+
+def test_get_routes_filters_projects_and_paginates(monkeypatch):
+    main = import_main()
+    routes = [
+        {
+            "id": f"route-{i}",
+            "attributes": {
+                "protocol": "http",
+                "host_endpoint": "httpbin.org" if i % 2 else "example.com",
+                "destination_override_endpoint": "*",
+                "tags": {"name": f"tag-{i}"},
+                "entries": [{"id": "filter"}],
+            },
+        }
+        for i in range(10)
+    ]
+    fake_api = MagicMock()
+    fake_api.routes.list.return_value.body = {"data": routes}
+    monkeypatch.setattr("vgs.sdk.vaults_api.create_api", lambda *a, **kw: fake_api)
+
+    result = asyncio.run(
+        main.get_routes.fn(
+            "tnttest",
+            "sandbox",
+            host_endpoint="httpbin",
+            direction="outbound",
+            fields=["id", "tags.name"],
+            page=2,
+            page_size=2,
+        )
+    )
+
+    assert result == {
+        "data": [
+            {"id": "route-5", "tags.name": "tag-5"},
+            {"id": "route-7", "tags.name": "tag-7"},
+        ],
+        "meta": {"total": 5, "page": 2, "page_size": 2, "pages": 3},
+    }
+    assert asyncio.run(main.get_routes.fn("tnttest", "sandbox", tag="tag-3")) == [
+        routes[3]
+    ]
+
+
+def test_stream_access_logs_resumes_from_cursor(monkeypatch):
+    from test_accesslogs import FakeAuditsApi
+
+    main = import_main()
+    fake_api = FakeAuditsApi([{"id": i} for i in range(250)])
+    monkeypatch.setattr(main, "create_audits_api", lambda vault_id, env: fake_api)
+    monkeypatch.setattr(
+        main.accesslogs, "prepare_filters", lambda vault_id, since: {"since": since}
+    )
+    ctx = MagicMock()
+    ctx.report_progress = AsyncMock()
+
+    first = asyncio.run(
+        main.stream_access_logs.fn(
+            "tnttest", "sandbox", since="2025-01-01T00:00:00Z", max_records=200, ctx=ctx
+        )
+    )
+    second = asyncio.run(
+        main.stream_access_logs.fn(
+            "tnttest", "sandbox", cursor=first["cursor"], max_records=200
+        )
+    )
+
+    assert [r["id"] for r in first["data"]] == list(range(200))
+    assert first["has_more"]
+    assert [r["id"] for r in second["data"]] == list(range(200, 250))
+    assert not second["has_more"]
+    assert ctx.report_progress.await_count == 2
+
+
+def test_query_access_logs_uses_local_store(monkeypatch, tmp_path):
+    from test_accesslogs import FakeAuditsApi
+    from test_logstore import log
+
+    main = import_main()
+    monkeypatch.setattr(main.logstore, "STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(main.logstore, "_stores", {})
+    monkeypatch.setattr(main.accesslogs, "prepare_filters", lambda *a: {})
+    fake_api = FakeAuditsApi([log(1), log(2, status=502), log(3, status=502)])
+    monkeypatch.setattr(main, "create_audits_api", lambda vault_id, env: fake_api)
+
+    result = asyncio.run(
+        main.query_access_logs.fn("tnttest", "sandbox", status_code=502)
+    )
+    assert [record["id"] for record in result] == ["log-3", "log-2"]
+
+    result = asyncio.run(
+        main.query_access_logs.fn("tnttest", "sandbox", status_code=200, refresh=False)
+    )
+    assert [record["id"] for record in result] == ["log-1"]
+    assert fake_api.requested_pages == [1]
+    assert (tmp_path / "sandbox-tnttest.sqlite").exists()
+
+
+def test_aggregate_access_logs_pages_until_window_end(monkeypatch):
+    from test_accesslogs import FakeAuditsApi
+    from test_logstore import log
+
+    main = import_main()
+    monkeypatch.setattr(main.logstore, "STORE_DIR", None)
+    monkeypatch.setattr(main.accesslogs, "prepare_filters", lambda *a: {})
+    records = [log(i, status=500 if i % 4 == 0 else 200) for i in range(300)]
+    fake_api = FakeAuditsApi(records)
+    monkeypatch.setattr(main, "create_audits_api", lambda vault_id, env: fake_api)
+
+    result = asyncio.run(
+        main.aggregate_access_logs.fn(
+            "tnttest",
+            "sandbox",
+            since="2025-05-14T22:00:00Z",
+            until="2025-05-14T23:00:20+01:00",
+        )
+    )
+    assert result["window"] == {
+        "since": "2025-05-14T22:00:00",
+        "until": "2025-05-14T22:00:20",
+    }
+    assert result["total"] == 20
+    assert result["server_errors"] == 5
+    assert result["status_codes"] == {"200": 15, "500": 5}
+    assert not result["truncated"]
+    assert fake_api.requested_pages == [1]
+
+
+def test_aggregate_access_logs_defaults_to_recent_window(monkeypatch):
+    from test_accesslogs import FakeAuditsApi
+
+    main = import_main()
+    monkeypatch.setattr(main.logstore, "STORE_DIR", None)
+    monkeypatch.setattr(main.time, "time", lambda: 1747260090)  # 22:01:30Z
+    monkeypatch.setattr(main, "AGGREGATE_WINDOW", 3600)
+    fake_api = FakeAuditsApi([])
+    monkeypatch.setattr(main, "create_audits_api", lambda vault_id, env: fake_api)
+
+    result = asyncio.run(main.aggregate_access_logs.fn("tnttest", "sandbox"))
+    assert result["window"]["since"] == "2025-05-14T21:01:30"
+
+
+def test_aggregate_access_logs_uses_local_store(monkeypatch, tmp_path):
+    from test_accesslogs import FakeAuditsApi
+    from test_logstore import log
+
+    main = import_main()
+    monkeypatch.setattr(main.logstore, "STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(main.logstore, "_stores", {})
+    monkeypatch.setattr(main.accesslogs, "prepare_filters", lambda *a: {})
+    fake_api = FakeAuditsApi([log(i, route=f"route-{i % 2}") for i in range(10)])
+    monkeypatch.setattr(main, "create_audits_api", lambda vault_id, env: fake_api)
+
+    result = asyncio.run(
+        main.aggregate_access_logs.fn(
+            "tnttest", "sandbox", since="2025-05-14T22:00:02", max_records=5
+        )
+    )
+    assert result["total"] == 5
+    assert result["truncated"]
+    assert {route["route_id"] for route in result["top_routes"]} == {
+        "route-0",
+        "route-1",
+    }
+
+
+def test_aggregate_access_logs_reports_incomplete_store(monkeypatch, tmp_path):
+    from test_accesslogs import FakeAuditsApi
+    from test_logstore import log
+
+    main = import_main()
+    monkeypatch.setattr(main.logstore, "STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(main.logstore, "_stores", {})
+    fake_api = FakeAuditsApi([log(i) for i in range(350)])
+    monkeypatch.setattr(main, "create_audits_api", lambda vault_id, env: fake_api)
+    sync = main.logstore.sync
+
+    async def limited_sync(*args, **kwargs):
+        return await sync(*args, limit=150, **kwargs)
+
+    monkeypatch.setattr(main.logstore, "sync", limited_sync)
+
+    result = asyncio.run(
+        main.aggregate_access_logs.fn("tnttest", "sandbox", since="2025-05-14T22:00Z")
+    )
+    assert result["total"] == 150
+    assert result["truncated"]
+    assert result["coverage"] == {"since": "2025-05-14T22:03:20", "complete": False}
+
+    result = asyncio.run(
+        main.aggregate_access_logs.fn(
+            "tnttest", "sandbox", since="2025-05-14T22:04:00Z"
+        )
+    )
+    assert result["total"] == 110
+    assert not result["truncated"]
+    assert result["coverage"]["complete"]
+
+
+def test_get_access_log_details_by_request_ids(monkeypatch):
+    import requests
+
+    main = import_main()
+    calls = []
+
+    def get(url, headers):
+        request_id = url.rsplit("=", 1)[1]
+        calls.append(request_id)
+        response = MagicMock()
+        if request_id == "missing":
+            response.status_code = 404
+            response.text = "not found"
+            response.raise_for_status.side_effect = requests.HTTPError(
+                response=response
+            )
+        else:
+            # the shared log is returned for both request IDs
+            response.json.return_value = {
+                "data": [{"id": f"log-{request_id}"}, {"id": "log-shared"}]
+            }
+        return response
+
+    fake_session = MagicMock()
+    fake_session.get.side_effect = get
+    monkeypatch.setattr(main, "get_session", lambda env: fake_session)
+    monkeypatch.setattr(main, "get_jwt_token", MagicMock(return_value="token"))
+
+    result = asyncio.run(
+        main.get_access_log_details_by_request_ids.fn(
+            "tnttest", ["a", "b", "a", "missing"], "sandbox"
+        )
+    )
+    assert sorted(calls) == ["a", "b", "missing"]
+    assert [log["id"] for log in result["data"]] == ["log-a", "log-shared", "log-b"]
+    assert result["errors"] == {"missing": {"status": 404, "detail": "not found"}}
+    assert main.get_jwt_token.call_count == 1
+
+
+def test_get_access_log_details_by_request_ids_propagates_cancellation(monkeypatch):
+    main = import_main()
+    monkeypatch.setattr(main, "get_jwt_token", MagicMock(return_value="token"))
+
+    async def fetch(vault_id, request_id, environment, token):
+        if request_id == "b":
+            raise asyncio.CancelledError()
+        return {"data": []}
+
+    monkeypatch.setattr(main, "fetch_access_log_details", fetch)
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(
+            main.get_access_log_details_by_request_ids.fn(
+                "tnttest", ["a", "b"], "sandbox"
+            )
+        )
+
+
+def test_tail_access_logs_streams_new_logs(monkeypatch):
+    main = import_main()
+    batches = [[{"id": 1}, {"id": 2}], [], [{"id": 3}, {"id": 4}]]
+
+    async def follow(audits_api, vault_id, since):
+        for batch in batches:
+            yield batch, 0
+
+    monkeypatch.setattr(main.accesslogs, "follow", follow)
+    monkeypatch.setattr(main, "create_audits_api", lambda vault_id, env: object())
+    ctx = MagicMock()
+    ctx.info = AsyncMock()
+    ctx.report_progress = AsyncMock()
+
+    result = asyncio.run(
+        main.tail_access_logs.fn("tnttest", "sandbox", max_records=3, ctx=ctx)
+    )
+    assert result == [{"id": 1}, {"id": 2}, {"id": 3}]
+    assert ctx.info.await_count == 3
+    assert ctx.report_progress.await_count == 2
+
+
+def test_apply_routes_plans_and_applies(monkeypatch):
+    from test_routediff import route
+
+    main = import_main()
+    fake_api = MagicMock()
+    fake_api.routes.list.return_value = MagicMock(
+        status_code=200, body={"data": [route("a"), route("b")]}, headers={}
+    )
+    monkeypatch.setattr(main, "create_vault_management_api", lambda v, e: fake_api)
+    definitions = {"data": [route("a", host="new.example.com"), route("c")]}
+
+    plan = asyncio.run(main.apply_routes.fn("tnttest", definitions, "sandbox"))
+    assert plan["status"] == "planned"
+    fake_api.routes.update.assert_not_called()
+
+    result = asyncio.run(
+        main.apply_routes.fn(
+            "tnttest", definitions, "sandbox", prune=True, dry_run=False
+        )
+    )
+    assert result["status"] == "applied"
+    assert result["plan"]["create"] == ["c"]
+    assert result["plan"]["delete"] == ["b"]
+    assert sorted(call.args[0] for call in fake_api.routes.update.call_args_list) == [
+        "a",
+        "c",
+    ]
+    fake_api.routes.delete.assert_called_once_with("b")
+
+
+def test_apply_routes_rolls_back_on_failure(monkeypatch):
+    from test_routediff import route
+
+    main = import_main()
+    monkeypatch.setattr(main, "ROUTE_APPLY_CONCURRENCY", 1)
+    fake_api = MagicMock()
+    previous = route("a")
+    fake_api.routes.list.return_value = MagicMock(
+        status_code=200, body={"data": [previous]}, headers={}
+    )
+
+    def update(route_id, body):
+        if route_id == "bad":
+            raise RuntimeError("rejected")
+
+    fake_api.routes.update.side_effect = update
+    monkeypatch.setattr(main, "create_vault_management_api", lambda v, e: fake_api)
+    definitions = [route("a", host="new.example.com"), route("new"), route("bad")]
+
+    result = asyncio.run(
+        main.apply_routes.fn("tnttest", definitions, "sandbox", dry_run=False)
+    )
+    assert result["status"] == "rolled_back"
+    assert result["errors"] == {"bad": "rejected"}
+    fake_api.routes.delete.assert_called_once_with("new")
+    fake_api.routes.update.assert_any_call("a", body={"data": previous})
+
+
+def test_write_route_validates_and_skips_no_op_updates(monkeypatch):
+    from test_routediff import route
+
+    main = import_main()
+    fake_api = MagicMock()
+    fake_api.routes.list.return_value.body = {"data": [route("a")]}
+    fake_api.routes.list.return_value.headers = {}
+    monkeypatch.setattr("vgs.sdk.vaults_api.create_api", lambda *a, **kw: fake_api)
+
+    async def run():
+        await main.get_routes.fn("tnttest", "sandbox")
+        with pytest.raises(ValueError):
+            await main.update_route.fn("tnttest", "a", {"foo": "bar"}, "sandbox")
+        return await main.update_route.fn(
+            "tnttest", "a", json.dumps(route("a", updated_at="later")), "sandbox"
+        )
+
+    assert asyncio.run(run()) == "Route a is unchanged"
+    fake_api.routes.update.assert_not_called()
+
+
+def test_vault_management_api_is_built_once_per_vault(monkeypatch):
+    main = import_main()
+    create_api = MagicMock(side_effect=lambda *a: MagicMock())
+    monkeypatch.setattr("vgs.sdk.vaults_api.create_api", create_api)
+
+    first = main.create_vault_management_api("tnt1", "sandbox")
+    assert main.create_vault_management_api("tnt1", "sandbox") is first
+    assert main.create_vault_management_api("tnt1", "live") is not first
+    assert create_api.call_count == 2
+
+
+def test_compare_routes_across_environments(monkeypatch):
+    from test_routediff import route
+
+    main = import_main()
+    routes = {
+        "tntsandbox": [route("a"), route("b")],
+        "tntlive": [route("a", host="live.example.com")],
+    }
+
+    async def load_routes(vault_id, environment):
+        return routes[vault_id]
+
+    monkeypatch.setattr(main, "load_routes", load_routes)
+    result = asyncio.run(
+        main.compare_routes.fn({"sandbox": "tntsandbox", "live": "tntlive"})
+    )
+    assert result["baseline"] == "sandbox"
+    assert result["routes"] == {"sandbox": 2, "live": 1}
+    assert result["diffs"]["live"]["missing"] == ["b"]
+    assert result["diffs"]["live"]["changed"] == [
+        {"key": "a", "changes": ["host_endpoint"]}
+    ]
+
+    with pytest.raises(ValueError):
+        asyncio.run(main.compare_routes.fn({"sandbox": "tnt1", "staging": "tnt2"}))
+
+
+def test_identical_concurrent_reads_are_coalesced(monkeypatch):
+    main = import_main()
+    fake_api = MagicMock()
+
+    def retrieve(route_id):
+        time.sleep(0.05)
+        return MagicMock(body={"data": {"id": route_id}})
+
+    fake_api.routes.retrieve.side_effect = retrieve
+    monkeypatch.setattr("vgs.sdk.vaults_api.create_api", lambda *a, **kw: fake_api)
+    fake_response = MagicMock()
+    fake_response.json.return_value = {"data": [{"id": "log-1"}]}
+
+    def get(url, headers):
+        time.sleep(0.05)
+        return fake_response
+
+    fake_session = MagicMock()
+    fake_session.get.side_effect = get
+    monkeypatch.setattr(main, "get_session", lambda *a: fake_session)
+
+    async def run():
+        return await asyncio.gather(
+            *(main.get_route.fn("tnttest", "route-1", "sandbox") for _ in range(5)),
+            *(
+                main.get_access_log_details_by_request_id.fn(
+                    "tnttest", "req-1", "sandbox"
+                )
+                for _ in range(5)
+            ),
+        )
+
+    results = asyncio.run(run())
+    assert results[:5] == [{"id": "route-1"}] * 5
+    assert results[5:] == [{"data": [{"id": "log-1"}]}] * 5
+    assert fake_api.routes.retrieve.call_count == 1
+    assert fake_session.get.call_count == 1
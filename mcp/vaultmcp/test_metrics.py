@@ -0,0 +1,146 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+from fastmcp import Client, FastMCP
+from fastmcp.exceptions import ToolError
+from prometheus_client import REGISTRY, generate_latest
+from requests.adapters import BaseAdapter
+
+import metrics
+import vaultclient
+from routecache import RouteCache
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def http_error(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    return requests.HTTPError("failed", response=response)
+
+
+def test_status_of():
+    assert metrics.status_of(None) == "ok"
+    assert metrics.status_of(http_error(403)) == "403"
+    assert metrics.status_of(requests.ConnectionError("reset")) == "ConnectionError"
+
+
+def test_tool_calls_are_counted_by_outcome():
+    server = FastMCP("test")
+    server.add_middleware(metrics.ToolMetricsMiddleware())
+
+    @server.tool()
+    def lookup(fail: bool = False):
+        if fail:
+            raise http_error(403)
+        return "found"
+
+    async def run():
+        async with Client(server) as client:
+            await client.call_tool("lookup", {})
+            with pytest.raises(ToolError):
+                await client.call_tool("lookup", {"fail": True})
+
+    ok = sample("vaultmcp_tool_calls_total", tool="lookup", status="ok")
+    forbidden = sample("vaultmcp_tool_calls_total", tool="lookup", status="403")
+    timed = sample("vaultmcp_tool_duration_seconds_count", tool="lookup")
+
+    asyncio.run(run())
+
+    assert sample("vaultmcp_tool_calls_total", tool="lookup", status="ok") == ok + 1
+    assert (
+        sample("vaultmcp_tool_calls_total", tool="lookup", status="403")
+        == forbidden + 1
+    )
+    assert sample("vaultmcp_tool_duration_seconds_count", tool="lookup") == timed + 2
+    assert sample("vaultmcp_tools_in_flight", tool="lookup") == 0
+
+
+def test_session_requests_are_measured_by_family():
+    class Adapter(BaseAdapter):
+        def send(self, request, **kwargs):
+            if request.url.endswith("/down"):
+                raise requests.ConnectionError("connection refused")
+            response = requests.Response()
+            response.status_code = 502
+            response.request = request
+            return response
+
+    bad_gateway = sample(
+        "vaultmcp_upstream_requests_total", family="test", status="502"
+    )
+    failed = sample(
+        "vaultmcp_upstream_requests_total", family="test", status="ConnectionError"
+    )
+
+    session = vaultclient.PooledSession(family="test")
+    session.mount("https://", Adapter())
+    session.get("https://example.com/routes")
+    with pytest.raises(requests.ConnectionError):
+        session.get("https://example.com/down")
+
+    assert (
+        sample("vaultmcp_upstream_requests_total", family="test", status="502")
+        == bad_gateway + 1
+    )
+    assert (
+        sample(
+            "vaultmcp_upstream_requests_total", family="test", status="ConnectionError"
+        )
+        == failed + 1
+    )
+    assert sample("vaultmcp_upstream_request_duration_seconds_count", family="test")
+    assert sample("vaultmcp_upstream_requests_in_flight", family="test") == 0
+
+
+def test_token_fetches_are_measured():
+    keycloak = MagicMock()
+    keycloak.client.client_credentials.side_effect = [
+        {"access_token": "token", "expires_in": 300},
+        RuntimeError("keycloak is down"),
+    ]
+    ok = sample("vaultmcp_token_fetches_total", status="ok")
+    failed = sample("vaultmcp_token_fetches_total", status="RuntimeError")
+    timed = sample("vaultmcp_token_fetch_duration_seconds_count")
+
+    cache = vaultclient.TokenCache()
+    with patch("vaultclient.KeyCloak", return_value=keycloak):
+        cache.get("https://auth", "vgs", "client", "secret")
+        cache.get("https://auth", "vgs", "client", "secret")
+        cache.invalidate("https://auth", "vgs", "client", "secret")
+        with pytest.raises(RuntimeError):
+            cache.get("https://auth", "vgs", "client", "secret")
+
+    assert sample("vaultmcp_token_fetches_total", status="ok") == ok + 1
+    assert sample("vaultmcp_token_fetches_total", status="RuntimeError") == failed + 1
+    assert sample("vaultmcp_token_fetch_duration_seconds_count") == timed + 2
+
+
+def test_cache_hit_ratio_is_exported():
+    cache = RouteCache(ttl=30)
+    key = ("sandbox", "tnttest")
+    cache.get_routes(key)
+    cache.store(key, [{"id": "route-1"}])
+    cache.get_route(key, "route-1")
+    metrics.register_cache("test", cache)
+
+    assert sample("vaultmcp_cache_hits_total", cache="test") == 1
+    assert sample("vaultmcp_cache_misses_total", cache="test") == 1
+    assert sample("vaultmcp_cache_hit_ratio", cache="test") == 0.5
+    assert b'vaultmcp_cache_hit_ratio{cache="test"} 0.5' in generate_latest()
+
+
+def test_serve_is_off_without_a_port(monkeypatch):
+    start = MagicMock()
+    monkeypatch.setattr(metrics, "start_http_server", start)
+    monkeypatch.setattr(metrics, "METRICS_PORT", 0)
+    metrics.serve()
+    start.assert_not_called()
+
+    monkeypatch.setattr(metrics, "METRICS_PORT", 9464)
+    metrics.serve()
+    start.assert_called_once_with(9464, addr=metrics.METRICS_ADDR)
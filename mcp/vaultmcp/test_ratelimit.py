@@ -0,0 +1,55 @@
+import threading
+import time
+
+import pytest
+
+import ratelimit
+from ratelimit import AdaptiveRateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_retry_after_blocks_and_slows_down(clock):
+    limiter = AdaptiveRateLimiter(rate=10, burst=5)
+    limiter.observe(429, {"Retry-After": "3"})
+    assert limiter.rate == 5
+    assert limiter.reserve() == pytest.approx(3)
+
+    clock[0] += 3
+    for _ in range(20):
+        limiter.observe(200, {})
+    assert limiter.rate == 10
+
+
+def test_rate_limit_headers_set_rate_under_quota(clock):
+    limiter = AdaptiveRateLimiter(rate=20, burst=5)
+    limiter.observe(200, {"X-RateLimit-Remaining": "50", "X-RateLimit-Reset": "10"})
+    assert limiter.rate == pytest.approx(4.5)
+
+
+def test_threads_share_the_bucket():
+    limiter = AdaptiveRateLimiter(rate=100, burst=1)
+    started = time.monotonic()
+    threads = [threading.Thread(target=limiter.acquire) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert time.monotonic() - started >= 0.05
+
+
+def test_long_waits_fail_fast_and_keep_the_token(clock):
+    limiter = AdaptiveRateLimiter(rate=10, burst=1, max_wait=5)
+    limiter.observe(429, {"Retry-After": "60"})
+    with pytest.raises(ratelimit.RateLimitedError) as excinfo:
+        limiter.acquire()
+    assert excinfo.value.retry_in == pytest.approx(60)
+    assert limiter.tokens == 0
+
+    clock[0] += 60
+    limiter.acquire()
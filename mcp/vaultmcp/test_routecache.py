@@ -0,0 +1,78 @@
+from unittest.mock import patch
+
+from routecache import RouteCache
+
+ROUTES = [{"id": "route-1"}, {"id": "route-2"}]
+
+
+def test_routes_are_served_while_fresh():
+    cache = RouteCache(ttl=30)
+    key = ("sandbox", "tnttest")
+    with patch("routecache.time.monotonic", return_value=1000.0):
+        cache.store(key, ROUTES, '"v1"')
+    with patch("routecache.time.monotonic", return_value=1029.0):
+        assert cache.get_routes(key) == ROUTES
+        assert cache.get_route(key, "route-2") == {"id": "route-2"}
+        assert cache.get_route(key, "missing") is None
+    with patch("routecache.time.monotonic", return_value=1031.0):
+        assert cache.get_routes(key) is None
+        assert cache.get_route(key, "route-2") is None
+        assert cache.etag(key) == '"v1"'
+
+
+def test_revalidate_refreshes_stale_catalog():
+    cache = RouteCache(ttl=30)
+    key = ("sandbox", "tnttest")
+    with patch("routecache.time.monotonic", return_value=1000.0):
+        cache.store(key, ROUTES)
+    with patch("routecache.time.monotonic", return_value=1100.0):
+        assert cache.revalidate(key)
+        assert cache.get_routes(key) == ROUTES
+    generation = cache.generation(key)
+    cache.invalidate(key)
+    assert not cache.revalidate(key, generation)
+
+
+def test_invalidate_drops_catalog():
+    cache = RouteCache(ttl=30)
+    key = ("sandbox", "tnttest")
+    cache.store(key, ROUTES, '"v1"')
+    cache.invalidate(key)
+    assert cache.get_routes(key) is None
+    assert cache.etag(key) is None
+
+
+def test_store_is_dropped_after_invalidation():
+    cache = RouteCache(ttl=30)
+    key = ("sandbox", "tnttest")
+    other = ("sandbox", "tntother")
+    generation = cache.generation(key)
+    cache.invalidate(key)
+    cache.store(key, ROUTES, '"v1"', generation)
+    cache.store(other, ROUTES, '"v1"', cache.generation(other))
+    assert cache.get_routes(key) is None
+    assert cache.get_routes(other) == ROUTES
+
+    generation = cache.generation(other)
+    cache.clear()
+    cache.store(other, ROUTES, '"v2"', generation)
+    assert cache.etag(other) is None
+
+
+def test_zero_ttl_disables_cache():
+    cache = RouteCache(ttl=0)
+    key = ("sandbox", "tnttest")
+    cache.store(key, ROUTES)
+    assert cache.get_routes(key) is None
+
+
+def test_lookups_are_counted():
+    cache = RouteCache(ttl=30)
+    key = ("sandbox", "tnttest")
+    cache.get_routes(key)
+    cache.store(key, ROUTES)
+    cache.get_routes(key)
+    cache.get_route(key, "route-1")
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hit_ratio"] == 2 / 3
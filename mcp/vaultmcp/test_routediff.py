@@ -0,0 +1,116 @@
+import copy
+from pathlib import Path
+
+import pytest
+
+import routediff
+
+EXAMPLE_ROUTES = (
+    Path(__file__).parents[2] / "examples/secure-data-mcp-example/vgs-proxy-routes"
+)
+
+
+def route(route_id, host="example.com", entry_id="filter-1", updated_at="2025-05-14"):
+    return {
+        "id": route_id,
+        "type": "rule_chain",
+        "attributes": {
+            "id": route_id,
+            "host_endpoint": host,
+            "updated_at": updated_at,
+            "entries": [
+                {
+                    "id": entry_id,
+                    "phase": "REQUEST",
+                    "operation": "REDACT",
+                    "config": {
+                        "condition": "AND",
+                        "rules": [
+                            {
+                                "expression": {
+                                    "field": "PathInfo",
+                                    "operator": "equals",
+                                    "values": ["/post"],
+                                }
+                            }
+                        ],
+                    },
+                    "targets": ["body"],
+                    "transformer": "JSON_PATH",
+                    "transformer_config": ["$.account_number"],
+                }
+            ],
+        },
+    }
+
+
+def test_load_definitions_from_example_files():
+    text = "\n---\n".join(
+        path.read_text() for path in sorted(EXAMPLE_ROUTES.glob("*.yaml"))
+    )
+    routes = routediff.load_definitions(text)
+    assert len(routes) == 3
+    assert all(routediff.route_id(r) for r in routes)
+
+
+def test_load_definitions_shapes():
+    single = route("a")
+    assert routediff.load_definitions(single) == [single]
+    assert routediff.load_definitions({"data": [single]}) == [single]
+    assert routediff.load_definitions([{"data": single}, route("b")]) == [
+        single,
+        route("b"),
+    ]
+
+
+def test_plan_ignores_server_fields():
+    current = [route("a"), route("b"), route("c")]
+    desired = [
+        route("a", entry_id="other", updated_at="2026-01-01"),
+        route("b", host="changed.example.com"),
+        route("d"),
+    ]
+
+    plan = routediff.plan(desired, current)
+    assert routediff.summarize(plan) == {
+        "create": ["d"],
+        "update": [{"id": "b", "changes": ["host_endpoint"]}],
+        "delete": [],
+        "unchanged": 1,
+    }
+    assert routediff.summarize(routediff.plan(desired, current, prune=True))[
+        "delete"
+    ] == ["c"]
+
+
+def test_changes_addresses_list_items():
+    current = route("a")
+    desired = copy.deepcopy(current)
+    desired["attributes"]["entries"][0]["targets"] = ["headers"]
+    assert routediff.changes(
+        routediff.canonical(current), routediff.canonical(desired)
+    ) == ["entries[0].targets[0]"]
+
+
+def test_plan_rejects_bad_definitions():
+    with pytest.raises(ValueError):
+        routediff.plan([{"attributes": {}}], [])
+    with pytest.raises(ValueError):
+        routediff.plan([route("a"), route("a")], [])
+
+
+def test_compare_environments():
+    sandbox = [route("a"), route("b", host="sandbox.example.com"), route("c")]
+    live = [
+        route("a", entry_id="live"),
+        route("b", host="live.example.com"),
+        route("d"),
+    ]
+
+    assert routediff.compare(sandbox, live) == {
+        "missing": ["c"],
+        "extra": ["d"],
+        "changed": [{"key": "b", "changes": ["host_endpoint"]}],
+        "unchanged": 1,
+    }
+    assert routediff.compare(sandbox, live, ignore=("host_endpoint",))["unchanged"] == 2
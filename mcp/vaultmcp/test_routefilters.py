@@ -0,0 +1,64 @@
+import routefilters
+
+OUTBOUND = {
+    "id": "route-1",
+    "type": "rule_chain",
+    "attributes": {
+        "protocol": "http",
+        "host_endpoint": "your-ngrok-url.ngrok.app",
+        "destination_override_endpoint": "*",
+        "tags": {"name": "vgs-ai-demo", "source": "RouteContainer"},
+        "entries": [{"id": "filter-1"}],
+    },
+}
+INBOUND = {
+    "id": "route-2",
+    "type": "rule_chain",
+    "attributes": {
+        "protocol": "http",
+        "host_endpoint": "(.*)\\.verygoodproxy\\.com",
+        "destination_override_endpoint": "https://httpbin.org",
+        "tags": {"name": "echo"},
+        "entries": [],
+    },
+}
+
+
+def test_direction():
+    assert routefilters.direction(OUTBOUND) == "outbound"
+    assert routefilters.direction(INBOUND) == "inbound"
+
+
+def test_resolve():
+    assert routefilters.resolve(OUTBOUND, "id") == "route-1"
+    assert routefilters.resolve(OUTBOUND, "tags.name") == "vgs-ai-demo"
+    assert routefilters.resolve(OUTBOUND, "attributes.protocol") == "http"
+    assert routefilters.resolve(OUTBOUND, "tags.name.missing") is None
+    assert routefilters.resolve(OUTBOUND, "missing") is None
+
+
+def test_matches():
+    assert routefilters.matches(OUTBOUND, tag="vgs-ai-demo")
+    assert not routefilters.matches(INBOUND, tag="vgs-ai-demo")
+    assert routefilters.matches(INBOUND, protocol="HTTP")
+    assert routefilters.matches(OUTBOUND, host_endpoint="NGROK")
+    assert not routefilters.matches(INBOUND, host_endpoint="ngrok")
+    assert routefilters.matches(INBOUND, route_direction="inbound")
+    assert not routefilters.matches(OUTBOUND, route_direction="inbound")
+
+
+def test_project():
+    assert routefilters.project(OUTBOUND, ["id", "tags.name", "host_endpoint"]) == {
+        "id": "route-1",
+        "tags.name": "vgs-ai-demo",
+        "host_endpoint": "your-ngrok-url.ngrok.app",
+    }
+
+
+def test_paginate():
+    page = routefilters.paginate(list(range(5)), 2, 2)
+    assert page == {
+        "data": [2, 3],
+        "meta": {"total": 5, "page": 2, "page_size": 2, "pages": 3},
+    }
+    assert routefilters.paginate([], 1, 10)["meta"]["pages"] == 0
@@ -0,0 +1,59 @@
+import copy
+import json
+
+import pytest
+
+import routediff
+import routeschema
+from test_routediff import EXAMPLE_ROUTES, route
+
+
+def test_example_routes_are_valid():
+    for path in EXAMPLE_ROUTES.glob("*.yaml"):
+        for example in routediff.load_definitions(path.read_text()):
+            routeschema.validate({"data": example})
+
+
+def test_normalize_accepts_text_and_bare_routes():
+    expected = {"data": route("a")}
+    assert routeschema.normalize(json.dumps(expected), "a") == expected
+    bare = route("a")
+    del bare["id"]
+    assert routeschema.normalize(bare, "a")["data"]["id"] == "a"
+    assert "id" not in bare
+
+
+def test_normalize_rejects_bad_payloads():
+    with pytest.raises(ValueError, match="not valid JSON"):
+        routeschema.normalize("{", "a")
+    with pytest.raises(ValueError, match="for route a, not b"):
+        routeschema.normalize(route("a"), "b")
+
+
+def test_validate_reports_invalid_rules():
+    payload = {"data": route("a")}
+    entry = payload["data"]["attributes"]["entries"][0]
+    entry["phase"] = "SOMETIMES"
+    entry["config"]["rules"] = [{"condition": "AND", "rules": [{"expression": {}}]}]
+
+    with pytest.raises(ValueError) as error:
+        routeschema.validate(payload)
+    assert "entries[0].phase" in str(error.value)
+    assert "entries[0].config.rules[0]" in str(error.value)
+
+
+def test_validate_rejects_duplicate_transformers():
+    payload = {"data": route("a")}
+    entries = payload["data"]["attributes"]["entries"]
+    entries.append(copy.deepcopy(entries[0]))
+    with pytest.raises(ValueError, match=r"entries\[1\]: \$.account_number"):
+        routeschema.validate(payload)
+
+
+def test_fingerprint_ignores_server_fields():
+    assert routeschema.fingerprint(route("a")) == routeschema.fingerprint(
+        route("a", entry_id="other", updated_at="2026-01-01")
+    )
+    assert routeschema.fingerprint(route("a")) != routeschema.fingerprint(
+        route("a", host="other.example.com")
+    )
@@ -0,0 +1,46 @@
+import asyncio
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_result():
+    flight = SingleFlight()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return object()
+
+    async def run():
+        return await asyncio.gather(*(flight.do("key", fetch) for _ in range(10)))
+
+    results = asyncio.run(run())
+    assert calls == 1
+    assert all(result is results[0] for result in results)
+    assert flight.in_flight() == 0
+
+
+def test_forget_matching_keys():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+
+    async def run():
+        first = asyncio.ensure_future(flight.do(("route", "a"), fetch))
+        other = asyncio.ensure_future(flight.do(("log", "a"), fetch))
+        await asyncio.sleep(0)
+        flight.forget(lambda key: key[0] == "route")
+        await asyncio.gather(
+            first,
+            other,
+            flight.do(("route", "a"), fetch),
+            flight.do(("log", "a"), fetch),
+        )
+
+    asyncio.run(run())
+    assert len(calls) == 3
@@ -0,0 +1,247 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import vaultclient
+from vaultclient import TokenCache
+
+
+def test_jwt_token_follows_the_configured_secret(monkeypatch):
+    cache = MagicMock()
+    monkeypatch.setattr(vaultclient, "token_cache", cache)
+    monkeypatch.setenv("VGS_CLIENT_ID", "client")
+    monkeypatch.setenv("VGS_CLIENT_SECRET", "rotated")
+
+    vaultclient.get_jwt_token("https://auth", "vgs")
+
+    cache.get.assert_called_once_with("https://auth", "vgs", "client", "rotated")
+
+
+@pytest.fixture
+def mock_keycloak():
+    """Mock KeyCloak client issuing numbered tokens"""
+    keycloak = MagicMock()
+    counter = iter(range(1, 1000))
+    keycloak.client.client_credentials.side_effect = lambda: {
+        "access_token": f"token-{next(counter)}",
+        "expires_in": 300,
+    }
+    with patch("vaultclient.KeyCloak", return_value=keycloak) as mock_cls:
+        yield mock_cls, keycloak
+
+
+def test_token_is_reused_until_expiry(mock_keycloak):
+    mock_cls, keycloak = mock_keycloak
+    cache = TokenCache(refresh_margin=30)
+    assert cache.get("https://auth", "vgs", "client", "secret") == "token-1"
+    assert cache.get("https://auth", "vgs", "client", "secret") == "token-1"
+    assert keycloak.client.client_credentials.call_count == 1
+    assert mock_cls.call_count == 1
+
+
+def test_token_is_refreshed_before_expiry(mock_keycloak):
+    _, keycloak = mock_keycloak
+    cache = TokenCache(refresh_margin=30)
+    with patch("vaultclient.time.monotonic", return_value=1000.0):
+        assert cache.get("https://auth", "vgs", "client", "secret") == "token-1"
+    # 300s lifetime minus the 30s margin
+    with patch("vaultclient.time.monotonic", return_value=1269.0):
+        assert cache.get("https://auth", "vgs", "client", "secret") == "token-1"
+    with patch("vaultclient.time.monotonic", return_value=1271.0):
+        assert cache.get("https://auth", "vgs", "client", "secret") == "token-2"
+    assert keycloak.client.client_credentials.call_count == 2
+
+
+def test_tokens_are_keyed_by_realm_and_client(mock_keycloak):
+    cache = TokenCache()
+    assert cache.get("https://auth", "vgs", "client", "secret") == "token-1"
+    assert cache.get("https://auth", "other", "client", "secret") == "token-2"
+    assert cache.get("https://auth", "vgs", "client-2", "secret") == "token-3"
+    assert cache.get("https://auth", "vgs", "client", "secret") == "token-1"
+
+
+def test_rotated_secret_gets_a_new_client(mock_keycloak):
+    mock_cls, _ = mock_keycloak
+    cache = TokenCache()
+    assert cache.get("https://auth", "vgs", "client", "secret") == "token-1"
+    assert cache.get("https://auth", "vgs", "client", "rotated") == "token-2"
+    assert mock_cls.call_args.kwargs["secret"] == "rotated"
+
+
+def test_token_without_expiry_uses_default_ttl(mock_keycloak):
+    _, keycloak = mock_keycloak
+    keycloak.client.client_credentials.side_effect = lambda: {"access_token": "token"}
+    cache = TokenCache(refresh_margin=30, default_ttl=60)
+    with patch("vaultclient.time.monotonic", return_value=1000.0):
+        cache.get("https://auth", "vgs", "client", "secret")
+    with patch("vaultclient.time.monotonic", return_value=1029.0):
+        cache.get("https://auth", "vgs", "client", "secret")
+    assert keycloak.client.client_credentials.call_count == 1
+    with patch("vaultclient.time.monotonic", return_value=1031.0):
+        cache.get("https://auth", "vgs", "client", "secret")
+    assert keycloak.client.client_credentials.call_count == 2
+
+
+def test_invalidate_forces_refresh(mock_keycloak):
+    cache = TokenCache()
+    assert cache.get("https://auth", "vgs", "client", "secret") == "token-1"
+    cache.invalidate("https://auth", "vgs", "client", "secret")
+    assert cache.get("https://auth", "vgs", "client", "secret") == "token-2"
+
+
+def test_concurrent_refreshes_are_collapsed(mock_keycloak):
+    _, keycloak = mock_keycloak
+
+    def slow_credentials():
+        time.sleep(0.05)
+        return {"access_token": "token", "expires_in": 300}
+
+    keycloak.client.client_credentials.side_effect = slow_credentials
+    cache = TokenCache()
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(
+                cache.get("https://auth", "vgs", "client", "secret")
+            )
+        )
+        for _ in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["token"] * 10
+    assert keycloak.client.client_credentials.call_count == 1
+
+
+@pytest.fixture
+def reset_sessions():
+    vaultclient.close_sessions()
+    yield
+    vaultclient.close_sessions()
+
+
+def test_session_is_shared_per_environment(reset_sessions):
+    assert vaultclient.get_session("sandbox") is vaultclient.get_session("sandbox")
+    assert vaultclient.get_session("sandbox") is not vaultclient.get_session("live")
+
+
+def test_session_pool_size():
+    session = vaultclient.PooledSession(pool_size=7)
+    adapter = session.get_adapter("https://api.sandbox.verygoodsecurity.com")
+    assert adapter._pool_connections == 7
+    assert adapter._pool_maxsize == 7
+
+
+def test_session_applies_default_timeout():
+    session = vaultclient.PooledSession(connect_timeout=1, read_timeout=2)
+    with patch("requests.Session.request") as mock_request:
+        session.get("https://api.sandbox.verygoodsecurity.com/log-settings")
+        assert mock_request.call_args.kwargs["timeout"] == (1, 2)
+        session.get("https://api.sandbox.verygoodsecurity.com/log-settings", timeout=9)
+        assert mock_request.call_args.kwargs["timeout"] == 9
+
+
+def build_api(token):
+    from simple_rest_client.api import API
+
+    api = API(api_root_url="https://example.com", headers={"Authorization": token})
+    api.add_resource(resource_name="routes")
+    return api
+
+
+def test_api_client_is_reused_and_gets_rotated_token():
+    cache = vaultclient.ApiClientCache()
+    build = MagicMock(side_effect=lambda: build_api("Bearer token-1"))
+
+    first = cache.get(("vault_management", "tnt1", "sandbox"), "token-1", build)
+    second = cache.get(("vault_management", "tnt1", "sandbox"), "token-2", build)
+
+    assert first is second
+    assert build.call_count == 1
+    assert second.routes.headers["Authorization"] == "Bearer token-2"
+
+
+def test_api_client_cache_evicts_least_recently_used():
+    cache = vaultclient.ApiClientCache(max_size=2)
+    cache.get("a", "t", object)
+    b = cache.get("b", "t", object)
+    cache.get("a", "t", object)
+    cache.get("c", "t", object)
+    assert cache.get("b", "t", object) is not b
+
+
+def test_session_feeds_responses_to_its_limiter():
+    import requests
+    from requests.adapters import BaseAdapter
+
+    class ThrottledAdapter(BaseAdapter):
+        def send(self, request, **kwargs):
+            response = requests.Response()
+            response.status_code = 429
+            response.headers["Retry-After"] = "5"
+            response.request = request
+            return response
+
+    limiter = MagicMock()
+    session = vaultclient.PooledSession(limiter=limiter)
+    session.mount("https://", ThrottledAdapter())
+    session.get("https://example.com/rule-chains")
+
+    limiter.acquire.assert_called_once_with()
+    status, headers = limiter.observe.call_args.args
+    assert status == 429
+    assert headers["retry-after"] == "5"
+
+
+def test_session_fails_fast_once_its_breaker_opens():
+    import requests
+    from requests.adapters import BaseAdapter
+
+    from circuitbreaker import CircuitBreaker, CircuitOpenError
+
+    class DownAdapter(BaseAdapter):
+        calls = 0
+
+        def send(self, request, **kwargs):
+            DownAdapter.calls += 1
+            raise requests.ConnectionError("connection refused")
+
+    session = vaultclient.PooledSession(
+        breaker=CircuitBreaker("logs", failure_threshold=2, reset_timeout=60)
+    )
+    session.mount("https://", DownAdapter())
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            session.get("https://example.com/logs")
+    with pytest.raises(CircuitOpenError):
+        session.get("https://example.com/logs")
+    assert DownAdapter.calls == 2
+
+
+def test_sdk_clients_get_session_timeouts():
+    session = vaultclient.PooledSession(connect_timeout=1, read_timeout=2)
+    api = vaultclient.use_session(build_api("Bearer token"), session)
+    assert api.routes.session is session
+    assert api.routes.timeout == (1, 2)
+
+
+def test_keycloak_uses_a_bounded_session():
+    keycloak = vaultclient.KeyCloak("https://auth.example.com/auth", "vgs", "id", "s")
+    session = keycloak.client._realm.client.session
+    assert isinstance(session, vaultclient.PooledSession)
+    assert session.breaker is not None
+
+
+def test_api_client_cache_counts_hits_and_misses():
+    cache = vaultclient.ApiClientCache()
+    cache.get("a", "t", object)
+    cache.get("a", "t", object)
+    cache.get("b", "t", object)
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+    assert cache.stats()["size"] == 2
@@ -1,17 +1,52 @@
+import asyncio
+import functools
+import hashlib
 import logging
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
+import circuitbreaker
+import metrics
+import ratelimit
+import requests
 import vgs.sdk.routes
 import vgs.sdk.vaults_api
 from keycloak.realm import KeycloakRealm
+from requests.adapters import HTTPAdapter
 
 logging.basicConfig(level=logging.DEBUG)
 log = logging.getLogger()
 
+# Tokens are refreshed this many seconds before they actually expire so that a
+# token handed to a tool never expires mid-request.
+TOKEN_REFRESH_MARGIN = int(os.getenv("VGS_TOKEN_REFRESH_MARGIN", "30"))
+# Lifetime assumed for tokens whose response carries no `expires_in`.
+TOKEN_DEFAULT_TTL = int(os.getenv("VGS_TOKEN_DEFAULT_TTL", "60"))
+
+POOL_SIZE = int(os.getenv("VGS_HTTP_POOL_SIZE", "20"))
+CONNECT_TIMEOUT = float(os.getenv("VGS_HTTP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("VGS_HTTP_READ_TIMEOUT", "30"))
+
+# The vgs sdk and vgscli clients are blocking, tools hand them to this bounded
+# pool so a slow vault API call never stalls the event loop.
+BLOCKING_WORKERS = int(os.getenv("VGS_BLOCKING_WORKERS", "16"))
+
+API_CLIENT_CACHE_SIZE = int(os.getenv("VGS_API_CLIENT_CACHE_SIZE", "64"))
+
 
 class KeyCloak:
     def __init__(self, url, realm, client_id, secret):
         realm = KeycloakRealm(server_url=url, realm_name=realm)
+        # keycloak-client sends through a plain requests.Session without
+        # timeouts, give it a bounded one behind the Keycloak breaker
+        session = PooledSession(
+            breaker=circuitbreaker.get_breaker(f"Keycloak {url}"), family="keycloak"
+        )
+        session.headers.update(realm.client._headers)
+        realm.client._session = session
         self.client = realm.open_id_connect(client_id=client_id, client_secret=secret)
 
     def issue_token_for_client(self):
@@ -23,16 +58,280 @@ class KeyCloak:
         return token["access_token"]
 
 
+class TokenCache:
+    """
+    Process-wide cache of client-credentials tokens.
+
+    Tokens are keyed by (keycloak_url, realm, client_id, hash of the secret),
+    so a rotated secret gets a new client, and kept until shortly before
+    `expires_in` (or `default_ttl` when it is missing) runs out. Concurrent
+    callers that find a stale token wait on a per-key lock, so only one of
+    them goes to Keycloak.
+    """
+
+    def __init__(
+        self, refresh_margin=TOKEN_REFRESH_MARGIN, default_ttl=TOKEN_DEFAULT_TTL
+    ):
+        self.refresh_margin = refresh_margin
+        self.default_ttl = default_ttl
+        self._tokens = {}
+        self._clients = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _lock_for(self, key):
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    @staticmethod
+    def _key(url, realm, client_id, client_secret):
+        digest = hashlib.sha256((client_secret or "").encode()).hexdigest()
+        return url, realm, client_id, digest
+
+    def _fresh(self, key):
+        entry = self._tokens.get(key)
+        if entry and time.monotonic() < entry[1] - self.refresh_margin:
+            return entry[0]
+        return None
+
+    def get(self, url, realm, client_id, client_secret):
+        key = self._key(url, realm, client_id, client_secret)
+        token = self._fresh(key)
+        if token:
+            return token
+
+        with self._lock_for(key):
+            # another caller may have refreshed the token while we waited
+            token = self._fresh(key)
+            if token:
+                return token
+
+            keycloak = self._clients.get(key)
+            if keycloak is None:
+                log.debug(
+                    f"Initializing KeyCloak client for url: [{url}]; realm: [{realm}]; client_id: [{client_id}]"
+                )
+                keycloak = KeyCloak(
+                    url=url, realm=realm, client_id=client_id, secret=client_secret
+                )
+                self._clients[key] = keycloak
+
+            log.debug(f"Acquiring keycloak token for the client [{client_id}]")
+            started = time.perf_counter()
+            try:
+                response = keycloak.client.client_credentials()
+            except Exception as e:
+                metrics.TOKEN_FETCHES.labels(metrics.status_of(e)).inc()
+                raise
+            finally:
+                metrics.TOKEN_FETCH_DURATION.observe(time.perf_counter() - started)
+            metrics.TOKEN_FETCHES.labels("ok").inc()
+            token = response["access_token"]
+            expires_in = int(response.get("expires_in") or self.default_ttl)
+            expires_at = time.monotonic() + expires_in
+            self._tokens[key] = (token, expires_at)
+            return token
+
+    def invalidate(self, url, realm, client_id, client_secret):
+        self._tokens.pop(self._key(url, realm, client_id, client_secret), None)
+
+    def clear(self):
+        with self._guard:
+            self._tokens.clear()
+            self._clients.clear()
+
+
+token_cache = TokenCache()
+
+
 def get_jwt_token(url: str, realm: str):
     client_id = os.getenv("VGS_CLIENT_ID")
     client_secret = os.getenv("VGS_CLIENT_SECRET")
-    log.debug(
-        f"Initializing KeyCloak client for url: [{url}]; realm: [{realm}]; client_id: [{client_id}], {client_secret}"
-    )
+    return token_cache.get(url, realm, client_id, client_secret)
+
+
+class PooledSession(requests.Session):
+    """
+    A keep-alive session with a bounded connection pool and default timeouts.
+
+    When given a circuit breaker, requests fail fast while it is open and
+    connection errors, timeouts and 5xx responses count as failures. When
+    given a rate limiter, every request waits for its turn and every
+    response is fed back to the limiter. Requests are measured under
+    `family` in the upstream metrics.
+    """
+
+    def __init__(
+        self,
+        pool_size=POOL_SIZE,
+        connect_timeout=CONNECT_TIMEOUT,
+        read_timeout=READ_TIMEOUT,
+        limiter=None,
+        breaker=None,
+        family="other",
+    ):
+        super().__init__()
+        self.timeout = (connect_timeout, read_timeout)
+        self.limiter = limiter
+        self.breaker = breaker
+        self.family = family
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
 
-    keycloak = KeyCloak(url=url, realm=realm, client_id=client_id, secret=client_secret)
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        if self.limiter is not None:
+            self.limiter.acquire()
+        if self.breaker is not None:
+            self.breaker.before_call()
+        try:
+            with metrics.UpstreamCall(self.family) as call:
+                response = super().request(method, url, **kwargs)
+                call.status = response.status_code
+        except Exception:
+            if self.breaker is not None:
+                self.breaker.record_failure()
+            raise
+        if self.breaker is not None:
+            if response.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+        if self.limiter is not None:
+            self.limiter.observe(response.status_code, response.headers)
+        return response
 
-    log.debug(f"Acquiring keycloak token for the client [{client_id}]")
-    jwt_token = keycloak.issue_token_for_client()
 
-    return jwt_token
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(environment: str, family: str = "logs") -> PooledSession:
+    """
+    Return the shared session for one endpoint family of an environment,
+    creating it on first use.
+
+    Families are the vault management API ("routes"), the audits service
+    ("audits") and the logs endpoints of the public API ("logs"). They live
+    on different hosts, so each gets its own rate limiter and breaker.
+    """
+    with _sessions_lock:
+        key = (environment, family)
+        session = _sessions.get(key)
+        if session is None:
+            log.debug(f"Creating pooled HTTP session for {key}")
+            session = _sessions[key] = PooledSession(
+                limiter=ratelimit.get_limiter(environment, family),
+                breaker=circuitbreaker.get_breaker(f"{environment} {family} API"),
+                family=family,
+            )
+        return session
+
+
+def use_session(api, session):
+    """
+    Make every resource of a simple_rest_client API send through `session`,
+    with the session's connect and read timeouts.
+    """
+    for name in api.get_resource_list():
+        resource = getattr(api, name)
+        resource.session = session
+        resource.timeout = session.timeout
+    return api
+
+
+def close_sessions():
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+class ApiClientCache:
+    """
+    Bounded LRU of constructed simple_rest_client APIs.
+
+    Building a vault management API resolves the vault's API URL with an extra
+    request and every resource opens its own session, so clients are kept per
+    key and reused. When the token rotates, the cached client gets the new
+    Authorization header instead of being rebuilt.
+    """
+
+    def __init__(self, max_size=API_CLIENT_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._clients = OrderedDict()
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _lock_for(self, key):
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get(self, key, token, build):
+        """
+        Return the client for `key`, calling `build()` only when none is cached.
+        """
+        with self._lock_for(key):
+            with self._guard:
+                entry = self._clients.get(key)
+                if entry is not None:
+                    self._clients.move_to_end(key)
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            if entry is None:
+                log.debug(f"Creating API client for {key}")
+                entry = [build(), token]
+            elif entry[1] != token:
+                set_token(entry[0], token)
+                entry[1] = token
+            with self._guard:
+                self._clients[key] = entry
+                while len(self._clients) > self.max_size:
+                    evicted, _ = self._clients.popitem(last=False)
+                    self._locks.pop(evicted, None)
+            return entry[0]
+
+    def invalidate(self, key):
+        with self._guard:
+            self._clients.pop(key, None)
+
+    def clear(self):
+        with self._guard:
+            self._clients.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._guard:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._clients),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def set_token(api, token):
+    for name in api.get_resource_list():
+        getattr(api, name).headers["Authorization"] = f"Bearer {token}"
+
+
+_executor = ThreadPoolExecutor(
+    max_workers=BLOCKING_WORKERS, thread_name_prefix="vaultmcp-blocking"
+)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Run a blocking call on the shared worker pool and await its result.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _executor, functools.partial(func, *args, **kwargs)
+    )